@@ -2,10 +2,13 @@
 Flight data AI agent — natural language interface to the pipeline.
 
 Usage:
-    from api.agent import run_agent
+    from api.agent import run_agent, run_agent_stream
     result = await run_agent("Which airline has the worst delays?")
     # result = {"answer": "...", "tools_used": ["get_carrier_performance"]}
+
+    async for token in run_agent_stream("Which airline has the worst delays?"):
+        ...
 """
-from api.agent.graph import run_agent
+from api.agent.graph import run_agent, run_agent_stream, warmup
 
-__all__ = ["run_agent"]
+__all__ = ["run_agent", "run_agent_stream", "warmup"]
@@ -0,0 +1,154 @@
+"""
+Caches for the agent.
+
+Answer cache — repeat questions skip the ReAct loop entirely.
+
+Users ask the same analytical questions over and over ("worst airline for
+delays?"), and the underlying data only changes when the pipeline runs. A hit
+here returns the earlier answer in microseconds with zero Anthropic or database
+cost. Entries expire after a TTL so answers catch up with new pipeline loads.
+
+Tool result cache — tool outputs are kept in Redis, shared by every API
+worker, so a follow-up turn that repeats a tool call skips Postgres.
+
+Chat response cache — the chat endpoint stores finished responses in Redis
+too, so a resent question is answered by any worker without running the
+agent. Redis being down only disables these two caches.
+"""
+import hashlib
+import logging
+import re
+import time
+
+import redis
+from cachetools import TTLCache
+
+from api.config import settings
+
+logger = logging.getLogger("flight-agent")
+
+# Only touched from the event loop thread, so no locking is needed
+_answers: TTLCache = TTLCache(
+    maxsize=settings.agent_cache_size,
+    ttl=settings.agent_cache_ttl_seconds,
+)
+
+
+# Words that change the phrasing of a question but not the data it asks for,
+# e.g. "Show me the delays for ORD?" and "ORD delays" share a key
+_FILLER_WORDS = frozenset({
+    "a", "an", "the", "me", "us", "please", "can", "could", "you", "tell",
+    "show", "give", "what", "whats", "is", "are", "was", "were", "for", "of",
+})
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_question(question: str) -> str:
+    """Case-, whitespace- and punctuation-insensitive key with filler words
+    dropped, so reworded variants of the same question share an entry."""
+    words = _PUNCTUATION.sub("", question.lower()).split()
+    kept = [w for w in words if w not in _FILLER_WORDS]
+    # A question made only of filler words still needs a distinct key
+    return " ".join(kept or words)
+
+
+def get_cached_answer(key: str) -> dict | None:
+    """Return the cached {"answer", "tools_used"} for a normalized question, if any."""
+    return _answers.get(key)
+
+
+def cache_answer(key: str, result: dict) -> None:
+    """Store a finished agent result. Empty answers (e.g. the run hit the
+    tool-call cap) are not cached so the next ask gets a fresh attempt."""
+    if result.get("answer"):
+        _answers[key] = result
+
+
+# ─────────────────────────────────────────────────────────────
+# Redis-backed caches (shared by every API worker)
+# ─────────────────────────────────────────────────────────────
+
+TOOL_KEY_PREFIX = "tool:"
+CHAT_KEY_PREFIX = "chat:"
+
+# After a Redis error, skip the cache for this long instead of paying a
+# failed round-trip on every lookup
+_RETRY_AFTER_SECONDS = 30
+
+_redis: redis.Redis | None = None
+_redis_down_until = 0.0
+
+
+def _redis_client() -> redis.Redis | None:
+    """Lazily connect to Redis; None while it is marked unavailable."""
+    global _redis
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        _redis = redis.Redis(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            decode_responses=True,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+        )
+    return _redis
+
+
+def _mark_down(e: Exception) -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + _RETRY_AFTER_SECONDS
+    logger.warning("Redis cache unavailable, bypassing for %ds: %s", _RETRY_AFTER_SECONDS, e)
+
+
+def _redis_get(key: str) -> str | None:
+    client = _redis_client()
+    if client is None:
+        return None
+    try:
+        return client.get(key)
+    except redis.RedisError as e:
+        _mark_down(e)
+        return None
+
+
+def _redis_setex(key: str, ttl: int, value: str) -> None:
+    client = _redis_client()
+    if client is None:
+        return
+    try:
+        client.setex(key, ttl, value)
+    except redis.RedisError as e:
+        _mark_down(e)
+
+
+def get_tool_result(key: str) -> str | None:
+    """Return a cached tool result, or None on a miss or Redis error."""
+    return _redis_get(key)
+
+
+def cache_tool_result(key: str, result: str, ttl: int) -> None:
+    """Store a tool result for ttl seconds. Failures are ignored."""
+    _redis_setex(key, ttl, result)
+
+
+def chat_cache_key(question: str) -> str:
+    """Fixed-size Redis key for a question: a BLAKE2b digest of its
+    normalized form, so resends and lightly reworded variants share a slot."""
+    digest = hashlib.blake2b(normalize_question(question).encode(), digest_size=16).hexdigest()
+    return CHAT_KEY_PREFIX + digest
+
+
+def get_cached_chat(key: str) -> str | None:
+    """Return a cached ChatResponse JSON, or None on a miss, a Redis error,
+    or when the chat cache is switched off."""
+    if not settings.chat_cache_enabled:
+        return None
+    return _redis_get(key)
+
+
+def cache_chat(key: str, response_json: str) -> None:
+    """Store a ChatResponse JSON for chat_cache_ttl_seconds."""
+    if not settings.chat_cache_enabled:
+        return
+    _redis_setex(key, settings.chat_cache_ttl_seconds, response_json)
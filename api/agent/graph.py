@@ -12,12 +12,20 @@ This loops until the LLM has enough information to write a final answer.
 The graph is compiled once at startup and reused across all requests
 to avoid repeated validation overhead on every incoming question.
 """
+import asyncio
+import json
 import logging
+import threading
+import uuid
+from typing import AsyncIterator
 
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.errors import GraphRecursionError
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
 
+from api.config import settings
+from api.agent.cache import normalize_question, get_cached_answer, cache_answer
 from api.agent.state import AgentState
 from api.agent.tools import ALL_TOOLS
 from api.agent.llm import get_llm
@@ -25,30 +33,155 @@ from api.agent.prompts import SYSTEM_PROMPT
 
 logger = logging.getLogger("flight-agent")
 
+# Caps in-flight Anthropic calls across all requests in this process so a
+# burst of chats queues here instead of tripping the provider's 429s.
+_llm_slots = asyncio.Semaphore(settings.llm_max_concurrency)
+
+
+# Hard cap on tool calls per question, bounding worst-case latency and
+# Anthropic spend. Calls past the budget aren't run (the LLM is told so), and
+# once it's spent the LLM gets one last turn with tool use disabled, so the
+# run still ends in an answer built from the data already gathered.
+MAX_TOOL_CALLS = 6
+
+# Tool result sent for calls cut by MAX_TOOL_CALLS
+TOOL_LIMIT_MESSAGE = "Error: tool call limit reached — answer with the data already gathered"
+
+# Caps the number of graph steps (agent + tools visits) per run. Derived from
+# the tool cap so it never fires first: one call per turn costs an agent and
+# a tools step each, plus the final no-tools agent turn, with a little slack.
+RECURSION_LIMIT = 2 * MAX_TOOL_CALLS + 3
+
+# Every ReAct turn re-sends the whole history, so old tool payloads are paid
+# for again on each turn. Only the most recent results are sent in full;
+# older ones are cut down to a short prefix (the graph state keeps them whole).
+_FULL_TOOL_RESULTS = 4
+_TRUNCATED_TOOL_CHARS = 500
+
+
+def _messages_for_llm(messages: list) -> list:
+    """Copy of the history with all but the newest tool results truncated."""
+    tool_positions = [i for i, m in enumerate(messages) if isinstance(m, ToolMessage)]
+    stale = tool_positions[:-_FULL_TOOL_RESULTS]
+    if not stale:
+        return messages
+
+    trimmed = list(messages)
+    for i in stale:
+        msg = trimmed[i]
+        if isinstance(msg.content, str) and len(msg.content) > _TRUNCATED_TOOL_CHARS:
+            trimmed[i] = msg.model_copy(
+                update={"content": msg.content[:_TRUNCATED_TOOL_CHARS] + "...[truncated]"}
+            )
+    return trimmed
+
+
+def _log_cache_usage(response) -> None:
+    """Debug-log how much of the prompt Anthropic served from its prompt cache.
+    cache_read staying at 0 across requests means the cached prefix (tools +
+    system prompt) changed or the breakpoint isn't being applied."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    usage = getattr(response, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    logger.debug(
+        "LLM usage: input=%s cache_read=%s cache_creation=%s output=%s",
+        usage.get("input_tokens"), details.get("cache_read"),
+        details.get("cache_creation"), usage.get("output_tokens"),
+    )
+
+
+# Name → tool lookup, built once so dispatch is a dict hit per tool call
+_TOOLS_BY_NAME = {t.name: t for t in ALL_TOOLS}
+
+
+def _tool_key(tool_call: dict) -> tuple[str, str]:
+    """Identity of a tool call; args are sorted so key order doesn't matter."""
+    return tool_call["name"], json.dumps(tool_call["args"], sort_keys=True, default=str)
+
+
+async def _execute_tool(tool_call: dict) -> tuple[str, str]:
+    """Run a single tool call and return (content, status). Failures are
+    returned to the LLM as an error result (like LangGraph's ToolNode does)
+    so it can recover or explain, instead of aborting the whole run.
+    Results across turns and questions are cached by the tools themselves
+    (tool_cache in tools.py), so there is no second cache here."""
+    name = tool_call["name"]
+    tool = _TOOLS_BY_NAME.get(name)
+    if tool is None:
+        return f"Error: unknown tool '{name}'", "error"
+    try:
+        # Sync tools are run in a worker thread by ainvoke, so a slow query
+        # doesn't block the event loop or the other calls in this turn
+        result = await tool.ainvoke(tool_call["args"])
+    except Exception as e:
+        logger.warning("Tool %s failed: %s", name, e)
+        return f"Error: {e}", "error"
+    # Tools already return compact JSON strings; anything else is encoded the
+    # same way rather than via str(), whose Python repr wastes tokens
+    if not isinstance(result, str):
+        result = json.dumps(result, separators=(",", ":"), default=str)
+    return result, "success"
+
 
 def _build_graph() -> StateGraph:
     """Wire up the two-node ReAct graph: agent ↔ tools."""
 
-    # Bind all 9 tools so the LLM knows what's available
+    # Bind all 9 tools so the LLM knows what's available. This runs once per
+    # compiled graph, so the tool schemas are serialized exactly once.
     llm = get_llm().bind_tools(ALL_TOOLS)
+    # Same tools (so the cached prompt prefix still matches) but none may be
+    # called: used for the final turn once the tool budget is spent
+    final_llm = get_llm().bind_tools(ALL_TOOLS, tool_choice={"type": "none"})
 
-    def agent_node(state: AgentState) -> dict:
+    async def agent_node(state: AgentState) -> dict:
         """Send the full conversation history to the LLM and get a response.
         The response either contains tool_calls (needs more data) or
-        plain content (ready to answer)."""
-        response = llm.invoke(state["messages"])
+        plain content (ready to answer).
+
+        Async so the event loop keeps serving other requests while this one
+        waits on the network."""
+        model = final_llm if state.get("tool_call_count", 0) >= MAX_TOOL_CALLS else llm
+        async with _llm_slots:
+            response = await model.ainvoke(_messages_for_llm(state["messages"]))
+        _log_cache_usage(response)
         return {"messages": [response]}
 
     def should_continue(state: AgentState) -> str:
         """Route based on whether the LLM wants to call tools or is done."""
         last = state["messages"][-1]
         if hasattr(last, "tool_calls") and last.tool_calls:
+            if state.get("tool_call_count", 0) >= MAX_TOOL_CALLS:
+                logger.warning("Tool call cap (%d) reached, ending run", MAX_TOOL_CALLS)
+                return END
             return "tools"
         return END
 
-    # ToolNode handles dispatching — it reads tool_calls from the last message,
-    # executes the matching Python functions, and adds ToolMessage results
-    tool_node = ToolNode(ALL_TOOLS)
+    async def tool_node(state: AgentState) -> dict:
+        """Execute every tool call from the last LLM response and add the
+        ToolMessage results. Calls in the same turn are independent (e.g.
+        carrier stats + airport stats), so they run concurrently; a call
+        repeated within the turn runs once and its result is shared.
+        Only as many distinct calls as remain in MAX_TOOL_CALLS are run; the
+        rest still get a result (every tool call needs one) saying so."""
+        tool_calls = state["messages"][-1].tool_calls
+        unique = {}
+        for tc in tool_calls:
+            unique.setdefault(_tool_key(tc), tc)
+        budget = max(MAX_TOOL_CALLS - state.get("tool_call_count", 0), 0)
+        to_run = dict(list(unique.items())[:budget])
+        if len(unique) > budget:
+            logger.warning("Tool call cap (%d) reached, skipping %d call(s)",
+                           MAX_TOOL_CALLS, len(unique) - budget)
+        outputs = dict(zip(to_run, await asyncio.gather(*map(_execute_tool, to_run.values()))))
+
+        messages = []
+        for tc in tool_calls:
+            content, status = outputs.get(_tool_key(tc), (TOOL_LIMIT_MESSAGE, "error"))
+            messages.append(ToolMessage(
+                content=content, name=tc["name"], tool_call_id=tc["id"], status=status,
+            ))
+        return {"messages": messages, "tool_call_count": len(to_run)}
 
     # Assemble the graph
     graph = StateGraph(AgentState)
@@ -61,50 +194,213 @@ def _build_graph() -> StateGraph:
     return graph
 
 
-# Lazy-compiled singleton — built on first request, reused after
+# Checkpoints every superstep of every run, so a run that fails part-way
+# (e.g. the LLM errors after three tool calls) can be resumed from its last
+# completed step instead of paying for those LLM turns and queries again.
+# Each run gets its own thread; threads are deleted once the run finishes.
+_checkpointer = MemorySaver()
+
+# Threads of failed runs, keyed by normalized question, oldest first. The next
+# ask of the same question resumes the thread. Capped so abandoned failures
+# don't hold checkpoints forever.
+MAX_RESUMABLE_RUNS = 128
+_resumable: dict[str, str] = {}
+
+# Lazy-compiled singleton — built on first request, reused after.
+# The lock stops a burst of concurrent first requests from each compiling
+# (and binding tools to) their own copy of the graph.
 _compiled = None
+_compile_lock = threading.Lock()
 
 
 def _get_graph():
-    """Get or build the compiled graph (singleton pattern)."""
+    """Get or build the compiled graph (double-checked locking singleton)."""
     global _compiled
     if _compiled is None:
-        _compiled = _build_graph().compile()
+        with _compile_lock:
+            if _compiled is None:
+                # recursion_limit is baked into the compiled graph's config
+                # rather than passed on every invocation
+                _compiled = _build_graph().compile(checkpointer=_checkpointer).with_config(
+                    {"recursion_limit": RECURSION_LIMIT}
+                )
     return _compiled
 
 
+# In-flight runs keyed by normalized question. Concurrent requests asking the
+# same thing share one ReAct loop instead of each paying for their own LLM turns.
+_inflight: dict[str, asyncio.Task] = {}
+# Callers currently waiting on each in-flight run. When the last one gives up
+# (timeout or disconnect) nobody wants the answer, so the run is cancelled
+# rather than left holding an LLM slot.
+_waiters: dict[asyncio.Task, int] = {}
+
+
 async def run_agent(question: str) -> dict:
     """
     Main entry point: take a natural language question, run the ReAct loop,
     and return the answer with a list of tools that were called.
 
+    Recently answered questions are served from the answer cache, and identical
+    questions that arrive while a run is already in flight wait on that run
+    rather than starting a new one.
+
+    Raises asyncio.TimeoutError if no answer arrives within
+    settings.agent_timeout_seconds.
+
     Returns:
         {"answer": str, "tools_used": list[str]}
     """
+    key = normalize_question(question)
+    cached = get_cached_answer(key)
+    if cached is not None:
+        return cached
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_run_graph(question, key))
+        _inflight[key] = task
+
+        def _finish(t: asyncio.Task) -> None:
+            _inflight.pop(key, None)
+            if not t.cancelled() and t.exception() is None:
+                cache_answer(key, t.result())
+
+        task.add_done_callback(_finish)
+
+    # shield() so one caller disconnecting or timing out doesn't cancel the
+    # run for the others; only the last waiter leaving cancels it
+    _waiters[task] = _waiters.get(task, 0) + 1
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), settings.agent_timeout_seconds)
+    finally:
+        _waiters[task] -= 1
+        if not _waiters[task]:
+            del _waiters[task]
+            if not task.done():
+                task.cancel()
+
+
+# Built once and shared by every run. Nodes only ever append to the message
+# list, and the fixed id stops add_messages from stamping one onto it.
+# The cache_control breakpoint on the system block lets Anthropic reuse the
+# cached prefix across requests. Tool definitions come before the system
+# prompt in the request, so they fall inside the cached prefix as well.
+_SYSTEM_MSG = SystemMessage(content=[{
+    "type": "text",
+    "text": SYSTEM_PROMPT,
+    "cache_control": {"type": "ephemeral"},
+}], id="system-prompt")
+
+
+def _initial_state(question: str) -> dict:
+    """Seed the conversation with the system prompt and user's question."""
+    return {"messages": [_SYSTEM_MSG, HumanMessage(content=question)]}
+
+
+def _thread_config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def _remember_failed_run(key: str, thread_id: str) -> None:
+    """Keep a failed run's thread so the next ask can resume it."""
+    _resumable[key] = thread_id
+    while len(_resumable) > MAX_RESUMABLE_RUNS:
+        oldest = next(iter(_resumable))
+        _checkpointer.delete_thread(_resumable.pop(oldest))
+
+
+async def _run_graph(question: str, key: str) -> dict:
+    """Run the ReAct loop for a single question and extract the answer.
+    If an earlier run of the same question failed part-way, resume it from
+    its last checkpoint rather than starting over."""
     graph = _get_graph()
 
-    # Seed the conversation with the system prompt and user's question
-    initial_state = {
-        "messages": [
-            SystemMessage(content=SYSTEM_PROMPT),
-            HumanMessage(content=question),
-        ]
-    }
+    thread_id = _resumable.pop(key, None)
+    if thread_id is not None:
+        logger.info("Resuming failed run for question: %.80s", question)
+        graph_input = None  # None continues from the thread's last checkpoint
+    else:
+        thread_id = uuid.uuid4().hex
+        graph_input = _initial_state(question)
 
-    # Run the loop — recursion_limit caps tool-calling iterations
-    # to prevent runaway loops (e.g., LLM keeps asking for more data)
-    result = await graph.ainvoke(initial_state, config={"recursion_limit": 10})
+    # Runaway loops (e.g., LLM keeps asking for more data) are bounded by
+    # MAX_TOOL_CALLS and the compiled-in recursion limit
+    resumable = False
+    try:
+        result = await graph.ainvoke(graph_input, _thread_config(thread_id))
+    except GraphRecursionError:
+        raise  # resuming would only run further past the step limit
+    except Exception:
+        resumable = True
+        raise
+    finally:
+        if resumable:
+            _remember_failed_run(key, thread_id)
+        else:
+            _checkpointer.delete_thread(thread_id)
 
-    # Walk through all messages to find the final answer and which tools were used
+    messages = result["messages"]
+
+    # Collect tool names in first-call order; dict keys give ordered dedup for free
+    tools_used = {}
+    for msg in messages:
+        for tc in getattr(msg, "tool_calls", None) or ():
+            tools_used.setdefault(tc["name"], None)
+
+    # The final answer is the last AI message that has text but no tool calls,
+    # so scan backwards and stop at the first match. With streaming on and
+    # tools bound, content arrives as a list of blocks rather than a str.
     answer = ""
-    tools_used = []
-    for msg in result["messages"]:
-        if hasattr(msg, "tool_calls") and msg.tool_calls:
-            tools_used.extend(tc["name"] for tc in msg.tool_calls)
-        # The final answer is the last AI message that has content but no tool calls
-        if hasattr(msg, "content") and msg.content and not getattr(msg, "tool_calls", None):
-            if msg.type == "ai":
-                answer = msg.content
-
-    # Deduplicate tools while preserving order
-    return {"answer": answer, "tools_used": list(dict.fromkeys(tools_used))}
+    for msg in reversed(messages):
+        if msg.type == "ai" and not getattr(msg, "tool_calls", None):
+            answer = _chunk_text(msg.content)
+            if answer:
+                break
+    if not answer:
+        # Surfaced as an error (never cached) rather than a 200 with no answer
+        raise RuntimeError("agent finished without an answer")
+
+    return {"answer": answer, "tools_used": list(tools_used)}
+
+
+async def warmup() -> None:
+    """Pay the cold-start costs before the first user does: compile the graph
+    and open the Anthropic connection with a 1-token request."""
+    _get_graph()
+    await get_llm().ainvoke([HumanMessage(content="ping")], max_tokens=1)
+
+
+def _chunk_text(content) -> str:
+    """Pull the text out of message content. Anthropic messages and streamed
+    chunks carry either a plain string or a list of content blocks (text and
+    tool_use / partial tool_use JSON)."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") for block in content
+        if isinstance(block, dict) and block.get("type") == "text"
+    )
+
+
+async def run_agent_stream(question: str) -> AsyncIterator[str]:
+    """
+    Streaming variant of run_agent: yields answer text as the LLM produces it,
+    so clients see the first tokens long before the full answer is decoded.
+
+    Text from every LLM turn is streamed, including any short preamble the
+    model writes before it calls a tool.
+    """
+    graph = _get_graph()
+    thread_id = uuid.uuid4().hex
+    try:
+        async for event in graph.astream_events(
+            _initial_state(question), _thread_config(thread_id), version="v2"
+        ):
+            if event["event"] == "on_chat_model_stream":
+                text = _chunk_text(event["data"]["chunk"].content)
+                if text:
+                    yield text
+    finally:
+        # Streamed text can't be un-sent, so a streamed run is never resumed
+        _checkpointer.delete_thread(thread_id)
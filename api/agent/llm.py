@@ -4,16 +4,25 @@ LLM factory — creates a configured Anthropic chat model.
 Using Sonnet because it's the sweet spot for tool-calling tasks:
 smart enough to pick the right tools, cost-effective at ~$0.01-0.03 per query.
 Temperature 0 for deterministic, factual answers (not creative writing).
+Streaming is on so run_agent_stream can forward tokens as they arrive.
 """
+from functools import lru_cache
+
 from langchain_anthropic import ChatAnthropic
 from api.config import settings
 
 
+@lru_cache(maxsize=1)
 def get_llm() -> ChatAnthropic:
-    """Build a ChatAnthropic instance with project-wide settings."""
+    """Build the ChatAnthropic instance with project-wide settings.
+
+    Cached so every caller shares one instance — and with it one underlying
+    HTTP client, whose keep-alive pool spares later requests a TLS handshake.
+    """
     return ChatAnthropic(
         model="claude-sonnet-4-20250514",
         api_key=settings.anthropic_api_key,
         max_tokens=1024,
         temperature=0,
+        streaming=True,
     )
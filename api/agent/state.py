@@ -3,8 +3,10 @@ Shared state that flows between nodes in the agent graph.
 
 The key insight here is the `add_messages` annotation — it tells LangGraph
 to APPEND new messages instead of replacing the list. Without it, each node
-would overwrite everything the previous node produced.
+would overwrite everything the previous node produced. `tool_call_count` works
+the same way with `operator.add`: each tools step adds how many calls it ran.
 """
+import operator
 from typing import Annotated
 from typing_extensions import TypedDict
 from langgraph.graph.message import add_messages
@@ -15,3 +17,5 @@ class AgentState(TypedDict):
     # The full conversation history: system prompt, user question,
     # LLM responses, tool results — all accumulate here as the loop runs.
     messages: Annotated[list[BaseMessage], add_messages]
+    # Running total of tool calls executed, so the router can cap them cheaply
+    tool_call_count: Annotated[int, operator.add]
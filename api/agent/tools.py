@@ -1,8 +1,9 @@
 """
 9 tools that give the AI agent hands to query the database.
 
-Each tool calls fetch_all/fetch_one directly — same connection pool as the
-API routers. No HTTP self-calls, no serialization overhead, no auth needed.
+Each tool calls fetch_all/fetch_one directly (via thin wrappers that add a
+statement timeout) — same connection pool as the API routers. No HTTP
+self-calls, no serialization overhead, no auth needed.
 
 The @tool decorator does three things:
 1. Registers the function so LangGraph can execute it
@@ -11,36 +12,177 @@ The @tool decorator does three things:
 3. Converts the function signature into a parameter schema
 
 Results are capped at 20 rows to stay within the LLM's context window
-and keep per-query costs around $0.01.
+and keep per-query costs around $0.01. Row lists are sent as columnar
+tables ({"columns": [...], "rows": [[...]]}) so column names aren't
+repeated on every row. Results are also cached in Redis per (tool, args)
+via @tool_cache, so repeat calls across chat turns skip Postgres. Cache keys
+carry the time of the latest pipeline load, so a new load retires them all.
 """
+import functools
+import hashlib
+import inspect
 import json
+import operator
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from datetime import date, datetime
 
+import orjson
+from cachetools.func import ttl_cache
 from langchain_core.tools import tool
 
+from api.config import settings
+from api.agent.cache import TOOL_KEY_PREFIX, get_tool_result, cache_tool_result
 from api.database import fetch_all, fetch_one
 
 
 def _serialize(obj):
-    """Handle Decimal and date types that json.dumps can't serialize natively.
-    PostgreSQL returns Decimals for ROUND() and date objects for date columns."""
+    """Handle the one type orjson can't serialize natively: PostgreSQL returns
+    Decimals for ROUND(). Dates and datetimes are encoded by orjson itself."""
     if isinstance(obj, Decimal):
         return float(obj)
-    if isinstance(obj, (date, datetime)):
-        return str(obj)
     raise TypeError(f"Type {type(obj)} not serializable")
 
 
-def _to_json(data, max_items: int = 20) -> str:
-    """Serialize to JSON string, capping list results.
+# Row cap for list results. Queries that can return long lists push it into
+# SQL as LIMIT so the extra rows are never fetched in the first place.
+MAX_ROWS = 20
+
+
+def _tabulate(data):
+    """Convert lists of same-shaped row dicts into a columnar table,
+    {"columns": [...], "rows": [[...], ...]}, so each key is sent once
+    instead of once per row. Recurses into dict values (e.g. the sections
+    of get_carrier_details); scalar dicts like a single summary row are
+    left as they are."""
+    if isinstance(data, dict):
+        return {k: _tabulate(v) for k, v in data.items()}
+    if isinstance(data, list) and data and all(isinstance(r, dict) for r in data):
+        columns = list(data[0].keys())
+        if len(columns) > 1 and all(len(r) == len(columns) for r in data):
+            # itemgetter pulls every column of a row in one C-level call,
+            # several times faster than a per-key comprehension. A row
+            # missing one of the columns means the list isn't a table.
+            get_row = operator.itemgetter(*columns)
+            try:
+                return {"columns": columns, "rows": [get_row(r) for r in data]}
+            except KeyError:
+                pass
+    return data
+
+
+def _like_escape(text: str) -> str:
+    """Escape LIKE metacharacters so user/LLM text matches literally
+    (a bare '%' or '_' would otherwise match every row). Pair with
+    ESCAPE '\\' in the query."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _to_json(data, max_items: int = MAX_ROWS) -> str:
+    """Serialize to compact columnar JSON string (via orjson), capping list results.
     A query might return 10K rows, but the LLM only needs the top 20
-    to answer most questions. Keeps context small and costs low."""
+    to answer most questions. No whitespace after separators and no
+    repeated row keys — every character is re-sent to the LLM on each
+    later turn. Keeps context small and costs low."""
     if isinstance(data, list) and len(data) > max_items:
         data = data[:max_items]
-    return json.dumps(data, default=_serialize)
+    return orjson.dumps(_tabulate(data), default=_serialize).decode()
 
 
+# Tool result TTLs. Inventory and carrier rankings only move when the
+# pipeline loads new data (which changes the cache key, see _data_version);
+# drill-downs into a single date and system health are kept briefly.
+STATIC_TTL = 24 * 3600
+ANALYSIS_TTL = 3600
+DRILL_TTL = 300
+
+
+# Tools report failures (unknown code, query error) as a top-level
+# {"error": ...} object, which _to_json writes first-key-first
+_ERROR_PREFIX = '{"error":'
+
+
+def _is_error_result(result) -> bool:
+    return isinstance(result, str) and result.startswith(_ERROR_PREFIX)
+
+
+def tool_cache(ttl: int):
+    """Cache a tool's JSON result in Redis, keyed by tool name + arguments.
+    Error results are never cached, so a transient failure isn't replayed.
+
+    Goes under @tool so the LLM-facing schema still comes from the wrapped
+    function's signature. Defaults are filled in before hashing, so calling
+    with or without a default argument shares one entry."""
+    def decorator(fn):
+        sig = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            digest = hashlib.blake2b(
+                json.dumps([_data_version(), bound.arguments], sort_keys=True, default=str).encode(),
+                digest_size=16,
+            ).hexdigest()
+            key = f"{TOOL_KEY_PREFIX}{fn.__name__}:{digest}"
+
+            cached = get_tool_result(key)
+            if cached is not None:
+                return cached
+            result = fn(*args, **kwargs)
+            if not _is_error_result(result):
+                cache_tool_result(key, result, ttl)
+            return result
+
+        return wrapper
+    return decorator
+
+
+# Every tool query runs with a transaction-local statement_timeout, so one
+# runaway analytics query is cancelled instead of holding a pooled connection
+# (and the event loop's worker thread) hostage. SET LOCAL ends with the
+# transaction, so the pooled connection goes back with its default timeout.
+_STATEMENT_TIMEOUT = f"SET LOCAL statement_timeout = {settings.tool_statement_timeout_ms};\n"
+
+
+def _fetch_all(sql: str, params: dict | None = None) -> list[dict]:
+    return fetch_all(_STATEMENT_TIMEOUT + sql, params)
+
+
+def _fetch_one(sql: str, params: dict | None = None) -> dict | None:
+    return fetch_one(_STATEMENT_TIMEOUT + sql, params)
+
+
+SQL_DATA_VERSION = "SELECT MAX(completed_at) AS version FROM pipeline_runs WHERE status = 'completed'"
+
+# How long a worker trusts its last data-version lookup
+DATA_VERSION_TTL = 60
+
+
+@ttl_cache(maxsize=1, ttl=DATA_VERSION_TTL)
+def _data_version() -> str:
+    """Completion time of the newest successful pipeline load. It is part of
+    every tool cache key, so results cached before a load are never served
+    after it, whatever their TTL."""
+    row = _fetch_one(SQL_DATA_VERSION)
+    return str(row["version"]) if row else ""
+
+
+# Independent sub-queries of one tool run side by side on this pool. It is
+# sized to the DB connection pool so fan-out never waits on a connection.
+_query_pool = ThreadPoolExecutor(max_workers=settings.db_pool_max, thread_name_prefix="tool-query")
+
+
+def _concurrently(*queries) -> list:
+    """Run (fetch_fn, sql, params) queries in parallel, results in the same order.
+    Wall-clock becomes the slowest query rather than the sum of all of them."""
+    futures = [_query_pool.submit(fetch, sql, params) for fetch, sql, params in queries]
+    return [f.result() for f in futures]
+
+
+# Fixed-shape queries live in module-level SQL_* constants, built once at
+# import; only queries whose WHERE clause depends on the arguments are
+# assembled per call.
+
 # Reusable weather-flight join clause — matches flights to weather observations
 # using precomputed integer hour columns for fast equi-joins
 WEATHER_JOIN = """
@@ -50,34 +192,48 @@ WEATHER_JOIN = """
         AND f.dep_hour = w.hour
 """
 
+# BTS delay cause columns (prefix of the *_delay column) and their labels
+DELAY_TYPES = [
+    ("carrier", "Carrier"),
+    ("weather", "Weather"),
+    ("nas", "NAS"),
+    ("security", "Security"),
+    ("late_aircraft", "Late Aircraft"),
+]
+
 
 # ─────────────────────────────────────────────────────────────
 # Tool 1: Carrier Performance Rankings
 # ─────────────────────────────────────────────────────────────
 
+# One complete statement per sort order, built once at import. Each variant
+# is a fixed string, so nothing is spliced into SQL per call.
+_CARRIER_PERF_TEMPLATE = "SELECT * FROM mv_carrier_performance ORDER BY {}"
+SQL_CARRIER_PERF = {
+    "flights": _CARRIER_PERF_TEMPLATE.format("total_flights DESC"),
+    "delay": _CARRIER_PERF_TEMPLATE.format("avg_delay DESC"),
+    "cancel_rate": _CARRIER_PERF_TEMPLATE.format("cancel_rate DESC"),
+    "on_time": _CARRIER_PERF_TEMPLATE.format("on_time_pct DESC"),
+}
+
+
+@tool_cache(ttl=STATIC_TTL)
+def _carrier_rankings(sort_by: str) -> str:
+    """Full ranking for one sort order as row JSON. Cached on its own so a
+    follow-up that narrows it to a few carriers is a Redis hit plus a filter."""
+    # Pre-aggregated by the pipeline (refresh_views task), so this reads
+    # ~14 rows instead of grouping every flight
+    rows = _fetch_all(SQL_CARRIER_PERF.get(sort_by, SQL_CARRIER_PERF["flights"]))
+    return orjson.dumps(rows, default=_serialize).decode()
+
+
 @tool
-def get_carrier_performance(sort_by: str = "flights") -> str:
-    """Get all carriers ranked by performance. sort_by: 'flights', 'delay', 'cancel_rate', or 'on_time'."""
-    sort_map = {
-        "flights": "total_flights DESC",
-        "delay": "avg_delay DESC",
-        "cancel_rate": "cancel_rate DESC",
-        "on_time": "on_time_pct DESC",
-    }
-    order = sort_map.get(sort_by, "total_flights DESC")
-    rows = fetch_all(f"""
-        SELECT
-            f.carrier_code,
-            c.carrier_name,
-            COUNT(*) as total_flights,
-            ROUND(AVG(CASE WHEN arr_delay IS NOT NULL THEN arr_delay END)::numeric, 1) as avg_delay,
-            ROUND(100.0 * SUM(CASE WHEN cancelled THEN 1 ELSE 0 END) / COUNT(*), 2) as cancel_rate,
-            ROUND(100.0 * SUM(CASE WHEN arr_delay <= 0 AND NOT cancelled THEN 1 ELSE 0 END) / COUNT(*), 1) as on_time_pct
-        FROM flights f
-        JOIN carriers c ON f.carrier_code = c.carrier_code
-        GROUP BY f.carrier_code, c.carrier_name
-        ORDER BY {order}
-    """)
+def get_carrier_performance(sort_by: str = "flights", carriers: str | None = None) -> str:
+    """Get all carriers ranked by performance. sort_by: 'flights', 'delay', 'cancel_rate', or 'on_time'. Optionally pass carriers as comma-separated codes (e.g. 'UA,DL') to narrow the ranking."""
+    rows = orjson.loads(_carrier_rankings(sort_by))
+    if carriers:
+        wanted = {c.strip().upper() for c in carriers.split(",")}
+        rows = [r for r in rows if r["carrier_code"] in wanted]
     return _to_json(rows)
 
 
@@ -85,48 +241,55 @@ def get_carrier_performance(sort_by: str = "flights") -> str:
 # Tool 2: Single Carrier Deep Dive
 # ─────────────────────────────────────────────────────────────
 
+SQL_CARRIER_LOOKUP = "SELECT carrier_code, carrier_name FROM carriers WHERE carrier_code = %(code)s"
+
+# BTS delay type averages for one carrier (only flights delayed 15+ min)
+SQL_CARRIER_DELAY_BREAKDOWN = """
+    SELECT
+        f.carrier_code,
+        c.carrier_name,
+        ROUND(AVG(carrier_delay)::numeric, 1) as avg_carrier_delay,
+        ROUND(AVG(weather_delay)::numeric, 1) as avg_weather_delay,
+        ROUND(AVG(nas_delay)::numeric, 1) as avg_nas_delay,
+        ROUND(AVG(security_delay)::numeric, 1) as avg_security_delay,
+        ROUND(AVG(late_aircraft_delay)::numeric, 1) as avg_late_aircraft_delay
+    FROM flights f
+    JOIN carriers c ON f.carrier_code = c.carrier_code
+    WHERE f.carrier_code = %(code)s AND f.arr_delay_15 = true
+    GROUP BY f.carrier_code, c.carrier_name
+"""
+
+# Monthly performance trend for one carrier (chart-ready data)
+SQL_CARRIER_MONTHLY = """
+    SELECT
+        d.month, d.month_name,
+        COUNT(*) as total_flights,
+        ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay,
+        ROUND(100.0 * COUNT(*) FILTER (WHERE f.cancelled) / COUNT(*), 2) as cancel_rate
+    FROM flights f
+    JOIN date_dim d ON f.flight_date = d.date_id
+    WHERE f.carrier_code = %(code)s
+    GROUP BY d.month, d.month_name
+    ORDER BY d.month
+"""
+
+
 @tool
+@tool_cache(ttl=ANALYSIS_TTL)
 def get_carrier_details(carrier_code: str) -> str:
     """Get delay breakdown and monthly trend for a specific carrier. Use 2-letter IATA code (e.g. 'AA', 'DL', 'UA')."""
     code = carrier_code.upper()
 
     # Validate carrier exists before running expensive queries
-    carrier = fetch_one(
-        "SELECT carrier_code, carrier_name FROM carriers WHERE carrier_code = %(code)s",
-        {"code": code},
-    )
+    carrier = _fetch_one(SQL_CARRIER_LOOKUP, {"code": code})
     if not carrier:
-        return json.dumps({"error": f"Carrier '{code}' not found"})
+        return _to_json({"error": f"Carrier '{code}' not found"})
 
-    # BTS delay type averages (only for flights delayed 15+ min)
-    breakdown = fetch_one("""
-        SELECT
-            f.carrier_code,
-            c.carrier_name,
-            ROUND(AVG(carrier_delay)::numeric, 1) as avg_carrier_delay,
-            ROUND(AVG(weather_delay)::numeric, 1) as avg_weather_delay,
-            ROUND(AVG(nas_delay)::numeric, 1) as avg_nas_delay,
-            ROUND(AVG(security_delay)::numeric, 1) as avg_security_delay,
-            ROUND(AVG(late_aircraft_delay)::numeric, 1) as avg_late_aircraft_delay
-        FROM flights f
-        JOIN carriers c ON f.carrier_code = c.carrier_code
-        WHERE f.carrier_code = %(code)s AND f.arr_delay_15 = true
-        GROUP BY f.carrier_code, c.carrier_name
-    """, {"code": code})
-
-    # Monthly performance trend (chart-ready data)
-    monthly = fetch_all("""
-        SELECT
-            d.month, d.month_name,
-            COUNT(*) as total_flights,
-            ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay,
-            ROUND(100.0 * SUM(CASE WHEN f.cancelled THEN 1 ELSE 0 END) / COUNT(*), 2) as cancel_rate
-        FROM flights f
-        JOIN date_dim d ON f.flight_date = d.date_id
-        WHERE f.carrier_code = %(code)s
-        GROUP BY d.month, d.month_name
-        ORDER BY d.month
-    """, {"code": code})
+    # The breakdown and the monthly trend are independent, so they run concurrently
+    breakdown, monthly = _concurrently(
+        (_fetch_one, SQL_CARRIER_DELAY_BREAKDOWN, {"code": code}),
+        (_fetch_all, SQL_CARRIER_MONTHLY, {"code": code}),
+    )
 
     return _to_json({
         "carrier": carrier,
@@ -140,6 +303,7 @@ def get_carrier_details(carrier_code: str) -> str:
 # ─────────────────────────────────────────────────────────────
 
 @tool
+@tool_cache(ttl=ANALYSIS_TTL)
 def get_delay_patterns(carrier: str | None = None, origin: str | None = None) -> str:
     """Get delay patterns by day-of-week, month, and BTS delay type breakdown. Optionally filter by carrier code or origin airport."""
     conditions = ["1=1"]
@@ -154,62 +318,65 @@ def get_delay_patterns(carrier: str | None = None, origin: str | None = None) ->
 
     where = " AND ".join(conditions)
 
-    # Which days of the week have the worst delays?
-    by_dow = fetch_all(f"""
+    delayed_where = where + " AND f.arr_delay_15 = true"
+
+    # The three breakdowns are independent, so they run concurrently
+    by_dow, by_month, totals = _concurrently(
+        # Which days of the week have the worst delays?
+        (_fetch_all, f"""
         SELECT d.day_of_week, d.day_name,
             COUNT(*) as total_flights,
-            ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay,
-            ROUND(100.0 * SUM(CASE WHEN f.arr_delay_15 THEN 1 ELSE 0 END) / COUNT(*), 1) as delayed_pct
+            ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay,
+            ROUND(100.0 * COUNT(*) FILTER (WHERE f.arr_delay_15) / COUNT(*), 1) as delayed_pct
         FROM flights f
         JOIN date_dim d ON f.flight_date = d.date_id
         WHERE {where}
         GROUP BY d.day_of_week, d.day_name
         ORDER BY d.day_of_week
-    """, params)
-
-    # Which months have the worst delays?
-    by_month = fetch_all(f"""
+    """, params),
+        # Which months have the worst delays?
+        (_fetch_all, f"""
         SELECT d.month, d.month_name,
             COUNT(*) as total_flights,
-            ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay,
-            ROUND(100.0 * SUM(CASE WHEN f.arr_delay_15 THEN 1 ELSE 0 END) / COUNT(*), 1) as delayed_pct
+            ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay,
+            ROUND(100.0 * COUNT(*) FILTER (WHERE f.arr_delay_15) / COUNT(*), 1) as delayed_pct
         FROM flights f
         JOIN date_dim d ON f.flight_date = d.date_id
         WHERE {where}
         GROUP BY d.month, d.month_name
         ORDER BY d.month
-    """, params)
-
-    # BTS 5-type delay breakdown (only for flights actually delayed 15+ min)
-    delayed_where = where + " AND f.arr_delay_15 = true"
-    breakdown = fetch_all(f"""
-        SELECT * FROM (
-            SELECT 'Carrier' as delay_type,
-                SUM(CASE WHEN carrier_delay > 0 THEN 1 ELSE 0 END) as flights_affected,
-                ROUND(AVG(CASE WHEN carrier_delay > 0 THEN carrier_delay END)::numeric, 1) as avg_minutes
-            FROM flights f WHERE {delayed_where}
-            UNION ALL
-            SELECT 'Weather',
-                SUM(CASE WHEN weather_delay > 0 THEN 1 ELSE 0 END),
-                ROUND(AVG(CASE WHEN weather_delay > 0 THEN weather_delay END)::numeric, 1)
-            FROM flights f WHERE {delayed_where}
-            UNION ALL
-            SELECT 'NAS',
-                SUM(CASE WHEN nas_delay > 0 THEN 1 ELSE 0 END),
-                ROUND(AVG(CASE WHEN nas_delay > 0 THEN nas_delay END)::numeric, 1)
-            FROM flights f WHERE {delayed_where}
-            UNION ALL
-            SELECT 'Security',
-                SUM(CASE WHEN security_delay > 0 THEN 1 ELSE 0 END),
-                ROUND(AVG(CASE WHEN security_delay > 0 THEN security_delay END)::numeric, 1)
-            FROM flights f WHERE {delayed_where}
-            UNION ALL
-            SELECT 'Late Aircraft',
-                SUM(CASE WHEN late_aircraft_delay > 0 THEN 1 ELSE 0 END),
-                ROUND(AVG(CASE WHEN late_aircraft_delay > 0 THEN late_aircraft_delay END)::numeric, 1)
-            FROM flights f WHERE {delayed_where}
-        ) t ORDER BY flights_affected DESC
-    """, params)
+    """, params),
+        # BTS 5-type delay breakdown (only for flights actually delayed 15+ min).
+        # One pass over the delayed flights computes every type with FILTER
+        # clauses; the single row is pivoted into one entry per type below.
+        (_fetch_one, f"""
+        SELECT
+            COUNT(*) FILTER (WHERE carrier_delay > 0) as carrier_cnt,
+            ROUND((AVG(carrier_delay) FILTER (WHERE carrier_delay > 0))::numeric, 1) as carrier_avg,
+            COUNT(*) FILTER (WHERE weather_delay > 0) as weather_cnt,
+            ROUND((AVG(weather_delay) FILTER (WHERE weather_delay > 0))::numeric, 1) as weather_avg,
+            COUNT(*) FILTER (WHERE nas_delay > 0) as nas_cnt,
+            ROUND((AVG(nas_delay) FILTER (WHERE nas_delay > 0))::numeric, 1) as nas_avg,
+            COUNT(*) FILTER (WHERE security_delay > 0) as security_cnt,
+            ROUND((AVG(security_delay) FILTER (WHERE security_delay > 0))::numeric, 1) as security_avg,
+            COUNT(*) FILTER (WHERE late_aircraft_delay > 0) as late_aircraft_cnt,
+            ROUND((AVG(late_aircraft_delay) FILTER (WHERE late_aircraft_delay > 0))::numeric, 1) as late_aircraft_avg
+        FROM flights f WHERE {delayed_where}
+    """, params),
+    )
+    totals = totals or {}
+    breakdown = sorted(
+        (
+            {
+                "delay_type": label,
+                "flights_affected": totals.get(f"{key}_cnt") or 0,
+                "avg_minutes": totals.get(f"{key}_avg"),
+            }
+            for key, label in DELAY_TYPES
+        ),
+        key=lambda r: r["flights_affected"],
+        reverse=True,
+    )
 
     return _to_json({
         "by_day_of_week": by_dow,
@@ -222,7 +389,29 @@ def get_delay_patterns(carrier: str | None = None, origin: str | None = None) ->
 # Tool 4: Route Information
 # ─────────────────────────────────────────────────────────────
 
+# Totals for a single origin → destination route
+SQL_ROUTE_SUMMARY = """
+    SELECT COUNT(*) as total_flights,
+        ROUND(AVG(arr_delay)::numeric, 1) as avg_delay,
+        ROUND(100.0 * COUNT(*) FILTER (WHERE cancelled) / COUNT(*), 2) as cancel_rate
+    FROM flights
+    WHERE origin_airport = %(origin)s AND dest_airport = %(dest)s
+"""
+
+# Carrier breakdown for a single route
+SQL_ROUTE_CARRIERS = """
+    SELECT f.carrier_code, c.carrier_name, COUNT(*) as flights,
+        ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay
+    FROM flights f
+    JOIN carriers c ON f.carrier_code = c.carrier_code
+    WHERE f.origin_airport = %(origin)s AND f.dest_airport = %(dest)s
+    GROUP BY f.carrier_code, c.carrier_name
+    ORDER BY flights DESC
+"""
+
+
 @tool
+@tool_cache(ttl=ANALYSIS_TTL)
 def get_route_info(origin: str | None = None, dest: str | None = None) -> str:
     """Get route information. If both origin and dest given, returns specific route detail. If only origin given, returns busiest routes from that airport. If neither, returns top 15 busiest routes overall."""
 
@@ -231,22 +420,8 @@ def get_route_info(origin: str | None = None, dest: str | None = None) -> str:
         origin = origin.upper()
         dest = dest.upper()
         params = {"origin": origin, "dest": dest}
-        summary = fetch_one("""
-            SELECT COUNT(*) as total_flights,
-                ROUND(AVG(CASE WHEN arr_delay IS NOT NULL THEN arr_delay END)::numeric, 1) as avg_delay,
-                ROUND(100.0 * SUM(CASE WHEN cancelled THEN 1 ELSE 0 END) / COUNT(*), 2) as cancel_rate
-            FROM flights
-            WHERE origin_airport = %(origin)s AND dest_airport = %(dest)s
-        """, params)
-        carriers = fetch_all("""
-            SELECT f.carrier_code, c.carrier_name, COUNT(*) as flights,
-                ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay
-            FROM flights f
-            JOIN carriers c ON f.carrier_code = c.carrier_code
-            WHERE f.origin_airport = %(origin)s AND f.dest_airport = %(dest)s
-            GROUP BY f.carrier_code, c.carrier_name
-            ORDER BY flights DESC
-        """, params)
+        summary = _fetch_one(SQL_ROUTE_SUMMARY, params)
+        carriers = _fetch_all(SQL_ROUTE_CARRIERS, params)
         return _to_json({"origin": origin, "destination": dest, "summary": summary, "carriers": carriers})
 
     # Busiest routes (optionally filtered by origin airport)
@@ -257,11 +432,11 @@ def get_route_info(origin: str | None = None, dest: str | None = None) -> str:
         params["origin"] = origin.upper()
     where = " AND ".join(conditions)
 
-    rows = fetch_all(f"""
+    rows = _fetch_all(f"""
         SELECT f.origin_airport as origin, a1.city as origin_city,
             f.dest_airport as destination, a2.city as dest_city,
             COUNT(*) as total_flights,
-            ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay
+            ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay
         FROM flights f
         JOIN airports a1 ON f.origin_airport = a1.airport_code
         JOIN airports a2 ON f.dest_airport = a2.airport_code
@@ -278,34 +453,42 @@ def get_route_info(origin: str | None = None, dest: str | None = None) -> str:
 # ─────────────────────────────────────────────────────────────
 
 @tool
+@tool_cache(ttl=ANALYSIS_TTL)
 def get_weather_impact(condition: str | None = None, airport: str | None = None) -> str:
     """Get weather impact on flights: delays/cancellations by weather condition, temperature band, visibility range, and wind speed. Optionally filter by specific condition ('Snow', 'Rain', 'Fog', etc.) or airport code."""
-    conditions = ["w.conditions IS NOT NULL"]
+    base: list[str] = []
     params: dict = {}
     if airport:
-        conditions.append("f.origin_airport = %(airport)s")
+        base.append("f.origin_airport = %(airport)s")
         params["airport"] = airport.upper()
-    where = " AND ".join(conditions)
-
-    # Impact by weather condition (snow, rain, fog, clear, etc.)
-    by_condition = fetch_all(f"""
+    # Filter in SQL so Postgres only groups the requested condition. It carries
+    # over to the temperature/visibility/wind slices, so all four describe the
+    # same set of flights.
+    if condition:
+        base.append("w.conditions ILIKE %(cond)s ESCAPE '\\'")
+        params["cond"] = f"%{_like_escape(condition)}%"
+    params["max_items"] = MAX_ROWS
+
+    def where_for(col: str) -> str:
+        """Shared filters plus 'this slice's weather column is present'."""
+        return " AND ".join(base + [f"w.{col} IS NOT NULL"])
+
+    # The four breakdowns are independent, so they run concurrently
+    by_condition, by_temp, by_vis, by_wind = _concurrently(
+        # Impact by weather condition (snow, rain, fog, clear, etc.)
+        (_fetch_all, f"""
         SELECT w.conditions, COUNT(*) as total_flights,
-            SUM(CASE WHEN f.cancelled THEN 1 ELSE 0 END) as cancelled,
-            ROUND(100.0 * SUM(CASE WHEN f.cancelled THEN 1 ELSE 0 END) / COUNT(*), 1) as cancel_pct,
-            ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay
+            COUNT(*) FILTER (WHERE f.cancelled) as cancelled,
+            ROUND(100.0 * COUNT(*) FILTER (WHERE f.cancelled) / COUNT(*), 1) as cancel_pct,
+            ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay
         FROM flights f {WEATHER_JOIN}
-        WHERE {where}
+        WHERE {where_for("conditions")}
         GROUP BY w.conditions
         ORDER BY avg_delay DESC NULLS LAST
-    """, params)
-
-    # If a specific condition was requested, filter to matching rows
-    if condition:
-        by_condition = [r for r in by_condition if condition.lower() in r["conditions"].lower()]
-
-    # Impact by temperature range
-    temp_where = where.replace("w.conditions IS NOT NULL", "w.temperature IS NOT NULL")
-    by_temp = fetch_all(f"""
+        LIMIT %(max_items)s
+    """, params),
+        # Impact by temperature range
+        (_fetch_all, f"""
         SELECT
             CASE
                 WHEN w.temperature < 32 THEN 'Below Freezing (<32F)'
@@ -315,16 +498,14 @@ def get_weather_impact(condition: str | None = None, airport: str | None = None)
                 ELSE 'Hot (>85F)'
             END as temp_range,
             COUNT(*) as total_flights,
-            ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay,
-            ROUND(100.0 * SUM(CASE WHEN f.cancelled THEN 1 ELSE 0 END) / COUNT(*), 2) as cancel_rate
+            ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay,
+            ROUND(100.0 * COUNT(*) FILTER (WHERE f.cancelled) / COUNT(*), 2) as cancel_rate
         FROM flights f {WEATHER_JOIN}
-        WHERE {temp_where}
+        WHERE {where_for("temperature")}
         GROUP BY 1 ORDER BY avg_delay DESC NULLS LAST
-    """, params)
-
-    # Impact by visibility range
-    vis_where = where.replace("w.conditions IS NOT NULL", "w.visibility IS NOT NULL")
-    by_vis = fetch_all(f"""
+    """, params),
+        # Impact by visibility range
+        (_fetch_all, f"""
         SELECT
             CASE
                 WHEN w.visibility < 1 THEN 'Very Low (<1 mi)'
@@ -334,16 +515,14 @@ def get_weather_impact(condition: str | None = None, airport: str | None = None)
                 ELSE 'Excellent (10+ mi)'
             END as visibility_range,
             COUNT(*) as total_flights,
-            ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay,
-            ROUND(100.0 * SUM(CASE WHEN f.cancelled THEN 1 ELSE 0 END) / COUNT(*), 2) as cancel_rate
+            ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay,
+            ROUND(100.0 * COUNT(*) FILTER (WHERE f.cancelled) / COUNT(*), 2) as cancel_rate
         FROM flights f {WEATHER_JOIN}
-        WHERE {vis_where}
+        WHERE {where_for("visibility")}
         GROUP BY 1 ORDER BY avg_delay DESC NULLS LAST
-    """, params)
-
-    # Impact by wind speed
-    wind_where = where.replace("w.conditions IS NOT NULL", "w.wind_speed IS NOT NULL")
-    by_wind = fetch_all(f"""
+    """, params),
+        # Impact by wind speed
+        (_fetch_all, f"""
         SELECT
             CASE
                 WHEN w.wind_speed < 5 THEN 'Calm (<5 mph)'
@@ -353,12 +532,13 @@ def get_weather_impact(condition: str | None = None, airport: str | None = None)
                 ELSE 'Severe (35+ mph)'
             END as wind_range,
             COUNT(*) as total_flights,
-            ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay,
-            ROUND(100.0 * SUM(CASE WHEN f.cancelled THEN 1 ELSE 0 END) / COUNT(*), 2) as cancel_rate
+            ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay,
+            ROUND(100.0 * COUNT(*) FILTER (WHERE f.cancelled) / COUNT(*), 2) as cancel_rate
         FROM flights f {WEATHER_JOIN}
-        WHERE {wind_where}
+        WHERE {where_for("wind_speed")}
         GROUP BY 1 ORDER BY avg_delay DESC NULLS LAST
-    """, params)
+    """, params),
+    )
 
     return _to_json({
         "by_condition": by_condition,
@@ -372,33 +552,37 @@ def get_weather_impact(condition: str | None = None, airport: str | None = None)
 # Tool 6: Origin vs Destination Weather Comparison
 # ─────────────────────────────────────────────────────────────
 
+# Double weather join: once for origin airport, once for destination
+SQL_WEATHER_ORIGIN_VS_DEST = """
+    SELECT
+        CASE
+            WHEN wo.visibility < 3 AND wd.visibility < 3 THEN 'Bad at BOTH'
+            WHEN wo.visibility < 3 THEN 'Bad at ORIGIN only'
+            WHEN wd.visibility < 3 THEN 'Bad at DESTINATION only'
+            ELSE 'Good at BOTH'
+        END as situation,
+        COUNT(*) as total_flights,
+        COUNT(*) FILTER (WHERE f.cancelled) as cancelled,
+        ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay
+    FROM flights f
+    JOIN weather_hourly wo
+        ON f.origin_airport = wo.airport_code
+        AND f.flight_date = wo.observation_date
+        AND f.dep_hour = wo.hour
+    JOIN weather_hourly wd
+        ON f.dest_airport = wd.airport_code
+        AND f.flight_date = wd.observation_date
+        AND f.dep_hour = wd.hour
+    GROUP BY 1
+    ORDER BY avg_delay DESC NULLS LAST
+"""
+
+
 @tool
+@tool_cache(ttl=ANALYSIS_TTL)
 def get_weather_origin_vs_dest() -> str:
     """Compare flight performance when bad weather is at origin vs destination vs both (uses visibility < 3 miles as threshold)."""
-    # Double weather join: once for origin airport, once for destination
-    rows = fetch_all("""
-        SELECT
-            CASE
-                WHEN wo.visibility < 3 AND wd.visibility < 3 THEN 'Bad at BOTH'
-                WHEN wo.visibility < 3 THEN 'Bad at ORIGIN only'
-                WHEN wd.visibility < 3 THEN 'Bad at DESTINATION only'
-                ELSE 'Good at BOTH'
-            END as situation,
-            COUNT(*) as total_flights,
-            SUM(CASE WHEN f.cancelled THEN 1 ELSE 0 END) as cancelled,
-            ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay
-        FROM flights f
-        JOIN weather_hourly wo
-            ON f.origin_airport = wo.airport_code
-            AND f.flight_date = wo.observation_date
-            AND f.dep_hour = wo.hour
-        JOIN weather_hourly wd
-            ON f.dest_airport = wd.airport_code
-            AND f.flight_date = wd.observation_date
-            AND f.dep_hour = wd.hour
-        GROUP BY 1
-        ORDER BY avg_delay DESC NULLS LAST
-    """)
+    rows = _fetch_all(SQL_WEATHER_ORIGIN_VS_DEST)
     return _to_json(rows)
 
 
@@ -406,55 +590,66 @@ def get_weather_origin_vs_dest() -> str:
 # Tool 7: Weather Cascade Events (storm tracing)
 # ─────────────────────────────────────────────────────────────
 
+# Airports hit hardest by weather cancellations on one date
+SQL_CASCADE_AIRPORTS = """
+    SELECT f.origin_airport as airport_code,
+        COUNT(*) as total_flights,
+        COUNT(*) FILTER (WHERE f.cancelled) as cancelled,
+        COUNT(*) FILTER (WHERE f.cancelled AND f.cancellation_code = 'B') as weather_cancelled,
+        ROUND(100.0 * COUNT(*) FILTER (WHERE f.cancelled) / COUNT(*), 1) as cancel_pct,
+        ROUND(AVG(f.arr_delay)::numeric, 1) as avg_delay
+    FROM flights f
+    WHERE f.flight_date = %(date)s
+    GROUP BY f.origin_airport
+    HAVING COUNT(*) FILTER (WHERE f.cancelled AND f.cancellation_code = 'B') >= 5
+    ORDER BY weather_cancelled DESC
+    LIMIT 15
+"""
+
+# Hour-by-hour weather for a set of airports on one date
+SQL_CASCADE_HOURLY = """
+    SELECT airport_code, observation_hour::text as hour,
+        temperature::float as temperature, wind_speed::float as wind_speed,
+        visibility::float as visibility, precipitation::float as precipitation,
+        conditions
+    FROM weather_hourly
+    WHERE observation_date = %(date)s AND airport_code = ANY(%(codes)s)
+    ORDER BY airport_code, observation_hour
+"""
+
+# Worst weather disruption days ranked by weather cancellations
+SQL_WORST_WEATHER_DAYS = """
+    SELECT flight_date::text as flight_date,
+        COUNT(*) FILTER (WHERE cancelled AND cancellation_code = 'B') as weather_cancellations,
+        COUNT(*) as total_flights,
+        ROUND(AVG(arr_delay)::numeric, 1) as avg_delay
+    FROM flights
+    GROUP BY flight_date
+    HAVING COUNT(*) FILTER (WHERE cancelled AND cancellation_code = 'B') > 0
+    ORDER BY weather_cancellations DESC
+    LIMIT 15
+"""
+
+
 @tool
+@tool_cache(ttl=DRILL_TTL)
 def get_cascade_events(event_date: str | None = None) -> str:
     """Get weather cascade events — worst weather disruption days. If event_date given (YYYY-MM-DD), returns per-airport impact and hourly weather for that date. Otherwise returns top 15 worst weather days."""
 
     # Specific date: drill down into which airports were hit and what the weather looked like
     if event_date:
-        airports = fetch_all("""
-            SELECT f.origin_airport as airport_code,
-                COUNT(*) as total_flights,
-                SUM(CASE WHEN f.cancelled THEN 1 ELSE 0 END) as cancelled,
-                SUM(CASE WHEN f.cancelled AND f.cancellation_code = 'B' THEN 1 ELSE 0 END) as weather_cancelled,
-                ROUND(100.0 * SUM(CASE WHEN f.cancelled THEN 1 ELSE 0 END) / COUNT(*), 1) as cancel_pct,
-                ROUND(AVG(CASE WHEN f.arr_delay IS NOT NULL THEN f.arr_delay END)::numeric, 1) as avg_delay
-            FROM flights f
-            WHERE f.flight_date = %(date)s
-            GROUP BY f.origin_airport
-            HAVING SUM(CASE WHEN f.cancelled AND f.cancellation_code = 'B' THEN 1 ELSE 0 END) >= 5
-            ORDER BY weather_cancelled DESC
-            LIMIT 15
-        """, {"date": event_date})
+        airports = _fetch_all(SQL_CASCADE_AIRPORTS, {"date": event_date})
 
         # Fetch hour-by-hour weather for the affected airports
         airport_codes = [a["airport_code"] for a in airports]
         hourly = []
         if airport_codes:
-            hourly = fetch_all("""
-                SELECT airport_code, observation_hour::text as hour,
-                    temperature::float as temperature, wind_speed::float as wind_speed,
-                    visibility::float as visibility, precipitation::float as precipitation,
-                    conditions
-                FROM weather_hourly
-                WHERE observation_date = %(date)s AND airport_code = ANY(%(codes)s)
-                ORDER BY airport_code, observation_hour
-            """, {"date": event_date, "codes": airport_codes})
+            hourly = _fetch_all(SQL_CASCADE_HOURLY, {"date": event_date, "codes": airport_codes})
 
         return _to_json({"flight_date": event_date, "airports": airports, "hourly_weather": hourly}, max_items=50)
 
     # No date: return the worst weather disruption days ranked by cancellations
-    rows = fetch_all("""
-        SELECT flight_date::text as flight_date,
-            SUM(CASE WHEN cancelled AND cancellation_code = 'B' THEN 1 ELSE 0 END) as weather_cancellations,
-            COUNT(*) as total_flights,
-            ROUND(AVG(CASE WHEN arr_delay IS NOT NULL THEN arr_delay END)::numeric, 1) as avg_delay
-        FROM flights
-        GROUP BY flight_date
-        HAVING SUM(CASE WHEN cancelled AND cancellation_code = 'B' THEN 1 ELSE 0 END) > 0
-        ORDER BY weather_cancellations DESC
-        LIMIT 15
-    """)
+    rows = _fetch_all(SQL_WORST_WEATHER_DAYS)
     return _to_json(rows)
 
 
@@ -462,61 +657,76 @@ def get_cascade_events(event_date: str | None = None) -> str:
 # Tool 8: Airport Information
 # ─────────────────────────────────────────────────────────────
 
+# Full airport profile in one round-trip: the airport row, its departure/
+# arrival stats and its busiest carriers, each assembled as JSON server-side.
+# The flight aggregates only run if the airport exists.
+SQL_AIRPORT_PROFILE = """
+    WITH airport AS (
+        SELECT * FROM airports WHERE airport_code = %(code)s
+    ),
+    stats AS (
+        SELECT
+            COUNT(*) FILTER (WHERE origin_airport = %(code)s) as departures,
+            COUNT(*) FILTER (WHERE dest_airport = %(code)s) as arrivals,
+            ROUND((AVG(dep_delay) FILTER (WHERE origin_airport = %(code)s))::numeric, 1) as avg_dep_delay,
+            ROUND((AVG(arr_delay) FILTER (WHERE dest_airport = %(code)s))::numeric, 1) as avg_arr_delay,
+            ROUND(100.0 * COUNT(*) FILTER (WHERE cancelled AND (origin_airport = %(code)s OR dest_airport = %(code)s))
+                / NULLIF(COUNT(*) FILTER (WHERE origin_airport = %(code)s OR dest_airport = %(code)s), 0), 2) as cancel_rate
+        FROM flights
+        WHERE (origin_airport = %(code)s OR dest_airport = %(code)s)
+            AND EXISTS (SELECT 1 FROM airport)
+    ),
+    top_carriers AS (
+        SELECT f.carrier_code, c.carrier_name, COUNT(*) as flights
+        FROM flights f
+        JOIN carriers c ON f.carrier_code = c.carrier_code
+        WHERE f.origin_airport = %(code)s AND EXISTS (SELECT 1 FROM airport)
+        GROUP BY f.carrier_code, c.carrier_name
+        ORDER BY flights DESC LIMIT 5
+    )
+    SELECT
+        (SELECT row_to_json(a) FROM airport a) as airport,
+        (SELECT row_to_json(s) FROM stats s) as stats,
+        (SELECT json_agg(t ORDER BY t.flights DESC) FROM top_carriers t) as top_carriers
+"""
+
+
 @tool
+@tool_cache(ttl=ANALYSIS_TTL)
 def get_airport_info(airport_code: str | None = None, search: str | None = None) -> str:
     """Get airport information. If airport_code given (e.g. 'JFK'), returns detailed profile. If search given, searches by code/name/city. If neither, returns top 15 airports by flight count."""
 
     # Specific airport: full profile with stats and top carriers
     if airport_code:
         code = airport_code.upper()
-        airport = fetch_one("SELECT * FROM airports WHERE airport_code = %(code)s", {"code": code})
-        if not airport:
-            return json.dumps({"error": f"Airport '{code}' not found"})
-
-        stats = fetch_one("""
-            SELECT
-                SUM(CASE WHEN origin_airport = %(code)s THEN 1 ELSE 0 END) as departures,
-                SUM(CASE WHEN dest_airport = %(code)s THEN 1 ELSE 0 END) as arrivals,
-                ROUND(AVG(CASE WHEN origin_airport = %(code)s AND dep_delay IS NOT NULL THEN dep_delay END)::numeric, 1) as avg_dep_delay,
-                ROUND(AVG(CASE WHEN dest_airport = %(code)s AND arr_delay IS NOT NULL THEN arr_delay END)::numeric, 1) as avg_arr_delay,
-                ROUND(100.0 * SUM(CASE WHEN cancelled AND (origin_airport = %(code)s OR dest_airport = %(code)s) THEN 1 ELSE 0 END)
-                    / NULLIF(SUM(CASE WHEN origin_airport = %(code)s OR dest_airport = %(code)s THEN 1 ELSE 0 END), 0), 2) as cancel_rate
-            FROM flights
-            WHERE origin_airport = %(code)s OR dest_airport = %(code)s
-        """, {"code": code})
-
-        top_carriers = fetch_all("""
-            SELECT f.carrier_code, c.carrier_name, COUNT(*) as flights
-            FROM flights f
-            JOIN carriers c ON f.carrier_code = c.carrier_code
-            WHERE f.origin_airport = %(code)s
-            GROUP BY f.carrier_code, c.carrier_name
-            ORDER BY flights DESC LIMIT 5
-        """, {"code": code})
+        profile = _fetch_one(SQL_AIRPORT_PROFILE, {"code": code})
+        if not profile or not profile["airport"]:
+            return _to_json({"error": f"Airport '{code}' not found"})
 
         return _to_json({
-            "airport": airport,
-            "stats": stats,
-            "top_carriers": top_carriers,
+            "airport": profile["airport"],
+            "stats": profile["stats"],
+            "top_carriers": profile["top_carriers"] or [],
         })
 
     # Search or list: find airports by name/code/city, or return top 15
     conditions = ["1=1"]
     params: dict = {}
     if search:
-        conditions.append("(a.airport_code ILIKE %(search)s OR a.airport_name ILIKE %(like)s OR a.city ILIKE %(like)s)")
-        params["search"] = search.upper()
-        params["like"] = f"%{search}%"
+        conditions.append(
+            "(a.airport_code ILIKE %(search)s ESCAPE '\\' "
+            "OR a.airport_name ILIKE %(like)s ESCAPE '\\' OR a.city ILIKE %(like)s ESCAPE '\\')"
+        )
+        params["search"] = _like_escape(search.upper())
+        params["like"] = f"%{_like_escape(search)}%"
 
     where = " AND ".join(conditions)
-    rows = fetch_all(f"""
+    # Departure counts are pre-aggregated by the pipeline (refresh_views task)
+    rows = _fetch_all(f"""
         SELECT a.airport_code, a.airport_name, a.city, a.state,
             COALESCE(fc.flight_count, 0) as flight_count
         FROM airports a
-        LEFT JOIN (
-            SELECT origin_airport, COUNT(*) as flight_count
-            FROM flights GROUP BY origin_airport
-        ) fc ON a.airport_code = fc.origin_airport
+        LEFT JOIN airport_flight_counts fc USING (airport_code)
         WHERE {where}
         ORDER BY flight_count DESC
         LIMIT 15
@@ -528,16 +738,32 @@ def get_airport_info(airport_code: str | None = None, search: str | None = None)
 # Tool 9: System Health / Data Inventory
 # ─────────────────────────────────────────────────────────────
 
+HEALTH_TABLES = ["flights", "carriers", "airports", "date_dim", "weather_observations", "weather_hourly"]
+
+
+# Approximate row counts (n_live_tup) plus the flight date range
+SQL_SYSTEM_HEALTH = """
+    SELECT
+        (SELECT json_object_agg(relname, n_live_tup)
+         FROM pg_stat_user_tables
+         WHERE relname = ANY(%(tables)s)) as tables,
+        MIN(flight_date) as min_date,
+        MAX(flight_date) as max_date
+    FROM flights
+"""
+
+
 @tool
+@tool_cache(ttl=DRILL_TTL)
 def get_system_health() -> str:
     """Get system health info: database status, table row counts, and data date range. Use this to understand what data is available."""
-    tables = {}
-    for table in ["flights", "carriers", "airports", "date_dim", "weather_observations", "weather_hourly"]:
-        r = fetch_one(f"SELECT COUNT(*) as cnt FROM {table}")
-        tables[table] = r["cnt"] if r else 0
+    # One round-trip: row counts come from the statistics collector
+    # (n_live_tup, approximate but free) rather than six COUNT(*) scans
+    r = _fetch_one(SQL_SYSTEM_HEALTH, {"tables": HEALTH_TABLES}) or {}
 
-    dr = fetch_one("SELECT MIN(flight_date) as min_date, MAX(flight_date) as max_date FROM flights")
-    date_range = {"min_date": str(dr["min_date"]), "max_date": str(dr["max_date"])} if dr else {}
+    counts = r.get("tables") or {}
+    tables = {table: counts.get(table, 0) for table in HEALTH_TABLES}
+    date_range = {"min_date": str(r["min_date"]), "max_date": str(r["max_date"])} if r else {}
 
     return _to_json({"tables": tables, "date_range": date_range})
 
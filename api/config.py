@@ -1,10 +1,18 @@
 """
 Application settings from environment variables.
+
+Parsed and validated once per process (get_settings is cached) and frozen,
+so every module shares one immutable, hashable instance.
 """
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
+    # Environment only — no .env file scan
+    model_config = SettingsConfigDict(frozen=True, case_sensitive=False, env_file=None)
+
     # Database
     flights_db_host: str = "localhost"
     flights_db_port: int = 5432
@@ -35,8 +43,33 @@ class Settings(BaseSettings):
     # Rate limiting
     rate_limit_per_minute: int = 100
 
+    # Logging: JSON lines (False = plain text for local reading). Unexpected
+    # chat errors log a full traceback for this fraction of occurrences only.
+    log_json: bool = True
+    error_traceback_sample_rate: float = 0.1
+
     # LLM
     anthropic_api_key: str = ""
+    llm_max_concurrency: int = 8
+    # Agent runs in flight per worker before chat turns new questions away (429)
+    chat_max_inflight: int = 32
+    # Max wall-clock a chat request waits on the agent before a 504
+    agent_timeout_seconds: float = 60.0
+
+    # Agent tools: per-query time limit for tool SQL
+    tool_statement_timeout_ms: int = 5000
+
+    # Agent answer cache
+    agent_cache_size: int = 1024
+    agent_cache_ttl_seconds: int = 3600
+    # Redis-backed chat response cache (shared across workers)
+    chat_cache_enabled: bool = True
+    chat_cache_ttl_seconds: int = 900
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
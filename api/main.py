@@ -1,24 +1,56 @@
 """
 FastAPI application entry point.
-Lifespan manages connection pool + Redis init/close.
+Lifespan manages connection pool + Redis init/close, and warms up the agent.
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import orjson
 import psycopg2
 
+from api.config import settings
 from api.database import init_pool, close_pool
 from api.cache import init_redis, close_redis
 from api.middleware import RequestLoggingMiddleware, RateLimitMiddleware
 from api.routers import auth, pipeline, carriers, delays, routes, weather, airports, chat
+from api.agent import warmup
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(name)s %(levelname)s %(message)s",
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line, so log pipelines can index fields without
+    regex parsing. orjson keeps serialization off the hot path."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(
+    JsonLogFormatter() if settings.log_json
+    else logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s")
 )
+logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
+
+
+async def _warm_agent():
+    """Background agent warm-up. A transient Anthropic error must never
+    take the API down, so failures are only logged."""
+    try:
+        await warmup()
+    except Exception as e:
+        logging.getLogger("flight-api").warning("Agent warm-up failed: %s", e)
 
 
 @asynccontextmanager
@@ -29,8 +61,12 @@ async def lifespan(app: FastAPI):
         init_redis()
     except Exception:
         logging.getLogger("flight-api").warning("Redis unavailable — caching disabled")
+    # Warm up in the background so boot doesn't wait on Anthropic
+    warm_task = asyncio.create_task(_warm_agent()) if settings.anthropic_api_key else None
     yield
     # Shutdown
+    if warm_task:
+        warm_task.cancel()
     close_redis()
     close_pool()
 
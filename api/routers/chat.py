@@ -1,44 +1,149 @@
 """
 Chat router — the single endpoint that turns natural language into data insights.
 
-This is the public-facing gateway to the LangGraph agent. It handles three things:
+This is the public-facing gateway to the LangGraph agent. It handles four things:
 1. Graceful degradation when the API key isn't configured (503 instead of cryptic errors)
-2. Running the agent's ReAct loop and returning structured results
-3. Catching unexpected failures so they don't leak stack traces to the client
+2. Answering resent questions from the Redis response cache
+3. Running the agent's ReAct loop and returning structured results
+4. Mapping timeouts, rate limits and provider outages to 504/429/502, and catching
+   unexpected failures so they don't leak stack traces to the client
+
+POST /stream is the streaming variant: answer text is sent as Server-Sent
+Events while the LLM produces it, so clients see output long before the
+ReAct loop finishes.
 """
+import asyncio
+import json
 import logging
+import random
+from typing import AsyncIterator
 
+import anthropic
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
 from api.config import settings
 from api.models.chat import ChatRequest, ChatResponse
-from api.agent import run_agent
+from api.agent import run_agent, run_agent_stream
+from api.agent.cache import chat_cache_key, get_cached_chat, cache_chat
 
 logger = logging.getLogger("flight-api.chat")
 
 router = APIRouter()
 
+# Every unexpected agent error is logged, but only a sample carry the full
+# traceback, so an incident producing thousands of identical failures doesn't
+# turn into a log storm. Read once at import.
+_TRACEBACK_SAMPLE_RATE = settings.error_traceback_sample_rate
+
+
+def _log_agent_error(message: str, e: Exception) -> None:
+    logger.error("%s: %s", message, e, exc_info=random.random() < _TRACEBACK_SAMPLE_RATE)
+
+
+# Caps agent runs in flight in this worker. Past this, new questions get an
+# immediate 429 instead of queueing behind the LLM semaphore until they time
+# out, which keeps latency predictable under a burst.
+_agent_slots = asyncio.Semaphore(settings.chat_max_inflight)
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Chat is busy — please retry shortly",
+        headers={"Retry-After": "10"},
+    )
+
+
+def _reject_if_busy() -> None:
+    if _agent_slots.locked():
+        logger.warning("Chat at capacity (%d in flight), rejecting", settings.chat_max_inflight)
+        raise _busy()
+
+
+def _require_api_key() -> None:
+    """Fail fast if the key isn't set — better than a confusing LLM error downstream."""
+    if not settings.anthropic_api_key:
+        raise HTTPException(
+            status_code=503,
+            detail="Chat is unavailable — ANTHROPIC_API_KEY not configured",
+        )
+
 
 @router.post("/", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Accept a natural language question, run the agent, return the answer.
 
-    The flow: validate API key → run ReAct loop → return answer + tools used.
+    The flow: validate API key → check response cache → check capacity →
+    run ReAct loop → return answer + tools used.
     We check for the API key at request time (not startup) so the rest of the API
     still works even if someone hasn't configured the chat feature yet.
     """
 
-    # Fail fast if the key isn't set — better than a confusing LLM error downstream
-    if not settings.anthropic_api_key:
-        raise HTTPException(
-            status_code=503,
-            detail="Chat is unavailable — ANTHROPIC_API_KEY not configured",
-        )
+    _require_api_key()
 
+    # Identical (normalized) question answered recently → zero LLM and DB cost.
+    # Redis calls are sync, so they run off the event loop.
+    key = chat_cache_key(request.question)
+    cached = await asyncio.to_thread(get_cached_chat, key)
+    if cached is not None:
+        return ChatResponse.model_validate_json(cached)
+
+    _reject_if_busy()
     try:
-        result = await run_agent(request.question)
-        return ChatResponse(answer=result["answer"], tools_used=result["tools_used"])
+        async with _agent_slots:
+            result = await run_agent(request.question)
+        response = ChatResponse(answer=result["answer"], tools_used=result["tools_used"])
+    except (asyncio.TimeoutError, anthropic.APITimeoutError):
+        # A stuck LLM or tool call must not hold the request open indefinitely
+        logger.warning("Agent timed out for question: %.80s", request.question)
+        raise HTTPException(status_code=504, detail="Agent timed out — please try again")
+    except anthropic.RateLimitError:
+        # Expected under load: no traceback, and tell the client to back off
+        logger.warning("Anthropic rate limit hit")
+        raise _busy()
+    except (anthropic.APIConnectionError, anthropic.APIStatusError) as e:
+        # Provider-side failures (overloaded, 5xx, network) aren't our bugs;
+        # log one line instead of a full traceback
+        logger.warning("Anthropic API error: %s", e)
+        status = getattr(e, "status_code", 502)
+        if status >= 500:
+            raise HTTPException(status_code=502, detail="LLM provider unavailable — please try again")
+        raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
     except Exception as e:
-        # Log the full traceback for debugging, but only send a clean message to the client
-        logger.exception("Agent error: %s", e)
+        # Log (with a sampled traceback) for debugging, but only send a clean message to the client
+        _log_agent_error("Agent error", e)
         raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
+
+    if response.answer:
+        await asyncio.to_thread(cache_chat, key, response.model_dump_json())
+    return response
+
+
+async def _sse_events(question: str) -> AsyncIterator[str]:
+    """Format the agent's streamed text as SSE: one `data:` event per chunk,
+    then a `done` event. Failures after the response has started can't change
+    the status code, so they are reported as an `error` event instead."""
+    try:
+        async with _agent_slots:
+            async for text in run_agent_stream(question):
+                yield f"data: {json.dumps({'text': text})}\n\n"
+    except Exception as e:
+        _log_agent_error("Agent stream error", e)
+        yield f"event: error\ndata: {json.dumps({'detail': f'Agent error: {e}'})}\n\n"
+        return
+    yield "event: done\ndata: {}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """Streaming variant of chat: answer text arrives as Server-Sent Events
+    while the LLM writes it. Not cached — use POST / for cached answers."""
+    _require_api_key()
+    _reject_if_busy()
+    return StreamingResponse(
+        _sse_events(request.question),
+        media_type="text/event-stream",
+        # Stop nginx-style proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
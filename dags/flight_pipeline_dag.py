@@ -5,24 +5,40 @@ Orchestrates the full pipeline:
   Stage 1: Upload raw files to S3 (MinIO)
   Stage 2: Load airports (dimension) from OpenFlights
   Stage 3: Extract carriers from flight CSVs + generate date_dim
-  Stage 4: Load flights (fact table — depends on carriers, airports, dates)
+  Stage 4: Load flights (fact table — depends on carriers, airports, dates);
+           secondary indexes are dropped and rebuilt around the initial load
   Stage 5: Load weather observations for airports (Phase 2)
-  Stage 6: Post-load data quality checks
+  Stage 6: ANALYZE loaded tables, refresh materialized views used by the API
+  Stage 7: Post-load data quality checks (three parallel check tasks)
 
 DAG dependency graph:
-  upload_to_s3 >> load_airports >> [extract_carriers, generate_dates] >> load_flights >> load_weather >> quality_checks
+  upload_to_s3 >> load_airports >> [extract_carriers, generate_dates] >> list_new_flight_files
+    >> drop_flight_indexes >> load_flights (mapped, one task per file)
+    >> rebuild_flight_indexes >> list_weather_airports
+    >> load_weather (mapped, one task per airport) >> refresh_views
+    >> [check_core_tables, check_flight_integrity, check_weather_coverage]
 
 Multi-file support:
   - Processes ALL CSV files in data/raw/
   - Tracks processed files in pipeline_runs table
   - Skips already-processed files (idempotent)
+  - Each new file loads in its own mapped task (parallel, retried per file)
+
+Numeric dtypes (FLIGHT_CSV_TYPES):
+  - Delay minutes, distance and other 'float' columns are parsed as float64,
+    the same width as the float8 they are stored as, so values reach
+    Postgres exactly as written in the CSV with no narrowing in between
+  - 0/1 flags and the flight number are parsed as float32, which holds
+    them exactly; they are written as bool/int4, never as floats
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from airflow import DAG
 from airflow.operators.python import PythonOperator
 from psycopg2.extras import execute_values
 
+import os
 import sys
 sys.path.insert(0, '/opt/airflow/scripts')
 
@@ -43,36 +59,145 @@ default_args = {
 BUCKET = 'flight-data'
 AIRPORTS_KEY = 'raw/airports.dat'
 
+# Flight CSVs downloaded and parsed at once by extract_carriers/generate_date_dim
+FILE_READ_WORKERS = 4
+
+# Rows per multi-VALUES INSERT statement for dimension/weather loads
+INSERT_PAGE_SIZE = 1000
+
+# flights columns in the order load_flights builds each row tuple
+FLIGHT_COLUMNS = [
+    'flight_date', 'carrier_code', 'tail_number', 'flight_number',
+    'origin_airport', 'origin_city', 'origin_state',
+    'dest_airport', 'dest_city', 'dest_state',
+    'scheduled_dep', 'actual_dep', 'dep_delay', 'dep_delay_minutes', 'dep_delay_15',
+    'scheduled_arr', 'actual_arr', 'arr_delay', 'arr_delay_minutes', 'arr_delay_15',
+    'cancelled', 'cancellation_code', 'diverted',
+    'distance', 'air_time', 'scheduled_elapsed', 'actual_elapsed',
+    'carrier_delay', 'weather_delay', 'nas_delay', 'security_delay', 'late_aircraft_delay',
+]
+
+# weather_observations columns, as named in generate_weather_data's frame
+WEATHER_COLUMNS = [
+    'airport_code', 'observation_date', 'observation_time',
+    'avg_temperature', 'max_temperature', 'min_temperature',
+    'avg_wind_speed', 'max_wind_speed', 'avg_visibility',
+    'precipitation', 'snow_depth', 'conditions',
+]
+
+# Postgres type of each WEATHER_COLUMNS entry, for unnest_insert_columns
+WEATHER_COLUMN_TYPES = [
+    'text', 'date', 'timestamp',
+    'float8', 'float8', 'float8',
+    'float8', 'float8', 'float8',
+    'float8', 'float8', 'text',
+]
+
+# rejected_records columns in the order load_flights builds each rejection tuple
+REJECTED_COLUMNS = ['source', 'file_name', 'row_number', 'raw_data', 'rejection_reason']
+
+# Source BTS CSV column and conversion for each FLIGHT_COLUMNS entry.
+# 'key' columns are the validated FK strings (date, carrier, origin, dest).
+FLIGHT_CSV_FIELDS = [
+    ('FlightDate', 'key'), ('Reporting_Airline', 'key'), ('Tail_Number', 'str'),
+    ('Flight_Number_Reporting_Airline', 'int'),
+    ('Origin', 'key'), ('OriginCityName', 'str'), ('OriginState', 'str'),
+    ('Dest', 'key'), ('DestCityName', 'str'), ('DestState', 'str'),
+    ('CRSDepTime', 'str'), ('DepTime', 'str'), ('DepDelay', 'float'),
+    ('DepDelayMinutes', 'float'), ('DepDel15', 'bool'),
+    ('CRSArrTime', 'str'), ('ArrTime', 'str'), ('ArrDelay', 'float'),
+    ('ArrDelayMinutes', 'float'), ('ArrDel15', 'bool'),
+    ('Cancelled', 'bool'), ('CancellationCode', 'str'), ('Diverted', 'bool'),
+    ('Distance', 'float'), ('AirTime', 'float'), ('CRSElapsedTime', 'float'),
+    ('ActualElapsedTime', 'float'),
+    ('CarrierDelay', 'float'), ('WeatherDelay', 'float'), ('NASDelay', 'float'),
+    ('SecurityDelay', 'float'), ('LateAircraftDelay', 'float'),
+]
+
+# Pandera checks are advisory (failures only print warnings), so big frames
+# are validated on a random sample. FULL_VALIDATION=1 checks every row.
+VALIDATION_SAMPLE_ROWS = 10_000
+FULL_VALIDATION = os.environ.get('FULL_VALIDATION') == '1'
+
+# Binary COPY wire type per FLIGHT_COLUMNS entry (see db_helper.copy_rows_binary)
+FLIGHT_COPY_TYPES = [
+    'date' if csv_col == 'FlightDate'
+    else {'key': 'text', 'str': 'text', 'int': 'int4', 'float': 'float8', 'bool': 'bool'}[kind]
+    for csv_col, kind in FLIGHT_CSV_FIELDS
+]
+
+# Must match the flights UNIQUE constraint in init_db.sql exactly
+FLIGHT_CONFLICT_COLUMNS = ['flight_date', 'carrier_code', 'flight_number', 'origin_airport', 'scheduled_dep']
+
+# Declared pyarrow types for BTS CSV columns whose inferred type would differ
+# from what pd.read_csv produced (and what flights_schema expects). Numeric
+# widths follow the dtype policy in the module docstring.
+FLIGHT_CSV_TYPES = {
+    'FlightDate': 'string',
+    'Reporting_Airline': 'string',
+    'Origin': 'string',
+    'Dest': 'string',
+    'Flight_Number_Reporting_Airline': 'float32',
+    **{
+        col: {'float': 'float64', 'bool': 'float32'}[kind]
+        for col, kind in FLIGHT_CSV_FIELDS if kind in ('float', 'bool')
+    },
+}
+
+
+# Known US carrier code -> name mapping (unknown codes load as 'Carrier XX')
+CARRIER_NAMES = {
+    'AA': 'American Airlines', 'DL': 'Delta Air Lines',
+    'UA': 'United Airlines', 'WN': 'Southwest Airlines',
+    'B6': 'JetBlue Airways', 'AS': 'Alaska Airlines',
+    'NK': 'Spirit Airlines', 'F9': 'Frontier Airlines',
+    'G4': 'Allegiant Air', 'HA': 'Hawaiian Airlines',
+    'SY': 'Sun Country Airlines', 'MX': 'MexicanaLink',
+    'OH': 'PSA Airlines', 'OO': 'SkyWest Airlines',
+    'YV': 'Mesa Airlines', 'YX': 'Republic Airways',
+    'QX': 'Horizon Air', 'MQ': 'Envoy Air',
+    '9E': 'Endeavor Air', 'EV': 'ExpressJet Airlines',
+    'PT': 'Piedmont Airlines', 'ZW': 'Air Wisconsin',
+    'CP': 'Compass Airlines', 'C5': 'CommutAir',
+    'G7': 'GoJet Airlines', 'KS': 'Penair',
+}
+
 
 # =============================================
 # TASK FUNCTIONS
 # =============================================
 
+def validation_sample(df):
+    """Rows to run a Pandera schema over: all of df, or a fixed-seed sample."""
+    if FULL_VALIDATION or len(df) <= VALIDATION_SAMPLE_ROWS:
+        return df
+    return df.sample(n=VALIDATION_SAMPLE_ROWS, random_state=0)
+
+
 def upload_raw_files_to_s3(**kwargs):
     """
     Upload raw data files from local /data/raw/ to MinIO.
-    Uploads ALL CSV files found (multi-file support).
+    Uploads ALL CSV files found (multi-file support), several at a time.
     """
-    from s3_helper import upload_file, ensure_bucket
+    from s3_helper import upload_files
     import os
 
-    ensure_bucket(BUCKET)
-
     raw_dir = '/opt/airflow/data/raw'
-    uploaded = []
+    files = []
 
     # Upload ALL flight CSV files
     for f in os.listdir(raw_dir):
         if f.endswith('.csv') and 'airport' not in f.lower():
-            key = f'raw/{f}'
-            upload_file(BUCKET, key, os.path.join(raw_dir, f))
-            uploaded.append(f)
+            files.append((f'raw/{f}', os.path.join(raw_dir, f)))
 
     # Upload airports.dat
     airports_path = os.path.join(raw_dir, 'airports.dat')
     if os.path.exists(airports_path):
-        upload_file(BUCKET, AIRPORTS_KEY, airports_path)
-        uploaded.append('airports.dat')
+        files.append((AIRPORTS_KEY, airports_path))
+
+    # Files go up concurrently; the filename list is returned (and pushed to
+    # XCom) only once every upload has finished
+    uploaded = [os.path.basename(key) for key in upload_files(BUCKET, files)]
 
     print(f"Uploaded {len(uploaded)} files to s3://{BUCKET}/")
     return uploaded
@@ -89,17 +214,13 @@ def load_airports(**kwargs):
     Uses INSERT ON CONFLICT for idempotency.
     """
     import pandas as pd
-    import io
-    from s3_helper import get_s3_client
-    from db_helper import get_connection
+    from s3_helper import read_csv_arrow_from_s3
+    from db_helper import get_connection, log_pipeline_run
     from validation_schemas import airports_schema
     from datetime import datetime as dt
 
     print("Loading airports from S3...")
-
-    # Use shared S3 client
-    s3 = get_s3_client()
-    obj = s3.get_object(Bucket=BUCKET, Key=AIRPORTS_KEY)
+    started_at = dt.now()
 
     col_names = [
         'id', 'airport_name', 'city', 'country', 'airport_code', 'icao',
@@ -107,7 +228,18 @@ def load_airports(**kwargs):
         'type', 'source'
     ]
 
-    df = pd.read_csv(io.BytesIO(obj['Body'].read()), header=None, names=col_names)
+    # Parse only the 8 loaded columns (of 14), with pyarrow straight off the
+    # response stream — the unused ones are never converted or allocated
+    df = read_csv_arrow_from_s3(
+        BUCKET, AIRPORTS_KEY,
+        columns=['airport_code', 'airport_name', 'city', 'country',
+                 'latitude', 'longitude', 'altitude', 'timezone'],
+        column_types={
+            'airport_code': 'string', 'airport_name': 'string', 'city': 'string',
+            'country': 'string', 'timezone': 'string',
+        },
+        column_names=col_names,
+    )
 
     print(f"Raw airports: {len(df)} rows")
 
@@ -122,48 +254,42 @@ def load_airports(**kwargs):
 
     # Validate with Pandera
     try:
-        airports_schema.validate(df, lazy=True)
+        airports_schema.validate(validation_sample(df), lazy=True)
         print("Pandera validation passed")
     except Exception as e:
         print(f"Pandera validation warnings: {e}")
 
-    # Insert into database
+    # Insert into database (multi-row VALUES batches, not one round-trip per row)
     insert_query = """
         INSERT INTO airports (airport_code, airport_name, city, country,
                               latitude, longitude, altitude, timezone)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES %s
         ON CONFLICT (airport_code) DO NOTHING
     """
 
-    rows_loaded = 0
+    # Build the row tuples column-wise: tolist() gives native Python values
+    # in one C-level pass per column, instead of a Series object per row
+    altitudes = [int(a) if pd.notna(a) else None for a in df['altitude'].tolist()]
+    timezones = [tz if pd.notna(tz) else None for tz in df['timezone'].tolist()]
+    rows = list(zip(
+        df['airport_code'].tolist(),
+        df['airport_name'].tolist(),
+        df['city'].tolist(),
+        df['country'].tolist(),
+        df['latitude'].tolist(),
+        df['longitude'].tolist(),
+        altitudes,
+        timezones,
+    ))
+
+    # Airports and their pipeline_runs entry commit together
     with get_connection() as conn:
         with conn.cursor() as cur:
-            for _, row in df.iterrows():
-                cur.execute(insert_query, (
-                    row['airport_code'],
-                    row['airport_name'],
-                    row['city'],
-                    row['country'],
-                    row['latitude'],
-                    row['longitude'],
-                    int(row['altitude']) if pd.notna(row['altitude']) else None,
-                    row['timezone'] if pd.notna(row['timezone']) else None,
-                ))
-                rows_loaded += 1
-
-    # Log pipeline run
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO pipeline_runs (file_name, source, rows_processed, rows_loaded,
-                                           rows_rejected, status, started_at, completed_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (file_name, source) DO UPDATE SET
-                    rows_loaded = EXCLUDED.rows_loaded,
-                    status = EXCLUDED.status,
-                    completed_at = EXCLUDED.completed_at
-            """, ('airports.dat', 'airports', len(df), rows_loaded, 0,
-                  'completed', dt.now(), dt.now()))
+            execute_values(cur, insert_query, rows, page_size=INSERT_PAGE_SIZE)
+            rows_loaded = len(rows)
+
+            # Log pipeline run
+            log_pipeline_run(cur, 'airports.dat', 'airports', len(df), rows_loaded, 0, started_at)
 
     print(f"Loaded {rows_loaded} airports into database")
     return rows_loaded
@@ -171,76 +297,57 @@ def load_airports(**kwargs):
 
 def extract_carriers(**kwargs):
     """
-    Extract unique carriers from ALL flight CSV files and load into carriers table.
-    Multi-file support: reads from all CSVs in the bucket.
+    Extract unique carriers from NEW flight CSV files and load into carriers table.
+    Multi-file support: reads every CSV not yet in pipeline_runs (carriers of
+    loaded files are already in the table, since load_flights rejects unknown ones).
     Uses INSERT ON CONFLICT for idempotency.
     """
     import pandas as pd
-    import io
-    from s3_helper import get_s3_client, list_files
+    from s3_helper import read_csv_arrow_from_s3
     from db_helper import get_connection
 
-    print("Extracting carriers from ALL flight CSV files...")
-
-    # Known US carrier code -> name mapping
-    carrier_names = {
-        'AA': 'American Airlines', 'DL': 'Delta Air Lines',
-        'UA': 'United Airlines', 'WN': 'Southwest Airlines',
-        'B6': 'JetBlue Airways', 'AS': 'Alaska Airlines',
-        'NK': 'Spirit Airlines', 'F9': 'Frontier Airlines',
-        'G4': 'Allegiant Air', 'HA': 'Hawaiian Airlines',
-        'SY': 'Sun Country Airlines', 'MX': 'MexicanaLink',
-        'OH': 'PSA Airlines', 'OO': 'SkyWest Airlines',
-        'YV': 'Mesa Airlines', 'YX': 'Republic Airways',
-        'QX': 'Horizon Air', 'MQ': 'Envoy Air',
-        '9E': 'Endeavor Air', 'EV': 'ExpressJet Airlines',
-        'PT': 'Piedmont Airlines', 'ZW': 'Air Wisconsin',
-        'CP': 'Compass Airlines', 'C5': 'CommutAir',
-        'G7': 'GoJet Airlines', 'KS': 'Penair',
-    }
-
-    # Find all CSV files
-    all_files = list_files(BUCKET, prefix='raw/')
-    csv_files = [f for f in all_files if f.endswith('.csv') and 'airport' not in f.lower()]
+    print("Extracting carriers from new flight CSV files...")
+
+    csv_files = find_new_flight_files()
 
     if not csv_files:
-        print("No CSV files found!")
+        print("No new CSV files — carriers already cover loaded data")
         return 0
 
-    # Collect unique carriers from ALL files
-    all_carriers = {}
-    s3 = get_s3_client()
-
-    for file_key in csv_files:
+    # Collect unique carriers from the new files
+    def read_carriers(file_key):
         print(f"Reading carriers from {file_key}...")
-        obj = s3.get_object(Bucket=BUCKET, Key=file_key)
-        df = pd.read_csv(
-            io.BytesIO(obj['Body'].read()),
-            usecols=['Reporting_Airline', 'DOT_ID_Reporting_Airline'],
-            low_memory=False
+        df = read_csv_arrow_from_s3(
+            BUCKET, file_key,
+            columns=['Reporting_Airline', 'DOT_ID_Reporting_Airline'],
+            column_types=FLIGHT_CSV_TYPES,
         )
+        # Shrink each file to one row per carrier before concatenating
+        return df.drop_duplicates(subset='Reporting_Airline')
 
-        for _, row in df.drop_duplicates().iterrows():
-            code = row['Reporting_Airline']
-            if code not in all_carriers:
-                dot_id = int(row['DOT_ID_Reporting_Airline']) if pd.notna(row['DOT_ID_Reporting_Airline']) else None
-                all_carriers[code] = dot_id
+    # Files are downloaded and parsed concurrently (pyarrow releases the GIL);
+    # map() keeps file order, so "first seen wins" in the dedupe below
+    with ThreadPoolExecutor(max_workers=FILE_READ_WORKERS) as pool:
+        all_carriers = pd.concat(list(pool.map(read_carriers, csv_files)), ignore_index=True)
+    all_carriers = all_carriers.drop_duplicates(subset='Reporting_Airline')
 
-    print(f"Found {len(all_carriers)} unique carriers across all files")
+    print(f"Found {len(all_carriers)} unique carriers across new files")
 
     insert_query = """
         INSERT INTO carriers (carrier_code, carrier_name, dot_id)
-        VALUES (%s, %s, %s)
+        VALUES %s
         ON CONFLICT (carrier_code) DO NOTHING
     """
 
-    rows_loaded = 0
+    rows = [
+        (code, CARRIER_NAMES.get(code, f'Carrier {code}'), int(dot_id) if pd.notna(dot_id) else None)
+        for code, dot_id in zip(all_carriers['Reporting_Airline'], all_carriers['DOT_ID_Reporting_Airline'])
+    ]
+
     with get_connection() as conn:
         with conn.cursor() as cur:
-            for code, dot_id in all_carriers.items():
-                name = carrier_names.get(code, f'Carrier {code}')
-                cur.execute(insert_query, (code, name, dot_id))
-                rows_loaded += 1
+            execute_values(cur, insert_query, rows, page_size=INSERT_PAGE_SIZE)
+    rows_loaded = len(rows)
 
     print(f"Loaded {rows_loaded} carriers into database")
     return rows_loaded
@@ -248,288 +355,371 @@ def extract_carriers(**kwargs):
 
 def generate_date_dim(**kwargs):
     """
-    Generate date dimension table for the date range in ALL flight CSV files.
+    Generate date dimension rows for the dates in NEW flight CSV files.
     Uses the shared ensure_dates_exist function from db_helper.
+
+    Files already in pipeline_runs had their dates added when they were
+    loaded, so only new files are read — a repeat run with no new data
+    reads nothing from S3.
     """
-    import pandas as pd
-    import io
-    from s3_helper import list_files, get_s3_client
-    from db_helper import ensure_dates_exist
+    import numpy as np
+    from s3_helper import read_csv_arrow_from_s3
+    from db_helper import get_connection, ensure_dates_exist
 
     print("Generating date dimension...")
 
-    # Find all flight CSV files
-    all_files = list_files(BUCKET, prefix='raw/')
-    csv_files = [f for f in all_files if f.endswith('.csv') and 'airport' not in f.lower()]
+    csv_files = find_new_flight_files()
 
     if not csv_files:
-        print("No CSV files found!")
+        print("No new CSV files — date dimension already covers loaded data")
         return 0
 
-    # Collect all unique dates from all CSV files
-    all_dates = set()
-    s3 = get_s3_client()
-
-    for file_key in csv_files:
-        print(f"Reading dates from {file_key}...")
-        obj = s3.get_object(Bucket=BUCKET, Key=file_key)
-        df = pd.read_csv(io.BytesIO(obj['Body'].read()), usecols=['FlightDate'], low_memory=False)
-        file_dates = set(pd.to_datetime(df['FlightDate']))
-        all_dates.update(file_dates)
-        print(f"  Found {len(file_dates)} unique dates")
+    # Collect all unique dates from the new CSV files
+    def read_dates(file_key):
+        # pyarrow parses FlightDate straight to date32; each file is reduced
+        # to its distinct days before anything is combined
+        df = read_csv_arrow_from_s3(BUCKET, file_key, columns=['FlightDate'], column_types={'FlightDate': 'date32'})
+        file_dates = np.unique(df['FlightDate'].dropna().to_numpy().astype('datetime64[D]'))
+        print(f"Read {len(file_dates)} unique dates from {file_key}")
+        return file_dates
+
+    # Files are downloaded and parsed concurrently (pyarrow releases the GIL)
+    with ThreadPoolExecutor(max_workers=FILE_READ_WORKERS) as pool:
+        all_dates = np.unique(np.concatenate(list(pool.map(read_dates, csv_files))))
+
+    print(f"Total unique dates across new files: {len(all_dates)}")
+    if not len(all_dates):
+        return 0
 
-    print(f"Total unique dates across all files: {len(all_dates)}")
+    # Diff against the days date_dim already holds in this range, so only
+    # genuinely new dates are sent (a rerun sends none). load_flights does
+    # the same diff, and finds nothing left once this task has run.
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT array_agg(date_id::text) FROM date_dim WHERE date_id BETWEEN %s AND %s",
+                (str(all_dates[0]), str(all_dates[-1])),
+            )
+            existing = np.array(cur.fetchone()[0] or [], dtype='datetime64[D]')
+            missing_dates = np.setdiff1d(all_dates, existing)
 
-    # Use the shared function to add all dates
-    rows_added = ensure_dates_exist(all_dates)
+            # Use the shared function to add the missing dates
+            rows_added = ensure_dates_exist([str(d) for d in missing_dates], cur=cur) if len(missing_dates) else 0
 
-    print(f"Date dimension complete: {rows_added} dates processed")
+    print(f"Date dimension complete: {rows_added} new dates added")
     return rows_added
 
 
-def load_flights(**kwargs):
+def find_new_flight_files():
     """
-    Load flights from BTS CSV files into flights fact table.
-
-    MULTI-FILE VERSION:
-    - Lists all CSV files in S3 bucket
-    - Checks pipeline_runs to see which files are already processed
-    - Only processes NEW files
-    - Tracks each file in pipeline_runs when done
-
-    Key design decisions:
-    - Chunked processing (50K rows at a time) to limit memory
-    - INSERT ON CONFLICT for idempotency (safe retries)
-    - Rejected rows logged to rejected_records table
+    Return the S3 keys of flight CSVs that haven't been loaded yet.
+    Checks pipeline_runs so already-processed files are skipped.
     """
-    import pandas as pd
-    import io
-    from s3_helper import get_s3_client, list_files
-    from db_helper import get_connection, ensure_dates_exist, safe_float, safe_int, safe_str, safe_bool
-    from validation_schemas import flights_schema
-    from datetime import datetime as dt
-
-    CHUNK_SIZE = 50000
-
-    print("=" * 50)
-    print("MULTI-FILE FLIGHT LOADER")
-    print("=" * 50)
+    from s3_helper import list_files
+    from db_helper import get_connection
 
-    # Step 1: Get list of all CSV files in S3
     all_files = list_files(BUCKET, prefix='raw/')
     csv_files = [f for f in all_files if f.endswith('.csv') and 'airport' not in f.lower()]
     print(f"Found {len(csv_files)} CSV files in S3: {csv_files}")
 
-    # Step 2: Check which files have already been processed
+    # One query, filtered to just the files in S3 so the scan rides the
+    # UNIQUE (file_name, source) index instead of reading every run ever logged
+    file_names = [f.split('/')[-1] for f in csv_files]
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("""
-                SELECT file_name FROM pipeline_runs
+                SELECT array_agg(file_name) FROM pipeline_runs
                 WHERE source = 'flights' AND status = 'completed'
-            """)
-            processed_files = set(row[0] for row in cur.fetchall())
+                  AND file_name = ANY(%s)
+            """, (file_names,))
+            processed_files = set(cur.fetchone()[0] or [])
 
     print(f"Already processed: {processed_files}")
 
-    # Step 3: Find NEW files (not yet processed)
     new_files = [f for f in csv_files if f.split('/')[-1] not in processed_files]
+    print(f"New files to process: {new_files}")
+    return new_files
 
-    if not new_files:
-        print("No new files to process!")
-        return {'files_processed': 0, 'total_loaded': 0}
 
-    print(f"New files to process: {new_files}")
+def list_new_flight_files(**kwargs):
+    """
+    List the flight CSVs in S3 that haven't been loaded yet.
+    Returns one op_kwargs dict per new file, which load_flights is mapped over.
+    """
+    return [{'file_key': f} for f in find_new_flight_files()]
+
+
+def drop_flight_indexes(**kwargs):
+    """
+    Before the initial flights load, drop the table's secondary indexes so
+    rows aren't pushed through every B-tree one at a time; they're rebuilt
+    once, over all the data, by rebuild_flight_indexes. Incremental monthly
+    loads into a populated table keep their indexes.
+    The definitions are kept in the dropped_indexes table, not XCom, so a
+    retry after a partial drop still leaves every index to be rebuilt.
+    Returns the names of the dropped indexes.
+    """
+    from db_helper import get_connection, drop_secondary_indexes
+
+    if not kwargs['ti'].xcom_pull(task_ids='list_new_flight_files'):
+        print("No new flight files — indexes kept")
+        return []
 
-    # Step 4: Get valid foreign keys from database
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("SELECT airport_code FROM airports")
-            valid_airports = set(row[0] for row in cur.fetchall())
-
-            cur.execute("SELECT carrier_code FROM carriers")
-            valid_carriers = set(row[0] for row in cur.fetchall())
-
-            cur.execute("SELECT date_id FROM date_dim")
-            valid_dates = set(str(row[0]) for row in cur.fetchall())
-
-    print(f"Valid airports: {len(valid_airports)}, carriers: {len(valid_carriers)}, dates: {len(valid_dates)}")
-
-    # Step 5: Process each new file
-    grand_total_loaded = 0
-    grand_total_rejected = 0
-    files_processed = 0
-
-    s3 = get_s3_client()
-
-    for file_key in new_files:
-        file_name = file_key.split('/')[-1]
-        print(f"\n{'=' * 50}")
-        print(f"Processing: {file_name}")
-        print(f"{'=' * 50}")
-
-        started_at = dt.now()
-
-        # Read CSV from S3
-        obj = s3.get_object(Bucket=BUCKET, Key=file_key)
-        df = pd.read_csv(io.BytesIO(obj['Body'].read()), low_memory=False)
-
-        total_rows = len(df)
-        print(f"Total rows in {file_name}: {total_rows}")
-
-        # Validate with Pandera
-        try:
-            flights_schema.validate(df, lazy=True)
-            print("Pandera validation passed")
-        except Exception as e:
-            print(f"Pandera validation warnings (continuing): {e}")
-
-        # Check if we need to add new dates to date_dim
-        dates_in_file = set(str(d.date()) for d in pd.to_datetime(df['FlightDate']))
-        missing_dates = dates_in_file - valid_dates
-        if missing_dates:
-            print(f"Adding {len(missing_dates)} new dates to date_dim...")
-            ensure_dates_exist(missing_dates)
-            valid_dates.update(missing_dates)
-
-        file_loaded = 0
-        file_rejected = 0
-
-        # Process in chunks — validate row-by-row, then bulk insert
-        for chunk_start in range(0, total_rows, CHUNK_SIZE):
-            chunk = df.iloc[chunk_start:chunk_start + CHUNK_SIZE]
-            chunk_num = chunk_start // CHUNK_SIZE + 1
-            print(f"Processing chunk {chunk_num} ({len(chunk)} rows)...")
-
-            valid_rows = []
-            rejected_rows = []
-
-            # Step A: Validate all rows in Python (fast — set lookups only)
-            for idx, row in chunk.iterrows():
-                origin = str(row['Origin']).strip()
-                dest = str(row['Dest']).strip()
-                carrier = str(row['Reporting_Airline']).strip()
-                flight_date = str(row['FlightDate']).strip()
-
-                rejection_reasons = []
-                if origin not in valid_airports:
-                    rejection_reasons.append(f"Unknown origin airport: {origin}")
-                if dest not in valid_airports:
-                    rejection_reasons.append(f"Unknown dest airport: {dest}")
-                if carrier not in valid_carriers:
-                    rejection_reasons.append(f"Unknown carrier: {carrier}")
-                if flight_date not in valid_dates:
-                    rejection_reasons.append(f"Unknown date: {flight_date}")
-
-                if rejection_reasons:
-                    rejected_rows.append((
-                        'flights', file_name, int(idx),
-                        f"{flight_date},{carrier},{origin},{dest}",
-                        '; '.join(rejection_reasons)
-                    ))
-                    continue
-
-                valid_rows.append((
-                    flight_date,
-                    carrier,
-                    safe_str(row.get('Tail_Number')),
-                    safe_int(row.get('Flight_Number_Reporting_Airline')),
-                    origin,
-                    safe_str(row.get('OriginCityName')),
-                    safe_str(row.get('OriginState')),
-                    dest,
-                    safe_str(row.get('DestCityName')),
-                    safe_str(row.get('DestState')),
-                    safe_str(row.get('CRSDepTime')),
-                    safe_str(row.get('DepTime')),
-                    safe_float(row.get('DepDelay')),
-                    safe_float(row.get('DepDelayMinutes')),
-                    safe_bool(row.get('DepDel15')),
-                    safe_str(row.get('CRSArrTime')),
-                    safe_str(row.get('ArrTime')),
-                    safe_float(row.get('ArrDelay')),
-                    safe_float(row.get('ArrDelayMinutes')),
-                    safe_bool(row.get('ArrDel15')),
-                    safe_bool(row.get('Cancelled')),
-                    safe_str(row.get('CancellationCode')),
-                    safe_bool(row.get('Diverted')),
-                    safe_float(row.get('Distance')),
-                    safe_float(row.get('AirTime')),
-                    safe_float(row.get('CRSElapsedTime')),
-                    safe_float(row.get('ActualElapsedTime')),
-                    safe_float(row.get('CarrierDelay')),
-                    safe_float(row.get('WeatherDelay')),
-                    safe_float(row.get('NASDelay')),
-                    safe_float(row.get('SecurityDelay')),
-                    safe_float(row.get('LateAircraftDelay')),
-                ))
-
-            # Step B: Bulk insert valid rows (one round-trip for entire chunk)
-            with get_connection() as conn:
-                with conn.cursor() as cur:
-                    if valid_rows:
-                        execute_values(cur, """
-                            INSERT INTO flights (
-                                flight_date, carrier_code, tail_number, flight_number,
-                                origin_airport, origin_city, origin_state,
-                                dest_airport, dest_city, dest_state,
-                                scheduled_dep, actual_dep, dep_delay, dep_delay_minutes, dep_delay_15,
-                                scheduled_arr, actual_arr, arr_delay, arr_delay_minutes, arr_delay_15,
-                                cancelled, cancellation_code, diverted,
-                                distance, air_time, scheduled_elapsed, actual_elapsed,
-                                carrier_delay, weather_delay, nas_delay, security_delay, late_aircraft_delay
-                            ) VALUES %s
-                            ON CONFLICT (flight_date, carrier_code, flight_number, origin_airport) DO NOTHING
-                        """, valid_rows, page_size=10000)
-                        file_loaded += len(valid_rows)
-
-                    if rejected_rows:
-                        execute_values(cur, """
-                            INSERT INTO rejected_records (source, file_name, row_number, raw_data, rejection_reason)
-                            VALUES %s
-                        """, rejected_rows)
-                        file_rejected += len(rejected_rows)
-
-            print(f"  Chunk {chunk_num}: loaded={file_loaded}, rejected={file_rejected}")
-
-        # Log this file as processed
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO pipeline_runs (file_name, source, rows_processed, rows_loaded,
-                                               rows_rejected, status, started_at, completed_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (file_name, source) DO UPDATE SET
-                        rows_loaded = EXCLUDED.rows_loaded,
-                        rows_rejected = EXCLUDED.rows_rejected,
-                        status = EXCLUDED.status,
-                        completed_at = EXCLUDED.completed_at
-                """, (file_name, 'flights', total_rows, file_loaded,
-                      file_rejected, 'completed', started_at, dt.now()))
-
-        print(f"\n{file_name} complete: loaded={file_loaded}, rejected={file_rejected}")
-
-        grand_total_loaded += file_loaded
-        grand_total_rejected += file_rejected
-        files_processed += 1
+            cur.execute("SELECT EXISTS (SELECT 1 FROM flights)")
+            populated = cur.fetchone()[0]
 
-    print(f"\n{'=' * 50}")
-    print(f"ALL FILES COMPLETE")
-    print(f"Files processed: {files_processed}")
-    print(f"Total loaded: {grand_total_loaded}")
-    print(f"Total rejected: {grand_total_rejected}")
+    if populated:
+        print("flights already populated — incremental load, indexes kept")
+        return []
+
+    return drop_secondary_indexes('flights')
+
+
+def rebuild_flight_indexes(**kwargs):
+    """
+    Recreate the indexes drop_flight_indexes dropped. Runs once every
+    load_flights task has finished, whether or not they all succeeded,
+    so a failed load never leaves the table unindexed. Reads the recorded
+    definitions from dropped_indexes, so it also restores any left over by
+    an earlier run that never reached this task.
+    """
+    from db_helper import rebuild_indexes
+
+    return {'rebuilt': rebuild_indexes('flights')}
+
+
+def load_flights(file_key, **kwargs):
+    """
+    Load one BTS CSV file from S3 into the flights fact table.
+
+    Mapped over list_new_flight_files, so each new file is its own task
+    instance: files load in parallel (up to the db_pool slots) and a failed
+    file is retried on its own. The file is tracked in pipeline_runs when done.
+
+    Key design decisions:
+    - Chunked processing (50K rows at a time) to limit memory
+    - COPY into an unindexed staging table, then one INSERT ON CONFLICT per
+      file for idempotency (safe retries)
+    - Rejected rows COPYed into the rejected_records table
+    """
+    import numpy as np
+    import pandas as pd
+    from s3_helper import read_csv_arrow_from_s3
+    from db_helper import (
+        get_connection, copy_rows, copy_to_stage, merge_stage, ensure_dates_exist, log_pipeline_run,
+        safe_str_column, safe_int_column, safe_float_column, safe_bool_column,
+    )
+    from validation_schemas import flights_schema, validate_flights_fast
+    from datetime import datetime as dt
+
+    CHUNK_SIZE = 50000
+
+    file_name = file_key.split('/')[-1]
     print(f"{'=' * 50}")
+    print(f"Processing: {file_name}")
+    print(f"{'=' * 50}")
+
+    started_at = dt.now()
+
+    # Read CSV from S3 — only the ~30 of the BTS file's ~110 columns that are
+    # loaded, which cuts parse time and memory by about two thirds
+    df = read_csv_arrow_from_s3(
+        BUCKET, file_key,
+        columns=[csv_col for csv_col, _ in FLIGHT_CSV_FIELDS],
+        column_types=FLIGHT_CSV_TYPES,
+        include_missing_columns=True,
+    )
+
+    total_rows = len(df)
+    print(f"Total rows in {file_name}: {total_rows}")
+
+    # Validate with Pandera
+    try:
+        flights_schema.validate(validation_sample(df), lazy=True)
+        print("Pandera validation passed")
+    except Exception as e:
+        print(f"Pandera validation warnings (continuing): {e}")
 
-    return {'files_processed': files_processed, 'loaded': grand_total_loaded, 'rejected': grand_total_rejected}
+    # Full-file range checks, vectorized (advisory, like the Pandera pass)
+    violations = validate_flights_fast(df)
+    if violations:
+        print(f"Range check warnings (continuing): {violations}")
 
+    file_loaded = 0
+    file_rejected = 0
 
-def load_weather(**kwargs):
+    # One pooled connection serves the whole file. After the FK lookups, the
+    # rows load in one transaction: chunks are staged, merged into flights in
+    # a single sorted INSERT, and the file is marked completed in the same
+    # commit — readers never see a half-loaded file, and a failed
+    # load leaves nothing behind for the retry to trip over.
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            # Get valid foreign keys from database — one row holding an array
+            # per dimension table, so a single round-trip and no per-row tuples
+            cur.execute("""
+                SELECT
+                    (SELECT array_agg(airport_code) FROM airports),
+                    (SELECT array_agg(carrier_code) FROM carriers),
+                    (SELECT array_agg(date_id::text) FROM date_dim)
+            """)
+            airport_codes, carrier_codes, date_ids = cur.fetchone()
+            valid_airports = set(airport_codes or [])
+            valid_carriers = set(carrier_codes or [])
+            valid_dates = np.array(date_ids or [], dtype='datetime64[D]')
+
+            print(f"Valid airports: {len(valid_airports)}, carriers: {len(valid_carriers)}, dates: {len(valid_dates)}")
+
+            # Check if we need to add new dates to date_dim — dates stay datetime64
+            # arrays so the diff and the per-row check run in NumPy, not Python
+            flight_days = pd.to_datetime(df['FlightDate'], errors='coerce')
+            dates_in_file = flight_days.dropna().unique().to_numpy().astype('datetime64[D]')
+            missing_dates = np.setdiff1d(dates_in_file, valid_dates)
+            if len(missing_dates):
+                print(f"Adding {len(missing_dates)} new dates to date_dim...")
+                ensure_dates_exist([str(d) for d in missing_dates], cur=cur)
+                valid_dates = np.union1d(valid_dates, missing_dates)
+            # Unparseable dates come out NaT and fail the check
+            date_known = flight_days.isin(valid_dates)
+
+            # Commit the lookups and any new dates on their own, so parallel
+            # file loads sharing a date don't wait on each other's load
+            conn.commit()
+
+            # A crash just means the file is reloaded (idempotent), so skip
+            # waiting on the WAL flush at commit
+            cur.execute("SET LOCAL synchronous_commit = off")
+
+            def write_chunk(valid_rows, rejected_rows):
+                # COPY valid rows into the unindexed staging table; the
+                # indexed flights table is only touched once, after the last chunk
+                copy_to_stage(cur, 'flights', FLIGHT_COLUMNS, valid_rows, FLIGHT_COPY_TYPES)
+
+                # Rejections need no conflict handling, so they COPY straight in
+                copy_rows(cur, 'rejected_records', REJECTED_COLUMNS, rejected_rows)
+
+            # Process in chunks — validate and convert column-wise, then bulk
+            # insert. One writer thread COPYs chunk N while chunk N+1 is being
+            # built; a single worker keeps the cursor's statements in order.
+            pending = None
+            with ThreadPoolExecutor(max_workers=1) as writer:
+                for chunk_start in range(0, total_rows, CHUNK_SIZE):
+                    chunk = df.iloc[chunk_start:chunk_start + CHUNK_SIZE]
+                    chunk_num = chunk_start // CHUNK_SIZE + 1
+                    print(f"Processing chunk {chunk_num} ({len(chunk)} rows)...")
+
+                    # Step A: Validate the whole chunk at once — vectorized set
+                    # lookups build one mask per FK, no per-row Python
+                    keys = {
+                        col: chunk[col].astype(str).str.strip()
+                        for col in ('FlightDate', 'Reporting_Airline', 'Origin', 'Dest')
+                    }
+                    origin_ok = keys['Origin'].isin(valid_airports)
+                    dest_ok = keys['Dest'].isin(valid_airports)
+                    carrier_ok = keys['Reporting_Airline'].isin(valid_carriers)
+                    date_ok = date_known.loc[chunk.index]
+                    valid_mask = origin_ok & dest_ok & carrier_ok & date_ok
+                    # File totals for pipeline_runs come straight off the mask
+                    n_valid = int(valid_mask.sum())
+                    file_loaded += n_valid
+                    file_rejected += len(chunk) - n_valid
+
+                    rejected_rows = []
+                    if n_valid < len(chunk):
+                        bad = ~valid_mask
+                        # One message column per check ('' where it passed), summed
+                        # into "a; b; " and trimmed — every rejected row has at least
+                        # one message, so the trailing "; " is always there to cut
+                        reasons = (
+                            ("Unknown origin airport: " + keys['Origin'] + '; ').where(~origin_ok, '')[bad]
+                            + ("Unknown dest airport: " + keys['Dest'] + '; ').where(~dest_ok, '')[bad]
+                            + ("Unknown carrier: " + keys['Reporting_Airline'] + '; ').where(~carrier_ok, '')[bad]
+                            + ("Unknown date: " + keys['FlightDate'] + '; ').where(~date_ok, '')[bad]
+                        ).str[:-2]
+                        raw_data = (
+                            keys['FlightDate'][bad] + ',' + keys['Reporting_Airline'][bad] + ','
+                            + keys['Origin'][bad] + ',' + keys['Dest'][bad]
+                        )
+                        rejected_rows = [
+                            ('flights', file_name, int(idx), raw, reason)
+                            for idx, raw, reason in zip(chunk.index[bad.to_numpy()], raw_data.tolist(), reasons.tolist())
+                        ]
+
+                    # Convert the valid rows column by column (same rules as the
+                    # safe_* helpers), then zip them into row tuples
+                    valid = chunk[valid_mask]
+                    converters = {
+                        'str': safe_str_column, 'int': safe_int_column,
+                        'float': safe_float_column, 'bool': safe_bool_column,
+                    }
+                    columns = []
+                    for csv_col, kind in FLIGHT_CSV_FIELDS:
+                        if kind == 'key':
+                            columns.append(keys[csv_col][valid_mask].tolist())
+                        elif csv_col in valid.columns:
+                            columns.append(converters[kind](valid[csv_col]))
+                        else:
+                            columns.append([False if kind == 'bool' else None] * len(valid))
+                    valid_rows = list(zip(*columns))
+
+                    # Step B: hand the rows to the writer, once it has finished
+                    # the previous chunk (at most two chunks of rows in memory)
+                    if pending is not None:
+                        pending.result()
+                    pending = writer.submit(write_chunk, valid_rows, rejected_rows)
+
+                    print(f"  Chunk {chunk_num}: loaded={file_loaded}, rejected={file_rejected}")
+
+                if pending is not None:
+                    pending.result()
+
+            print("Merging staged rows into flights...")
+            inserted = merge_stage(cur, 'flights', FLIGHT_COLUMNS, FLIGHT_CONFLICT_COLUMNS)
+            print(f"  Inserted {inserted} new rows ({file_loaded - inserted} already present)")
+
+            # Log this file as processed
+            log_pipeline_run(cur, file_name, 'flights', total_rows, file_loaded, file_rejected, started_at)
+
+    print(f"{file_name} complete: loaded={file_loaded}, rejected={file_rejected}")
+    return {'file': file_name, 'loaded': file_loaded, 'rejected': file_rejected}
+
+
+def list_weather_airports(**kwargs):
+    """
+    List the airports to load weather for: in our airports table AND mapped
+    to an IEM station. Returns one op_kwargs dict per airport, which
+    load_weather is mapped over.
     """
-    Load weather observations for airports in our flight data.
+    from db_helper import get_connection
+    from weather_helper import get_mapped_airports
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT array_agg(airport_code) FROM airports")
+            db_airports = set(cur.fetchone()[0] or [])
+
+    mapped_airports = get_mapped_airports()
+    valid_airports = [a for a in mapped_airports if a in db_airports]
+
+    print(f"Airports in DB: {len(db_airports)}")
+    print(f"Airports with weather mappings: {len(mapped_airports)}")
+    print(f"Airports to load weather for: {len(valid_airports)}")
+
+    return [{'airport': a} for a in valid_airports]
+
+
+def load_weather(airport, **kwargs):
+    """
+    Load weather observations for one airport in our flight data (mapped:
+    one task per airport from list_weather_airports, so IEM downloads run
+    in parallel across workers).
 
     PHASE 2: Weather Data Integration
     ---------------------------------
-    - Generates realistic sample weather data for portfolio demo
-    - In production, this would fetch from NOAA's LCD API
+    - Fetches real hourly ASOS observations from Iowa Environmental Mesonet
+      (IEM) for the airport's station, covering the date_dim date range
     - Weather data enables delay correlation analysis:
       "Do flights have more delays on snowy days?"
 
@@ -538,40 +728,24 @@ def load_weather(**kwargs):
     - Only loads weather for dates in our date_dim table
     - Uses INSERT ON CONFLICT for idempotency (safe to re-run)
     """
-    import pandas as pd
-    from db_helper import get_connection
-    from weather_helper import generate_weather_data, get_mapped_airports
+    from db_helper import get_connection, log_pipeline_run, unnest_insert_columns
+    from weather_helper import generate_weather_data
     from validation_schemas import weather_schema
     from datetime import datetime as dt
 
     print("=" * 50)
-    print("WEATHER DATA LOADER (Phase 2)")
+    print(f"WEATHER DATA LOADER (Phase 2): {airport}")
     print("=" * 50)
 
     started_at = dt.now()
 
-    # Step 1: Get airports that exist in our database AND have weather mappings
+    # Step 1: Get dates from our date_dim table
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("SELECT airport_code FROM airports")
-            db_airports = set(row[0] for row in cur.fetchall())
-
-    mapped_airports = set(get_mapped_airports())
-    valid_airports = list(db_airports & mapped_airports)
+            cur.execute("SELECT array_agg(date_id ORDER BY date_id) FROM date_dim")
+            date_ids = cur.fetchone()[0]
 
-    print(f"Airports in DB: {len(db_airports)}")
-    print(f"Airports with weather mappings: {len(mapped_airports)}")
-    print(f"Airports to load weather for: {len(valid_airports)}")
-
-    if not valid_airports:
-        print("No valid airports found!")
-        return {'loaded': 0, 'rejected': 0}
-
-    # Step 2: Get dates from our date_dim table
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT date_id FROM date_dim ORDER BY date_id")
-            dates = [row[0] for row in cur.fetchall()]
+    dates = date_ids or []
 
     print(f"Dates in date_dim: {len(dates)}")
 
@@ -579,85 +753,42 @@ def load_weather(**kwargs):
         print("No dates found in date_dim!")
         return {'loaded': 0, 'rejected': 0}
 
-    # Step 3: Check what weather data we already have
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT airport_code, observation_time FROM weather_observations
-            """)
-            existing = set((row[0], str(row[1])) for row in cur.fetchall())
-
-    print(f"Existing weather records: {len(existing)}")
-
-    # Step 4: Generate weather data
-    weather_data = generate_weather_data(valid_airports, dates)
-
-    # Convert to DataFrame for validation
-    df = pd.DataFrame(weather_data)
+    # Step 2: Fetch observations from IEM (a DataFrame, NaN = missing)
+    df = generate_weather_data([airport], dates)
 
-    # Step 5: Validate with Pandera
+    # Step 3: Validate with Pandera
     try:
-        weather_schema.validate(df, lazy=True)
+        weather_schema.validate(validation_sample(df), lazy=True)
         print("Pandera validation passed")
     except Exception as e:
         print(f"Pandera validation warnings (continuing): {e}")
 
-    # Step 6: Insert into database
-    insert_query = """
-        INSERT INTO weather_observations (
-            airport_code, observation_date, observation_time,
-            avg_temperature, max_temperature, min_temperature,
-            avg_wind_speed, max_wind_speed, avg_visibility,
-            precipitation, snow_depth, conditions
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (airport_code, observation_time) DO NOTHING
-    """
-
-    loaded = 0
-    skipped = 0
-
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            for obs in weather_data:
-                # Skip if already exists
-                key = (obs['airport_code'], obs['observation_time'])
-                if key in existing:
-                    skipped += 1
-                    continue
-
-                cur.execute(insert_query, (
-                    obs['airport_code'],
-                    obs['observation_date'],
-                    obs['observation_time'],
-                    obs['avg_temperature'],
-                    obs['max_temperature'],
-                    obs['min_temperature'],
-                    obs['avg_wind_speed'],
-                    obs['max_wind_speed'],
-                    obs['avg_visibility'],
-                    obs['precipitation'],
-                    obs['snow_depth'],
-                    obs['conditions'],
-                ))
-                loaded += 1
-
-    # Step 7: Log pipeline run
+    # Step 4: Insert into database. ON CONFLICT skips rows we already have,
+    # so there's no need to pull every existing key back first. The insert
+    # sends one array per column in a single statement, so its rowcount is
+    # exactly the number of new rows. The arrays are the frame's own columns
+    # (NaN -> None for NULL) — no row tuples are built along the way.
+    arrays = [
+        df[col].astype(object).where(df[col].notna(), None).tolist()
+        for col in WEATHER_COLUMNS
+    ] if not df.empty else []
+
+    # Observations and their pipeline_runs entry commit together
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO pipeline_runs (file_name, source, rows_processed, rows_loaded,
-                                           rows_rejected, status, started_at, completed_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (file_name, source) DO UPDATE SET
-                    rows_loaded = EXCLUDED.rows_loaded,
-                    status = EXCLUDED.status,
-                    completed_at = EXCLUDED.completed_at
-            """, ('iem_hourly_weather', 'weather', len(weather_data), loaded,
-                  0, 'completed', started_at, dt.now()))
+            loaded = unnest_insert_columns(
+                cur, 'weather_observations', WEATHER_COLUMNS, WEATHER_COLUMN_TYPES, arrays,
+                conflict_columns=['airport_code', 'observation_time'],
+            )
+            skipped = len(df) - loaded
+
+            # Step 5: Log pipeline run (one entry per airport)
+            log_pipeline_run(cur, f'iem_hourly_weather/{airport}', 'weather',
+                             len(df), loaded, 0, started_at)
 
     print(f"\n{'=' * 50}")
-    print(f"Weather loading complete!")
-    print(f"  Generated: {len(weather_data)}")
+    print(f"Weather loading complete for {airport}!")
+    print(f"  Fetched: {len(df)}")
     print(f"  Loaded: {loaded}")
     print(f"  Skipped (already exists): {skipped}")
     print(f"{'=' * 50}")
@@ -665,191 +796,215 @@ def load_weather(**kwargs):
     return {'loaded': loaded, 'skipped': skipped}
 
 
-def run_quality_checks(**kwargs):
+def refresh_views(**kwargs):
+    """
+    Refresh the pre-aggregated materialized views (e.g. mv_carrier_performance)
+    so API and agent reads reflect the data just loaded.
+    """
+    from db_helper import analyze_tables, refresh_materialized_views
+
+    # Fresh statistics first, so the view queries are planned against the
+    # data just loaded
+    analyze_tables(['flights', 'weather_observations'])
+    refreshed = refresh_materialized_views()
+    return {'refreshed': refreshed}
+
+
+# Post-load quality checks are split into independent tasks so the scheduler
+# runs them side by side after refresh_views; each gets its own connection.
+
+def check_core_tables(**kwargs):
     """
-    Post-load data quality checks.
-    Verifies data integrity after all tables are loaded.
+    Post-load data quality checks: dimension and fact tables are populated.
     """
     from db_helper import get_connection
 
     checks_passed = 0
     checks_failed = 0
 
+    # All three counts in one round-trip
     with get_connection() as conn:
         with conn.cursor() as cur:
-            # Check 1: Airports table not empty
-            cur.execute("SELECT COUNT(*) FROM airports")
-            count = cur.fetchone()[0]
-            if count > 0:
-                print(f"✓ Airports: {count} rows")
-                checks_passed += 1
-            else:
-                print(f"✗ Airports: EMPTY")
-                checks_failed += 1
-
-            # Check 2: Carriers table not empty
-            cur.execute("SELECT COUNT(*) FROM carriers")
-            count = cur.fetchone()[0]
-            if count > 0:
-                print(f"✓ Carriers: {count} rows")
-                checks_passed += 1
-            else:
-                print(f"✗ Carriers: EMPTY")
-                checks_failed += 1
-
-            # Check 3: Flights loaded
-            cur.execute("SELECT COUNT(*) FROM flights")
-            count = cur.fetchone()[0]
-            if count > 0:
-                print(f"✓ Flights: {count} rows")
-                checks_passed += 1
-            else:
-                print(f"✗ Flights: EMPTY")
-                checks_failed += 1
-
-            # Check 4: No orphan flights (FK integrity)
-            cur.execute("""
-                SELECT COUNT(*) FROM flights f
-                LEFT JOIN airports a ON f.origin_airport = a.airport_code
-                WHERE a.airport_code IS NULL
-            """)
-            orphans = cur.fetchone()[0]
-            if orphans == 0:
-                print(f"✓ No orphan origin airports")
-                checks_passed += 1
-            else:
-                print(f"✗ {orphans} flights with unknown origin airports")
-                checks_failed += 1
-
-            # Check 5: No orphan destination airports
-            cur.execute("""
-                SELECT COUNT(*) FROM flights f
-                LEFT JOIN airports a ON f.dest_airport = a.airport_code
-                WHERE a.airport_code IS NULL
-            """)
-            orphans = cur.fetchone()[0]
-            if orphans == 0:
-                print(f"✓ No orphan destination airports")
-                checks_passed += 1
-            else:
-                print(f"✗ {orphans} flights with unknown dest airports")
-                checks_failed += 1
-
-            # Check 6: Delay values in reasonable range
             cur.execute("""
-                SELECT COUNT(*) FROM flights
-                WHERE arr_delay IS NOT NULL AND (arr_delay < -150 OR arr_delay > 5000)
-            """)
-            bad_delays = cur.fetchone()[0]
-            if bad_delays == 0:
-                print(f"✓ All delay values in valid range")
-                checks_passed += 1
-            else:
-                print(f"✗ {bad_delays} flights with out-of-range delays")
-                checks_failed += 1
-
-            # Check 7: Rejection rate
-            cur.execute("""
-                SELECT rows_loaded, rows_rejected FROM pipeline_runs
-                WHERE source = 'flights'
-                ORDER BY completed_at DESC LIMIT 1
-            """)
-            result = cur.fetchone()
-            if result:
-                loaded, rejected = result
-                if loaded > 0:
-                    reject_rate = rejected / (loaded + rejected) * 100
-                    if reject_rate < 5:
-                        print(f"✓ Rejection rate: {reject_rate:.2f}% ({rejected}/{loaded + rejected})")
-                        checks_passed += 1
-                    else:
-                        print(f"✗ High rejection rate: {reject_rate:.2f}%")
-                        checks_failed += 1
-
-            # Check 8: Weather data loaded (Phase 2)
-            cur.execute("SELECT COUNT(*) FROM weather_observations")
-            count = cur.fetchone()[0]
-            if count > 0:
-                print(f"✓ Weather observations: {count} rows")
-                checks_passed += 1
-            else:
-                print(f"✗ Weather observations: EMPTY")
-                checks_failed += 1
-
-            # Check 9: Weather covers our airports
-            cur.execute("""
-                SELECT COUNT(DISTINCT w.airport_code)
-                FROM weather_observations w
-                JOIN airports a ON w.airport_code = a.airport_code
-            """)
-            airports_with_weather = cur.fetchone()[0]
-            if airports_with_weather > 0:
-                print(f"✓ Airports with weather data: {airports_with_weather}")
-                checks_passed += 1
-            else:
-                print(f"✗ No airports have weather data")
-                checks_failed += 1
-
-            # Check 10: Weather covers our flight dates
-            cur.execute("""
-                SELECT COUNT(DISTINCT w.observation_date)
-                FROM weather_observations w
-                JOIN date_dim d ON w.observation_date = d.date_id
+                SELECT
+                    (SELECT COUNT(*) FROM airports),
+                    (SELECT COUNT(*) FROM carriers),
+                    (SELECT COUNT(*) FROM flights)
             """)
-            dates_with_weather = cur.fetchone()[0]
-            if dates_with_weather > 0:
-                print(f"✓ Dates with weather data: {dates_with_weather}")
-                checks_passed += 1
-            else:
-                print(f"✗ No dates have weather data")
-                checks_failed += 1
-
-            # Summary stats
-            print(f"\n{'=' * 50}")
-            print(f"Quality checks: {checks_passed} passed, {checks_failed} failed")
-
-            # Bonus: print some summary stats
+            counts = cur.fetchone()
+
+    for label, count in zip(('Airports', 'Carriers', 'Flights'), counts):
+        if count > 0:
+            print(f"✓ {label}: {count} rows")
+            checks_passed += 1
+        else:
+            print(f"✗ {label}: EMPTY")
+            checks_failed += 1
+
+    print(f"Core table checks: {checks_passed} passed, {checks_failed} failed")
+    if checks_failed > 0:
+        raise Exception(f"{checks_failed} core table quality checks failed!")
+
+    return {'passed': checks_passed, 'failed': checks_failed}
+
+
+def check_flight_integrity(**kwargs):
+    """
+    Post-load data quality checks: flights reference known airports, delays are
+    in range and the latest file's rejection rate is low. Also prints a
+    dataset summary.
+    """
+    from db_helper import get_connection
+
+    checks_passed = 0
+    checks_failed = 0
+
+    # Every check and the summary come from one scan of flights (plus the
+    # latest flights run), fetched in a single round-trip
+    with get_connection() as conn:
+        with conn.cursor() as cur:
             cur.execute("""
-                SELECT
-                    COUNT(*) as total_flights,
-                    COUNT(DISTINCT carrier_code) as carriers,
-                    COUNT(DISTINCT origin_airport) as origins,
-                    COUNT(DISTINCT dest_airport) as dests,
-                    AVG(arr_delay) as avg_delay,
-                    SUM(CASE WHEN cancelled THEN 1 ELSE 0 END) as cancellations
-                FROM flights
+                WITH f AS (
+                    SELECT
+                        COUNT(*) FILTER (WHERE o.airport_code IS NULL) AS orphan_origins,
+                        COUNT(*) FILTER (WHERE d.airport_code IS NULL) AS orphan_dests,
+                        COUNT(*) FILTER (WHERE fl.arr_delay < -150 OR fl.arr_delay > 5000) AS bad_delays,
+                        COUNT(*) AS total_flights,
+                        COUNT(DISTINCT fl.carrier_code) AS carriers,
+                        COUNT(DISTINCT fl.origin_airport) AS origins,
+                        COUNT(DISTINCT fl.dest_airport) AS dests,
+                        AVG(fl.arr_delay) AS avg_delay,
+                        COUNT(*) FILTER (WHERE fl.cancelled) AS cancellations
+                    FROM flights fl
+                    LEFT JOIN airports o ON fl.origin_airport = o.airport_code
+                    LEFT JOIN airports d ON fl.dest_airport = d.airport_code
+                ),
+                last_run AS (
+                    SELECT rows_loaded, rows_rejected FROM pipeline_runs
+                    WHERE source = 'flights'
+                    ORDER BY completed_at DESC LIMIT 1
+                )
+                SELECT f.*, r.rows_loaded, r.rows_rejected
+                FROM f LEFT JOIN last_run r ON TRUE
             """)
-            stats = cur.fetchone()
-            if stats:
-                print(f"\nDataset Summary:")
-                print(f"  Flights: {stats[0]:,}")
-                print(f"  Carriers: {stats[1]}")
-                print(f"  Origin airports: {stats[2]}")
-                print(f"  Dest airports: {stats[3]}")
-                print(f"  Avg arrival delay: {stats[4]:.1f} min" if stats[4] else "  Avg arrival delay: N/A")
-                print(f"  Cancellations: {stats[5]:,}")
-
-            # Weather summary
+            (orphan_origins, orphan_dests, bad_delays, *stats,
+             loaded, rejected) = cur.fetchone()
+
+    # Check 1: No orphan flights (FK integrity)
+    if orphan_origins == 0:
+        print(f"✓ No orphan origin airports")
+        checks_passed += 1
+    else:
+        print(f"✗ {orphan_origins} flights with unknown origin airports")
+        checks_failed += 1
+
+    # Check 2: No orphan destination airports
+    if orphan_dests == 0:
+        print(f"✓ No orphan destination airports")
+        checks_passed += 1
+    else:
+        print(f"✗ {orphan_dests} flights with unknown dest airports")
+        checks_failed += 1
+
+    # Check 3: Delay values in reasonable range
+    if bad_delays == 0:
+        print(f"✓ All delay values in valid range")
+        checks_passed += 1
+    else:
+        print(f"✗ {bad_delays} flights with out-of-range delays")
+        checks_failed += 1
+
+    # Check 4: Rejection rate of the latest flights file
+    if loaded:
+        reject_rate = rejected / (loaded + rejected) * 100
+        if reject_rate < 5:
+            print(f"✓ Rejection rate: {reject_rate:.2f}% ({rejected}/{loaded + rejected})")
+            checks_passed += 1
+        else:
+            print(f"✗ High rejection rate: {reject_rate:.2f}%")
+            checks_failed += 1
+
+    # Dataset summary
+    print(f"\nDataset Summary:")
+    print(f"  Flights: {stats[0]:,}")
+    print(f"  Carriers: {stats[1]}")
+    print(f"  Origin airports: {stats[2]}")
+    print(f"  Dest airports: {stats[3]}")
+    print(f"  Avg arrival delay: {stats[4]:.1f} min" if stats[4] else "  Avg arrival delay: N/A")
+    print(f"  Cancellations: {stats[5]:,}")
+
+    print(f"Flight integrity checks: {checks_passed} passed, {checks_failed} failed")
+    if checks_failed > 0:
+        raise Exception(f"{checks_failed} flight integrity quality checks failed!")
+
+    return {'passed': checks_passed, 'failed': checks_failed}
+
+
+def check_weather_coverage(**kwargs):
+    """
+    Post-load data quality checks: weather observations are loaded and cover
+    our airports and flight dates (Phase 2). Also prints a weather summary.
+    """
+    from db_helper import get_connection
+
+    checks_passed = 0
+    checks_failed = 0
+
+    # Every check and the summary come from one scan of weather_observations
+    with get_connection() as conn:
+        with conn.cursor() as cur:
             cur.execute("""
                 SELECT
-                    COUNT(*) as total_obs,
-                    COUNT(DISTINCT airport_code) as airports,
-                    AVG(avg_temperature) as avg_temp,
-                    SUM(CASE WHEN precipitation > 0 THEN 1 ELSE 0 END) as precip_days,
-                    SUM(CASE WHEN snow_depth > 0 THEN 1 ELSE 0 END) as snow_days
-                FROM weather_observations
+                    COUNT(*) AS total_obs,
+                    COUNT(DISTINCT a.airport_code) AS airports_with_weather,
+                    COUNT(DISTINCT d.date_id) AS dates_with_weather,
+                    COUNT(DISTINCT w.airport_code) AS airports,
+                    AVG(w.avg_temperature) AS avg_temp,
+                    COUNT(*) FILTER (WHERE w.precipitation > 0) AS precip_days,
+                    COUNT(*) FILTER (WHERE w.snow_depth > 0) AS snow_days
+                FROM weather_observations w
+                LEFT JOIN airports a ON w.airport_code = a.airport_code
+                LEFT JOIN date_dim d ON w.observation_date = d.date_id
             """)
-            weather_stats = cur.fetchone()
-            if weather_stats and weather_stats[0] > 0:
-                print(f"\nWeather Summary:")
-                print(f"  Observations: {weather_stats[0]:,}")
-                print(f"  Airports covered: {weather_stats[1]}")
-                print(f"  Avg temperature: {weather_stats[2]:.1f}°F" if weather_stats[2] else "  Avg temperature: N/A")
-                print(f"  Days with precipitation: {weather_stats[3]:,}")
-                print(f"  Days with snow: {weather_stats[4]:,}")
-
+            (count, airports_with_weather, dates_with_weather,
+             *weather_stats) = cur.fetchone()
+
+    # Check 1: Weather data loaded (Phase 2)
+    if count > 0:
+        print(f"✓ Weather observations: {count} rows")
+        checks_passed += 1
+    else:
+        print(f"✗ Weather observations: EMPTY")
+        checks_failed += 1
+
+    # Check 2: Weather covers our airports
+    if airports_with_weather > 0:
+        print(f"✓ Airports with weather data: {airports_with_weather}")
+        checks_passed += 1
+    else:
+        print(f"✗ No airports have weather data")
+        checks_failed += 1
+
+    # Check 3: Weather covers our flight dates
+    if dates_with_weather > 0:
+        print(f"✓ Dates with weather data: {dates_with_weather}")
+        checks_passed += 1
+    else:
+        print(f"✗ No dates have weather data")
+        checks_failed += 1
+
+    # Weather summary
+    if count > 0:
+        print(f"\nWeather Summary:")
+        print(f"  Observations: {count:,}")
+        print(f"  Airports covered: {weather_stats[0]}")
+        print(f"  Avg temperature: {weather_stats[1]:.1f}°F" if weather_stats[1] else "  Avg temperature: N/A")
+        print(f"  Days with precipitation: {weather_stats[2]:,}")
+        print(f"  Days with snow: {weather_stats[3]:,}")
+
+    print(f"Weather coverage checks: {checks_passed} passed, {checks_failed} failed")
     if checks_failed > 0:
-        raise Exception(f"{checks_failed} quality checks failed!")
+        raise Exception(f"{checks_failed} weather coverage quality checks failed!")
 
     return {'passed': checks_passed, 'failed': checks_failed}
 
@@ -890,23 +1045,72 @@ with DAG(
         python_callable=generate_date_dim,
     )
 
-    # Stage 4: Load flights (depends on ALL dimensions being ready)
-    flights_task = PythonOperator(
+    # Stage 4: Load flights (depends on ALL dimensions being ready).
+    # One mapped task instance per new file; db_pool caps how many hit
+    # Postgres at once.
+    list_files_task = PythonOperator(
+        task_id='list_new_flight_files',
+        python_callable=list_new_flight_files,
+    )
+
+    drop_indexes_task = PythonOperator(
+        task_id='drop_flight_indexes',
+        python_callable=drop_flight_indexes,
+    )
+
+    flights_task = PythonOperator.partial(
         task_id='load_flights',
         python_callable=load_flights,
+        pool='db_pool',
+    ).expand(op_kwargs=list_files_task.output)
+
+    rebuild_indexes_task = PythonOperator(
+        task_id='rebuild_flight_indexes',
+        python_callable=rebuild_flight_indexes,
+        # Indexes come back even if a file failed to load
+        trigger_rule='all_done',
+    )
+
+    # Stage 5: Load weather data (Phase 2 — depends on airports + dates).
+    # One mapped task instance per airport; weather_pool caps concurrent
+    # IEM downloads.
+    weather_airports_task = PythonOperator(
+        task_id='list_weather_airports',
+        python_callable=list_weather_airports,
+        # With no new flight files load_flights maps to zero tasks and is
+        # skipped; weather should still load in that case
+        trigger_rule='none_failed',
     )
 
-    # Stage 5: Load weather data (Phase 2 — depends on airports + dates)
-    weather_task = PythonOperator(
+    weather_task = PythonOperator.partial(
         task_id='load_weather',
         python_callable=load_weather,
+        pool='weather_pool',
+    ).expand(op_kwargs=weather_airports_task.output)
+
+    # Stage 6: Refresh materialized views (after all fact data is in)
+    refresh_task = PythonOperator(
+        task_id='refresh_views',
+        python_callable=refresh_views,
+        # load_weather is skipped if no airport has a station mapping
+        trigger_rule='none_failed',
     )
 
-    # Stage 6: Quality checks
-    quality_task = PythonOperator(
-        task_id='quality_checks',
-        python_callable=run_quality_checks,
-    )
+    # Stage 7: Quality checks (independent — run in parallel)
+    quality_tasks = [
+        PythonOperator(
+            task_id='check_core_tables',
+            python_callable=check_core_tables,
+        ),
+        PythonOperator(
+            task_id='check_flight_integrity',
+            python_callable=check_flight_integrity,
+        ),
+        PythonOperator(
+            task_id='check_weather_coverage',
+            python_callable=check_weather_coverage,
+        ),
+    ]
 
     # =============================================
     # TASK DEPENDENCIES (the DAG graph)
@@ -919,14 +1123,30 @@ with DAG(
     # extract_   generate_
     # carriers   date_dim
     #       \    /
-    #    load_flights
+    # list_new_flight_files
+    #         |
+    # drop_flight_indexes   <-- initial load only
+    #         |
+    #    load_flights   <-- mapped: one task per new CSV
+    #         |
+    # rebuild_flight_indexes
+    #         |
+    # list_weather_airports
     #         |
-    #    load_weather   <-- Phase 2: Weather data
+    #    load_weather   <-- Phase 2: Weather data, mapped: one task per airport
     #         |
-    #   quality_checks
+    #   refresh_views
+    #     /   |   \
+    # check_core_tables, check_flight_integrity, check_weather_coverage
 
     upload_task >> airports_task
     airports_task >> [carriers_task, dates_task]
-    [carriers_task, dates_task] >> flights_task
-    flights_task >> weather_task
-    weather_task >> quality_task
+    [carriers_task, dates_task] >> list_files_task
+    list_files_task >> drop_indexes_task >> flights_task
+    flights_task >> rebuild_indexes_task >> weather_airports_task
+    # Direct edge too, so a failed file load still blocks the weather stage
+    # (rebuild_flight_indexes succeeds either way)
+    flights_task >> weather_airports_task
+    weather_airports_task >> weather_task
+    weather_task >> refresh_task
+    refresh_task >> quality_tasks
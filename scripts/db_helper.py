@@ -3,11 +3,42 @@ Database connection helper.
 All tasks import this instead of building their own connection strings.
 Uses environment variables set in docker-compose.yml.
 """
+import csv
+import io
 import os
-import psycopg2
+import struct
+import threading
+from datetime import date
 from psycopg2.extras import execute_values, execute_batch
+from psycopg2.pool import ThreadedConnectionPool
 from contextlib import contextmanager
 
+# Connections kept open per task process. Tasks call get_connection once per
+# chunk/batch, so reusing connections skips a TCP + auth handshake each time.
+POOL_MAX_CONN = int(os.environ.get('FLIGHTS_DB_POOL_MAX', 10))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# bulk_insert switches from multi-row INSERT to COPY at this many rows
+COPY_MIN_ROWS = 1000
+
+# Binary COPY framing: file header, per-row field count, NULL field, trailer
+_COPY_BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+_COPY_FIELD_COUNT = struct.Struct('>h')
+_COPY_NULL = struct.pack('>i', -1)
+_COPY_TRAILER = struct.pack('>h', -1)
+_COPY_LEN = struct.Struct('>i')
+# Fixed-width types: (payload size, length-prefixed encoder)
+_COPY_FIXED = {
+    'int4': (4, struct.Struct('>ii')),
+    'float8': (8, struct.Struct('>id')),
+    'bool': (1, struct.Struct('>i?')),
+    'date': (4, struct.Struct('>ii')),
+}
+# Postgres stores dates as days since 2000-01-01
+_PG_EPOCH_ORDINAL = date(2000, 1, 1).toordinal()
+
 
 def get_db_config():
     """Read DB config from environment variables."""
@@ -20,6 +51,16 @@ def get_db_config():
     }
 
 
+def _get_pool():
+    """Lazily create the process-wide connection pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(1, POOL_MAX_CONN, **get_db_config())
+    return _pool
+
+
 @contextmanager
 def get_connection():
     """
@@ -28,28 +69,36 @@ def get_connection():
         with get_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("SELECT 1")
-    Auto-commits on success, rolls back on error, always closes.
+    Auto-commits on success, rolls back on error, always returns the
+    connection to the pool (broken connections are closed instead).
     """
-    conn = psycopg2.connect(**get_db_config())
+    pool = _get_pool()
+    conn = pool.getconn()
     try:
         yield conn
         conn.commit()
     except Exception:
-        conn.rollback()
+        if not conn.closed:
+            conn.rollback()
         raise
     finally:
-        conn.close()
+        if not conn.closed:
+            # Callers may switch to autocommit (e.g. for REFRESH CONCURRENTLY)
+            conn.autocommit = False
+        pool.putconn(conn, close=bool(conn.closed))
 
 
 def bulk_insert(table, columns, rows, conflict_column=None, conflict_action='DO NOTHING'):
     """
-    Bulk insert using execute_values (fast batch insert).
+    Bulk insert using execute_values (fast batch insert), or COPY for
+    batches of COPY_MIN_ROWS or more.
     
     Args:
         table: Target table name
         columns: List of column names
         rows: List of tuples (data rows)
-        conflict_column: Column for ON CONFLICT (enables upsert/idempotency)
+        conflict_column: Column for ON CONFLICT (enables upsert/idempotency);
+            several columns may be given comma-separated
         conflict_action: What to do on conflict (default: skip duplicates)
     
     Returns:
@@ -58,6 +107,17 @@ def bulk_insert(table, columns, rows, conflict_column=None, conflict_action='DO
     if not rows:
         return 0
     
+    # COPY skips per-row parsing; duplicates can only be skipped (via the
+    # staging table), so other conflict actions stay on INSERT
+    if len(rows) >= COPY_MIN_ROWS and (not conflict_column or conflict_action == 'DO NOTHING'):
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                if not conflict_column:
+                    copy_rows(cur, table, columns, rows)
+                    return len(rows)
+                conflict_columns = [c.strip() for c in conflict_column.split(',')]
+                return copy_insert(cur, table, columns, rows, conflict_columns)
+
     cols = ', '.join(columns)
     
     if conflict_column:
@@ -74,55 +134,399 @@ def bulk_insert(table, columns, rows, conflict_column=None, conflict_action='DO
             execute_values(cur, query, rows, page_size=5000)
             return cur.rowcount
 
-def ensure_dates_exist(dates):
+
+def unnest_insert(cur, table, columns, types, rows, conflict_columns=None):
+    """
+    Insert rows with one INSERT ... SELECT FROM unnest(col1[], col2[], ...).
+
+    The rows are sent as one array per column, so the statement is parsed
+    and planned once however many rows it carries (a multi-row VALUES list
+    is analyzed value group by value group). The middle ground between
+    execute_values for small batches and COPY for bulk loads — and unlike
+    COPY it can skip duplicates without a staging table.
+
+    Args:
+        cur: Open cursor (the caller owns the transaction)
+        table: Target table name
+        columns: List of column names (same order as each row tuple)
+        types: Postgres type of each column (e.g. 'text', 'date', 'float8')
+        rows: List of tuples; None is loaded as NULL
+        conflict_columns: Columns of a UNIQUE constraint to skip duplicates on
+
+    Returns:
+        Number of rows inserted (duplicates excluded)
+    """
+    if not rows:
+        return 0
+    return unnest_insert_columns(
+        cur, table, columns, types, [list(col) for col in zip(*rows)], conflict_columns,
+    )
+
+
+def unnest_insert_columns(cur, table, columns, types, arrays, conflict_columns=None):
+    """
+    unnest_insert for data that is already column-shaped (e.g. DataFrame
+    columns): takes one list per column instead of row tuples, so nothing
+    is turned into rows only to be transposed back into arrays.
+
+    Args:
+        cur: Open cursor (the caller owns the transaction)
+        table: Target table name
+        columns: List of column names (same order as arrays)
+        types: Postgres type of each column (e.g. 'text', 'date', 'float8')
+        arrays: One equal-length list per column; None is loaded as NULL
+        conflict_columns: Columns of a UNIQUE constraint to skip duplicates on
+
+    Returns:
+        Number of rows inserted (duplicates excluded)
+    """
+    if not arrays or not len(arrays[0]):
+        return 0
+    unnest = ', '.join(f"%s::{t}[]" for t in types)
+    query = f"INSERT INTO {table} ({', '.join(columns)}) SELECT * FROM unnest({unnest})"
+    if conflict_columns:
+        query += f" ON CONFLICT ({', '.join(conflict_columns)}) DO NOTHING"
+    cur.execute(query, arrays)
+    return cur.rowcount
+
+
+def copy_rows(cur, table, columns, rows):
+    """
+    Append rows to a table with COPY FROM STDIN (CSV). For tables with no
+    conflicts to skip (audit/log tables); use copy_insert otherwise.
+
+    Args:
+        cur: Open cursor (the caller owns the transaction)
+        table: Target table name
+        columns: List of column names (same order as each row tuple)
+        rows: List of tuples; None is loaded as NULL
+    """
+    if not rows:
+        return
+    # CSV format: None is written as an unquoted empty field, which COPY reads as NULL
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def _encode_binary_column(values, pg_type):
+    """Binary COPY fields (length prefix + payload) for one column's values."""
+    if pg_type == 'text':
+        encoded = []
+        for v in values:
+            if v is None:
+                encoded.append(_COPY_NULL)
+            else:
+                raw = v.encode()
+                encoded.append(_COPY_LEN.pack(len(raw)) + raw)
+        return encoded
+    if pg_type == 'date':
+        values = [
+            None if v is None
+            else (date.fromisoformat(v) if isinstance(v, str) else v).toordinal() - _PG_EPOCH_ORDINAL
+            for v in values
+        ]
+    size, field = _COPY_FIXED[pg_type]
+    return [_COPY_NULL if v is None else field.pack(size, v) for v in values]
+
+
+def copy_rows_binary(cur, table, columns, rows, types):
+    """
+    Append rows with COPY FROM STDIN in Postgres' binary format. Numbers go
+    over the wire as fixed-width big-endian values, so the server skips
+    parsing text for every float/int/date field that CSV COPY would send.
+
+    Args:
+        cur: Open cursor (the caller owns the transaction)
+        table: Target table name
+        columns: List of column names (same order as each row tuple)
+        rows: List of tuples; None is loaded as NULL
+        types: Wire type per column: 'text' (also for varchar), 'int4',
+            'float8', 'bool' or 'date' (date objects or 'YYYY-MM-DD')
+    """
+    if not rows:
+        return
+    # Encode column by column, then stitch each row's fields together
+    encoded = [_encode_binary_column(col, t) for col, t in zip(zip(*rows), types)]
+    field_count = _COPY_FIELD_COUNT.pack(len(columns))
+    buf = io.BytesIO()
+    buf.write(_COPY_BINARY_HEADER)
+    buf.writelines(field_count + b''.join(fields) for fields in zip(*encoded))
+    buf.write(_COPY_TRAILER)
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT binary)", buf)
+
+
+def copy_to_stage(cur, table, columns, rows, types=None):
+    """
+    Stream rows into {table}_stage with COPY.
+
+    The stage is a temp table: unlogged (no WAL), no indexes or constraints,
+    and dropped at commit. Call repeatedly to accumulate rows, then
+    merge_stage once to move them all into the target.
+
+    Args:
+        cur: Open cursor (the caller owns the transaction)
+        table: Target table name (the stage copies its column types)
+        columns: List of column names (same order as each row tuple)
+        rows: List of tuples; None is loaded as NULL
+        types: Optional wire types per column; when given, rows are sent
+            with binary COPY (see copy_rows_binary) instead of CSV
+    """
+    if not rows:
+        return
+
+    cols = ', '.join(columns)
+    stage = f"{table}_stage"
+
+    # Same column types as the target, no constraints; dropped at commit
+    cur.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {stage} ON COMMIT DROP
+        AS SELECT {cols} FROM {table} WITH NO DATA
+    """)
+
+    if types:
+        copy_rows_binary(cur, stage, columns, rows, types)
+    else:
+        copy_rows(cur, stage, columns, rows)
+
+
+def merge_stage(cur, table, columns, conflict_columns):
+    """
+    Move everything staged by copy_to_stage into the target with one
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING, then empty the stage.
+
+    Rows go in sorted by the conflict key, so the UNIQUE index is filled in
+    key order (sequential page writes) instead of random order.
+
+    Returns:
+        Number of rows inserted (duplicates excluded)
+    """
+    cols = ', '.join(columns)
+    conflict = ', '.join(conflict_columns)
+    stage = f"{table}_stage"
+
+    cur.execute("SELECT to_regclass(%s)", (f"pg_temp.{stage}",))
+    if cur.fetchone()[0] is None:
+        return 0
+
+    cur.execute(f"""
+        INSERT INTO {table} ({cols})
+        SELECT {cols} FROM {stage}
+        ORDER BY {conflict}
+        ON CONFLICT ({conflict}) DO NOTHING
+    """)
+    inserted = cur.rowcount
+    cur.execute(f"TRUNCATE {stage}")
+    return inserted
+
+
+def copy_insert(cur, table, columns, rows, conflict_columns):
+    """
+    Bulk load rows with COPY, keeping INSERT ON CONFLICT idempotency.
+
+    COPY can't skip duplicates, so rows are streamed into a temp staging
+    table first and then moved with one INSERT ... SELECT ... ON CONFLICT
+    DO NOTHING. Far faster than multi-row INSERTs: no per-row SQL parsing.
+
+    Args:
+        cur: Open cursor (the caller owns the transaction)
+        table: Target table name
+        columns: List of column names (same order as each row tuple)
+        rows: List of tuples; None is loaded as NULL
+        conflict_columns: Columns of the target's UNIQUE constraint
+
+    Returns:
+        Number of rows inserted (duplicates excluded)
+    """
+    if not rows:
+        return 0
+    copy_to_stage(cur, table, columns, rows)
+    return merge_stage(cur, table, columns, conflict_columns)
+
+
+def log_pipeline_run(cur, file_name, source, rows_processed, rows_loaded,
+                     rows_rejected, started_at):
+    """
+    Record a completed load in pipeline_runs (upserts on file_name, source).
+
+    Takes the loader's own cursor, so the run is logged in the same
+    transaction as the rows it describes — no extra connection, and a run
+    is never marked completed unless its data committed too.
+    """
+    from datetime import datetime
+
+    cur.execute("""
+        INSERT INTO pipeline_runs (file_name, source, rows_processed, rows_loaded,
+                                   rows_rejected, status, started_at, completed_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (file_name, source) DO UPDATE SET
+            rows_loaded = EXCLUDED.rows_loaded,
+            rows_rejected = EXCLUDED.rows_rejected,
+            status = EXCLUDED.status,
+            completed_at = EXCLUDED.completed_at
+    """, (file_name, source, rows_processed, rows_loaded, rows_rejected,
+          'completed', started_at, datetime.now()))
+
+
+# Materialized views defined in init_db.sql, refreshed after every load
+MATERIALIZED_VIEWS = ['mv_carrier_performance', 'airport_flight_counts']
+
+
+def refresh_materialized_views(views=None):
+    """
+    Refresh materialized views so API reads see newly loaded data.
+
+    Uses REFRESH ... CONCURRENTLY (needs the view's UNIQUE index) so
+    API queries against the views aren't blocked while it runs.
+    """
+    views = views or MATERIALIZED_VIEWS
+    with get_connection() as conn:
+        # CONCURRENTLY can't run inside a transaction block
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for view in views:
+                cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+                print(f"Refreshed {view}")
+    return len(views)
+
+
+def drop_secondary_indexes(table):
+    """
+    Drop a table's non-unique indexes ahead of a bulk load; rebuild_indexes
+    puts them back afterwards.
+
+    Maintaining every B-tree row by row is often costlier than the inserts
+    themselves; building each index once over the loaded data is far
+    cheaper. UNIQUE and primary key indexes stay, since ON CONFLICT needs
+    them. Dropped CONCURRENTLY so in-flight API reads aren't blocked.
+
+    Definitions are saved to dropped_indexes (committed) before anything is
+    dropped, and a retry only adds indexes it still finds, so ones dropped
+    by an earlier attempt are never forgotten.
+
+    Returns:
+        Names of the table's indexes now awaiting a rebuild
+    """
+    with get_connection() as conn:
+        # Each statement commits on its own: the record before the drops, and
+        # DROP INDEX CONCURRENTLY can't run inside a transaction block anyway
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO dropped_indexes (index_name, table_name, index_def)
+                SELECT i.indexrelid::regclass::text, %s, pg_get_indexdef(i.indexrelid)
+                FROM pg_index i
+                WHERE i.indrelid = %s::regclass
+                  AND NOT i.indisunique AND NOT i.indisprimary
+                ON CONFLICT (index_name) DO NOTHING
+            """, (table, table))
+            cur.execute(
+                "SELECT index_name FROM dropped_indexes WHERE table_name = %s ORDER BY index_name",
+                (table,),
+            )
+            names = [row[0] for row in cur.fetchall()]
+            for name in names:
+                cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                print(f"Dropped {name}")
+    return names
+
+
+def rebuild_indexes(table):
+    """
+    Recreate every index of table recorded by drop_secondary_indexes,
+    clearing each record once its index exists again.
+
+    Built with plain CREATE INDEX: it blocks only writes (reads carry on),
+    the load that would write is already done, and unlike CONCURRENTLY a
+    failed build leaves nothing half-made behind. IF NOT EXISTS makes a
+    retried task skip the indexes already rebuilt.
+
+    Returns:
+        Number of indexes rebuilt
+    """
+    with get_connection() as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT index_name, index_def FROM dropped_indexes WHERE table_name = %s ORDER BY index_name",
+                (table,),
+            )
+            indexes = cur.fetchall()
+            for name, definition in indexes:
+                cur.execute(definition.replace('CREATE INDEX ', 'CREATE INDEX IF NOT EXISTS ', 1))
+                cur.execute("DELETE FROM dropped_indexes WHERE index_name = %s", (name,))
+                print(f"Rebuilt: {definition}")
+    return len(indexes)
+
+
+def analyze_tables(tables):
+    """
+    ANALYZE tables after a load so the planner sees the new row counts and
+    value distributions, rather than waiting for autovacuum to notice them.
+    """
+    with get_connection() as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for table in tables:
+                cur.execute(f"ANALYZE {table}")
+                print(f"Analyzed {table}")
+    return len(tables)
+
+
+def ensure_dates_exist(dates, cur=None):
       """
       Ensure all given dates exist in date_dim table.
       Takes a set of date strings ('YYYY-MM-DD') or date objects.
       Adds any missing dates. Skips dates that already exist.
+      Pass cur to insert on the caller's connection (the caller commits).
+      Returns the number of dates actually inserted.
 
       This is the SINGLE SOURCE OF TRUTH for date generation.
       Used by: generate_date_dim task, load_flights task, any future task.
       """
-      from datetime import datetime
-
-      def get_season(month):
-          if month in (12, 1, 2): return 'Winter'
-          if month in (3, 4, 5): return 'Spring'
-          if month in (6, 7, 8): return 'Summer'
-          return 'Fall'
-
+      # Only the dates go over the wire; Postgres derives every other
+      # date_dim column from them in one INSERT ... SELECT over unnest
       insert_query = """
           INSERT INTO date_dim (date_id, year, quarter, month, day_of_month,
                                 day_of_week, day_name, month_name, is_weekend, season)
-          VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+          SELECT
+              d,
+              EXTRACT(year FROM d)::int,
+              EXTRACT(quarter FROM d)::int,
+              EXTRACT(month FROM d)::int,
+              EXTRACT(day FROM d)::int,
+              EXTRACT(isodow FROM d)::int - 1,   -- Monday = 0, as date.weekday()
+              to_char(d, 'FMDay'),
+              to_char(d, 'FMMonth'),
+              EXTRACT(isodow FROM d) >= 6,
+              CASE
+                  WHEN EXTRACT(month FROM d) IN (12, 1, 2) THEN 'Winter'
+                  WHEN EXTRACT(month FROM d) IN (3, 4, 5) THEN 'Spring'
+                  WHEN EXTRACT(month FROM d) IN (6, 7, 8) THEN 'Summer'
+                  ELSE 'Fall'
+              END
+          FROM unnest(%s::date[]) AS d
           ON CONFLICT (date_id) DO NOTHING
       """
 
-      added = 0
-      with get_connection() as conn:
-          with conn.cursor() as cur:
-              for date_val in dates:
-                  # Handle both string and date objects
-                  if isinstance(date_val, str):
-                      d = datetime.strptime(date_val, '%Y-%m-%d')
-                  else:
-                      d = date_val
-
-                  cur.execute(insert_query, (
-                      d.date() if hasattr(d, 'date') else d,
-                      d.year,
-                      (d.month - 1) // 3 + 1,
-                      d.month,
-                      d.day,
-                      d.weekday(),
-                      d.strftime('%A'),
-                      d.strftime('%B'),
-                      d.weekday() >= 5,
-                      get_season(d.month),
-                  ))
-                  added += 1
-
-      print(f"ensure_dates_exist: processed {added} dates")
+      # Handle both string and date objects
+      date_ids = [
+          date.fromisoformat(d) if isinstance(d, str) else (d.date() if hasattr(d, 'date') else d)
+          for d in dates
+      ]
+
+      if cur is not None:
+          cur.execute(insert_query, (date_ids,))
+          added = cur.rowcount
+      else:
+          with get_connection() as conn:
+              with conn.cursor() as cur:
+                  cur.execute(insert_query, (date_ids,))
+                  added = cur.rowcount
+
+      print(f"ensure_dates_exist: added {added} of {len(date_ids)} dates")
       return added
 
 
@@ -167,4 +571,37 @@ def safe_bool(val):
     try:
         return bool(int(float(val)))
     except (ValueError, TypeError):
-        return False
\ No newline at end of file
+        return False
+
+
+# Column-wise versions of the helpers above: same results, but one vectorized
+# pass over a whole pandas Series instead of a Python call per value.
+# Each returns a plain list of native Python values (None for missing).
+
+def safe_str_column(series):
+    """safe_str over a Series."""
+    keep = series.notna() & (series != '')
+    return series.astype(str).str.strip().where(keep, None).tolist()
+
+
+def safe_float_column(series):
+    """safe_float over a Series."""
+    import pandas as pd
+    num = pd.to_numeric(series, errors='coerce')
+    return num.astype(object).where(num.notna(), None).tolist()
+
+
+def safe_int_column(series):
+    """safe_int over a Series."""
+    import pandas as pd
+    import numpy as np
+    # Truncate like int(float(v)); nullable Int64 keeps missing values as NA
+    num = np.trunc(pd.to_numeric(series, errors='coerce')).astype('Int64')
+    return num.astype(object).where(num.notna(), None).tolist()
+
+
+def safe_bool_column(series):
+    """safe_bool over a Series (missing/unparseable -> False)."""
+    import pandas as pd
+    num = pd.to_numeric(series, errors='coerce').fillna(0)
+    return (num.abs() >= 1).tolist()  # same as int(float(v)) != 0
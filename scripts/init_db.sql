@@ -146,6 +146,43 @@ CREATE INDEX IF NOT EXISTS idx_flights_carrier_date ON flights(carrier_code, fli
 -- Weather joins
 CREATE INDEX IF NOT EXISTS idx_weather_airport_date ON weather_observations(airport_code, observation_date);
 
+-- Hourly weather join (WEATHER_JOIN in api/agent/tools.py): flights match
+-- weather_hourly on (airport, date, hour). weather_hourly and flights.dep_hour
+-- are not created anywhere in this repo; they are maintained outside it, so
+-- their join indexes ship as a manual migration in
+-- scripts/weather_join_indexes.sql, run once those objects exist.
+
+-- =============================================
+-- MATERIALIZED VIEWS (pre-aggregated API reads)
+-- =============================================
+-- Refreshed by the DAG's refresh_views task after each load.
+-- Each has a UNIQUE index so it can be refreshed CONCURRENTLY
+-- (readers keep seeing the old rows while the refresh runs).
+
+-- Carrier rankings: full-table GROUP BY behind the agent's most common tool
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_carrier_performance AS
+SELECT
+    f.carrier_code,
+    c.carrier_name,
+    COUNT(*) as total_flights,
+    ROUND(AVG(arr_delay)::numeric, 1) as avg_delay,
+    ROUND(100.0 * COUNT(*) FILTER (WHERE cancelled) / COUNT(*), 2) as cancel_rate,
+    ROUND(100.0 * COUNT(*) FILTER (WHERE arr_delay <= 0 AND NOT cancelled) / COUNT(*), 1) as on_time_pct
+FROM flights f
+JOIN carriers c ON f.carrier_code = c.carrier_code
+GROUP BY f.carrier_code, c.carrier_name;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_carrier_performance ON mv_carrier_performance(carrier_code);
+
+-- Departures per airport: backs the agent's "list airports" tool, which
+-- otherwise groups every flight just to rank ~15 airports
+CREATE MATERIALIZED VIEW IF NOT EXISTS airport_flight_counts AS
+SELECT origin_airport as airport_code, COUNT(*) as flight_count
+FROM flights
+GROUP BY origin_airport;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_airport_flight_counts ON airport_flight_counts(airport_code);
+
 -- =============================================
 -- PIPELINE METADATA
 -- =============================================
@@ -177,3 +214,13 @@ CREATE TABLE IF NOT EXISTS rejected_records (
     rejection_reason TEXT NOT NULL,
     rejected_at TIMESTAMP DEFAULT NOW()
 );
+
+-- Secondary indexes dropped around a bulk load (db_helper.drop_secondary_indexes).
+-- Each definition is recorded BEFORE its index is dropped and removed only
+-- once it has been rebuilt, so a failed or retried task never loses one
+CREATE TABLE IF NOT EXISTS dropped_indexes (
+    index_name TEXT PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    index_def TEXT NOT NULL,
+    dropped_at TIMESTAMP DEFAULT NOW()
+);
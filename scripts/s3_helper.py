@@ -4,40 +4,110 @@ Uses boto3 with MinIO locally. To deploy to AWS, change only MINIO_ENDPOINT to
 the AWS S3 endpoint — all other code stays the same.
 """
 import os
-import io
+from functools import lru_cache
+
 import boto3
+from boto3.s3.transfer import TransferConfig, TransferManager
 from botocore.client import Config
 
+# Files over 8 MB go up as multipart uploads in 16 MB parts. max_concurrency
+# bounds the parts in flight across every upload sharing the transfer manager
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=16,
+    use_threads=True,
+)
+
+# Buckets already checked/created by this process
+_ensured_buckets = set()
+
 
+@lru_cache(maxsize=1)
 def get_s3_client():
-    """Create S3 client pointing at MinIO."""
+    """
+    S3 client pointing at MinIO, created once per task process.
+    Building a boto3 client loads its service model (tens of ms), and helpers
+    call this on every upload/read. Clients are thread-safe, so one is shared.
+    """
     return boto3.client(
         's3',
         endpoint_url=os.environ['MINIO_ENDPOINT'],
         aws_access_key_id=os.environ['AWS_ACCESS_KEY_ID'],
         aws_secret_access_key=os.environ['AWS_SECRET_ACCESS_KEY'],
-        config=Config(signature_version='s3v4'),
+        # One pooled HTTP connection per concurrent upload part (botocore's
+        # default of 10 would make them queue)
+        config=Config(
+            signature_version='s3v4',
+            max_pool_connections=TRANSFER_CONFIG.max_concurrency,
+        ),
         region_name='us-east-1',
     )
 
 
+@lru_cache(maxsize=1)
+def _transfer_manager():
+    """
+    Transfer manager shared by every upload in this process.
+    s3.upload_file builds (and tears down) a new manager and thread pool on
+    each call; one long-lived manager keeps its workers, and lets uploads
+    submitted together share a single pool of part slots.
+    """
+    return TransferManager(get_s3_client(), TRANSFER_CONFIG)
+
+
 def ensure_bucket(bucket_name):
-    """Create bucket if it doesn't exist."""
+    """Create bucket if it doesn't exist (checked once per process)."""
+    if bucket_name in _ensured_buckets:
+        return
     s3 = get_s3_client()
     try:
         s3.head_bucket(Bucket=bucket_name)
     except Exception:
         s3.create_bucket(Bucket=bucket_name)
+    _ensured_buckets.add(bucket_name)
 
 
 def upload_file(bucket, key, filepath):
     """Upload a local file to S3/MinIO."""
-    s3 = get_s3_client()
     ensure_bucket(bucket)
-    s3.upload_file(filepath, bucket, key)
+    _transfer_manager().upload(filepath, bucket, key).result()
     print(f"Uploaded {filepath} -> s3://{bucket}/{key}")
 
 
+def upload_files(bucket, files):
+    """Upload many local files concurrently.
+
+    files is a list of (key, filepath) pairs. Every file is submitted to the
+    shared transfer manager up front, so parts from all files keep its
+    worker pool busy rather than one file going up at a time. Returns the
+    keys uploaded, and raises the first failure only after the other
+    uploads have finished.
+    """
+    ensure_bucket(bucket)
+    manager = _transfer_manager()
+    futures = [
+        (manager.upload(filepath, bucket, key), key, filepath)
+        for key, filepath in files
+    ]
+
+    uploaded = []
+    errors = []
+    for future, key, filepath in futures:
+        try:
+            future.result()
+        except Exception as e:
+            errors.append(e)
+            print(f"Failed to upload {filepath} -> s3://{bucket}/{key}: {e}")
+            continue
+        uploaded.append(key)
+        print(f"Uploaded {filepath} -> s3://{bucket}/{key}")
+
+    if errors:
+        raise errors[0]
+    return uploaded
+
+
 def download_file(bucket, key, filepath):
     """Download a file from S3/MinIO to local path."""
     s3 = get_s3_client()
@@ -45,19 +115,61 @@ def download_file(bucket, key, filepath):
     print(f"Downloaded s3://{bucket}/{key} -> {filepath}")
 
 
-def read_csv_from_s3(bucket, key):
-    """Read a CSV directly from S3 into a pandas DataFrame."""
-    import pandas as pd
+def read_csv_arrow_from_s3(bucket, key, columns=None, column_types=None,
+                           include_missing_columns=False, column_names=None):
+    """
+    Read a CSV from S3 into a pandas DataFrame using pyarrow's multi-threaded
+    parser (several times faster than pd.read_csv on the wide BTS files).
+
+    columns limits parsing to those columns. column_types maps column name to
+    a pyarrow type alias ('string', 'float64', ...) to skip inference where
+    it would pick the wrong type (e.g. FlightDate would become a timestamp).
+    Empty fields are read as nulls, as pd.read_csv does. With
+    include_missing_columns, columns absent from the file come back all-null
+    instead of raising. column_names is for files without a header row.
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
     s3 = get_s3_client()
     obj = s3.get_object(Bucket=bucket, Key=key)
-    return pd.read_csv(io.BytesIO(obj['Body'].read()), low_memory=False)
+    convert_options = pacsv.ConvertOptions(
+        include_columns=columns,
+        include_missing_columns=include_missing_columns,
+        column_types={
+            name: pa.type_for_alias(alias) for name, alias in (column_types or {}).items()
+        },
+        strings_can_be_null=True,
+    )
+    # Parse straight off the HTTP stream: blocks are parsed as they arrive,
+    # and the whole file never sits in memory as one bytes object
+    table = pacsv.read_csv(
+        pa.PythonFile(obj['Body'], mode='r'),
+        read_options=pacsv.ReadOptions(block_size=64 << 20, column_names=column_names),
+        convert_options=convert_options,
+    )
+    # One block per column, with Arrow buffers freed as each is converted,
+    # so the table and the frame aren't both held at full size
+    return table.to_pandas(split_blocks=True, self_destruct=True)
 
 
 def list_files(bucket, prefix=''):
-    """List all files in a bucket with optional prefix filter."""
+    """
+    Yield every key in a bucket, with optional prefix filter.
+
+    list_objects_v2 returns at most 1000 keys per call, so pages are
+    followed until the listing is complete. Keys are yielded as each page
+    arrives; wrap in list() where a concrete list is needed. A failed page
+    request raises rather than ending the listing early, so callers never
+    mistake a partial listing for the whole bucket.
+    """
     s3 = get_s3_client()
+    paginator = s3.get_paginator('list_objects_v2')
     try:
-        response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
-        return [obj['Key'] for obj in response.get('Contents', [])]
-    except Exception:
-        return []
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix,
+                                       PaginationConfig={'PageSize': 1000}):
+            for obj in page.get('Contents', []):
+                yield obj['Key']
+    except Exception as e:
+        print(f"Failed to list s3://{bucket}/{prefix}: {e}")
+        raise
@@ -33,7 +33,7 @@ flights_schema = DataFrameSchema(
             description="Destination IATA airport code"),
         
         # Delay fields — can be null (cancelled flights)
-        # Thresholds match quality_checks in DAG (-150 to 5000)
+        # Thresholds match check_flight_integrity in DAG (-150 to 5000)
         "DepDelay": Column(float, nullable=True,
             checks=[
                 Check.greater_than_or_equal_to(-150),   # Allow 2.5 hours early
@@ -111,6 +111,41 @@ airports_schema = DataFrameSchema(
 )
 
 
+def validate_flights_fast(df):
+    """
+    flights_schema's value rules as plain column masks, cheap enough to run
+    on every row of a file (Pandera itself only sees a sample).
+
+    Returns {rule: number of failing rows} for the rules that have failures.
+    """
+    def in_range(col, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True):
+        values = df[col]
+        ok = values.notna()
+        if lo is not None:
+            ok &= (values >= lo) if lo_inclusive else (values > lo)
+        if hi is not None:
+            ok &= (values <= hi) if hi_inclusive else (values < hi)
+        return ok | values.isna()  # nullable columns: missing is fine
+
+    def code_length(col, lo, hi):
+        return df[col].astype('string').str.len().between(lo, hi).fillna(False).astype(bool)
+
+    rules = {
+        'Reporting_Airline length 2-10': code_length('Reporting_Airline', 2, 10),
+        'Flight_Number_Reporting_Airline > 0': in_range('Flight_Number_Reporting_Airline', lo=0, lo_inclusive=False),
+        'Origin length 3-5': code_length('Origin', 3, 5),
+        'Dest length 3-5': code_length('Dest', 3, 5),
+        'DepDelay in [-150, 5000]': in_range('DepDelay', -150, 5000),
+        'ArrDelay in [-150, 5000]': in_range('ArrDelay', -150, 5000),
+        'Cancelled in {0, 1}': df['Cancelled'].isin([0.0, 1.0]),
+        'Diverted in {0, 1}': df['Diverted'].isin([0.0, 1.0]),
+        'Distance > 0': in_range('Distance', lo=0, lo_inclusive=False),
+        'AirTime in (0, 1500)': in_range('AirTime', 0, 1500, lo_inclusive=False, hi_inclusive=False),
+    }
+    failures = {rule: int((~ok).sum()) for rule, ok in rules.items()}
+    return {rule: n for rule, n in failures.items() if n}
+
+
 # =============================================
 # WEATHER OBSERVATIONS VALIDATION SCHEMA
 # =============================================
@@ -9,10 +9,12 @@ No registration required. Data goes back decades.
 Station IDs = 'K' + airport IATA code (e.g., ATL → KATL)
 """
 import urllib.request
-import csv
-import io
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+# IEM requests in flight at once (each airport is an independent download)
+FETCH_WORKERS = 10
+
 
 # =============================================
 # AIRPORT TO WEATHER STATION MAPPING
@@ -73,8 +75,10 @@ def fetch_weather_from_iem(station_id, start_date, end_date):
         end_date: End date (datetime or string 'YYYY-MM-DD')
 
     Returns:
-        List of daily weather observation dicts
+        DataFrame of observations, one row per report (NaN = missing)
     """
+    import pandas as pd
+
     # Parse dates if strings
     if isinstance(start_date, str):
         start_date = datetime.strptime(start_date, '%Y-%m-%d')
@@ -93,85 +97,74 @@ def fetch_weather_from_iem(station_id, start_date, end_date):
   )
 
     try:
+        # Parse the CSV response column-wise. IEM returns 'M' for missing
+        # values and 'T' for trace amounts; both load as NaN.
         with urllib.request.urlopen(url, timeout=30) as response:
-            data = response.read().decode('utf-8')
-
-        # Parse CSV response
-        reader = csv.DictReader(io.StringIO(data))
-        observations = []
-
-        for row in reader:
-            # IEM returns 'M' for missing values
-            def safe_float(val):
-                if val is None or val == '' or val == 'M' or val == 'T':
-                    return None
-                try:
-                    return float(val)
-                except (ValueError, TypeError):
-                    return None
-
-            valid_time = row.get('valid', '')
-            if not valid_time:
-                continue        
-            
-            obs_date = valid_time.split(' ')[0] if ' ' in valid_time else valid_time
-            
-            obs = {
-                'station_id': station_id,
-                'observation_date': obs_date,
-                'observation_time': valid_time,
-                'avg_temperature': safe_float(row.get('tmpf')),
-                'max_temperature': None,  # Not available in hourly
-                'min_temperature': None,  # Not available in hourly
-                'precipitation': safe_float(row.get('p01i')),
-                'snow_depth': None,  # Not in ASOS hourly
-                'avg_wind_speed': safe_float(row.get('sknt')),
-                'max_wind_speed': None,  # Not available in hourly
-                'avg_visibility': safe_float(row.get('vsby')),
-                'humidity': safe_float(row.get('relh')),
-                'dew_point': safe_float(row.get('dwpf')),
-            }
-
+            df = pd.read_csv(response, dtype={'valid': str}, na_values=['M', 'T'])
+
+        if 'valid' not in df.columns:
+            return pd.DataFrame()
+        df = df[df['valid'].notna() & (df['valid'] != '')]
+
+        def numeric(col):
+            if col not in df.columns:
+                return pd.Series(float('nan'), index=df.index)
+            return pd.to_numeric(df[col], errors='coerce')
+
+        temperature = numeric('tmpf')
+        precipitation = numeric('p01i')
+        visibility = numeric('vsby')
+
+        return pd.DataFrame({
+            'station_id': station_id,
+            'observation_date': df['valid'].str.split(' ').str[0],
+            'observation_time': df['valid'],
+            'avg_temperature': temperature,
+            'max_temperature': None,  # Not available in hourly
+            'min_temperature': None,  # Not available in hourly
+            'precipitation': precipitation,
+            'snow_depth': None,  # Not in ASOS hourly
             # Convert wind from knots to mph (1 knot = 1.15078 mph)
-            if obs['avg_wind_speed'] is not None:
-                obs['avg_wind_speed'] = round(obs['avg_wind_speed'] * 1.15078, 1)
-            if obs['max_wind_speed'] is not None:
-                obs['max_wind_speed'] = round(obs['max_wind_speed'] * 1.15078, 1)
-
+            'avg_wind_speed': (numeric('sknt') * 1.15078).round(1),
+            'max_wind_speed': None,  # Not available in hourly
+            'avg_visibility': visibility,
+            'humidity': numeric('relh'),
+            'dew_point': numeric('dwpf'),
             # Determine conditions based on weather data
-            obs['conditions'] = determine_conditions(obs)
-
-            observations.append(obs)
-
-        return observations
+            'conditions': determine_conditions_column(precipitation, temperature, visibility),
+        })
 
     except Exception as e:
         print(f"Error fetching weather for {station_id}: {e}")
-        return []
+        return pd.DataFrame()
 
 
-def determine_conditions(obs):
+def determine_conditions_column(precipitation, temperature, visibility):
     """
-    Determine weather condition string from observation data.
-    Simple heuristic based on precipitation and temperature.
+    Weather condition string per observation, over whole columns (Series of
+    floats, NaN = missing). Simple heuristic based on precipitation and
+    temperature: precipitation below freezing is Snow, then Rain / Light Rain
+    by amount, then Fog/Low Visibility under 3 miles, then Cold/Clear or Clear.
     """
-    precip = obs.get('precipitation') or 0
-    temp = obs.get('avg_temperature')
-    visibility = obs.get('avg_visibility') or 10
-
-    # Snow: precipitation when temp is below freezing
-    if precip > 0 and temp is not None and temp < 32:
-        return 'Snow'
-    elif precip > 0.1:
-        return 'Rain'
-    elif precip > 0:
-        return 'Light Rain'
-    elif visibility < 3:
-        return 'Fog/Low Visibility'
-    elif temp is not None and temp < 32:
-        return 'Cold/Clear'
-    else:
-        return 'Clear'
+    import numpy as np
+    import pandas as pd
+
+    precip = precipitation.fillna(0)
+    # Missing and 0 visibility both count as 10 miles (unrestricted)
+    vis = visibility.fillna(10).replace(0, 10)
+    # Comparisons with NaN are False, so a missing temperature is never freezing
+    conditions = np.select(
+        [
+            (precip > 0) & (temperature < 32),
+            precip > 0.1,
+            precip > 0,
+            vis < 3,
+            temperature < 32,
+        ],
+        ['Snow', 'Rain', 'Light Rain', 'Fog/Low Visibility', 'Cold/Clear'],
+        default='Clear',
+    )
+    return pd.Series(conditions, index=precipitation.index)
 
 
 def fetch_weather_for_airports(airports, start_date, end_date):
@@ -184,27 +177,34 @@ def fetch_weather_for_airports(airports, start_date, end_date):
         end_date: End date string 'YYYY-MM-DD'
 
     Returns:
-        List of weather observation dicts with airport_code added
+        DataFrame of observations with airport_code added
     """
-    all_observations = []
+    import pandas as pd
+
+    frames = []
 
+    mapped = []
     for airport in airports:
-        station_id = AIRPORT_STATION_MAP.get(airport)
-        if not station_id:
+        if airport in AIRPORT_STATION_MAP:
+            mapped.append(airport)
+        else:
             print(f"  Skipping {airport} - no station mapping")
-            continue
 
+    def fetch(airport):
+        station_id = AIRPORT_STATION_MAP[airport]
         print(f"  Fetching weather for {airport} ({station_id})...")
-
-        obs_list = fetch_weather_from_iem(station_id, start_date, end_date)
-
-        # Add airport_code to each observation
-        for obs in obs_list:
-            obs['airport_code'] = airport
-
-        all_observations.extend(obs_list)
-        print(f"    Got {len(obs_list)} observations")
-
+        return fetch_weather_from_iem(station_id, start_date, end_date)
+
+    # Downloads are network-bound and independent, so run several at once;
+    # map() keeps results in airport order
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        for airport, obs in zip(mapped, pool.map(fetch, mapped)):
+            # Add airport_code to each observation
+            if len(obs):
+                frames.append(obs.assign(airport_code=airport))
+            print(f"    Got {len(obs)} observations for {airport}")
+
+    all_observations = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     print(f"\nTotal observations fetched: {len(all_observations)}")
     return all_observations
 
@@ -220,11 +220,13 @@ def generate_weather_data(airports, dates):
         dates: List of date objects or strings
 
     Returns:
-        List of weather observation dicts
+        DataFrame of observations (NaN = missing), one row per report
     """
+    import pandas as pd
+
     if not dates:
         print("No dates provided!")
-        return []
+        return pd.DataFrame()
 
     # Convert dates to strings and find range
     date_strings = []
@@ -249,9 +251,19 @@ def generate_weather_data(airports, dates):
     # Fetch from IEM
     observations = fetch_weather_for_airports(valid_airports, start_date, end_date)
 
-    # Filter to only dates we need (in case IEM returns extra)
+    # Filter to only dates we need (in case IEM returns extra). date_dim is
+    # usually a gap-free range, and then a bounds check on the ISO strings
+    # does the job; only a sparse date set needs a per-observation lookup.
+    if observations.empty:
+        print("Observations matching our dates: 0")
+        return observations
+    obs_dates = observations['observation_date']
     date_set = set(date_strings)
-    filtered = [obs for obs in observations if obs['observation_date'] in date_set]
+    span_days = (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days + 1
+    if len(date_set) == span_days:
+        filtered = observations[(obs_dates >= start_date) & (obs_dates <= end_date)]
+    else:
+        filtered = observations[obs_dates.isin(date_set)]
 
     print(f"Observations matching our dates: {len(filtered)}")
     return filtered
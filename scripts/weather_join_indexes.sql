@@ -0,0 +1,23 @@
+-- =============================================
+-- MANUAL MIGRATION: HOURLY WEATHER JOIN INDEXES
+-- =============================================
+-- WEATHER_JOIN in api/agent/tools.py matches flights to weather_hourly on
+-- (airport, date, hour). Composite indexes on both sides let the planner
+-- probe instead of hash-joining the full tables.
+--
+-- weather_hourly and flights.dep_hour come from outside this repo (init_db.sql
+-- and the DAG never create them), so this is not part of init_db.sql. Run it
+-- by hand once both exist:
+--
+--   psql -h localhost -p 5433 -U "$FLIGHTS_DB_USER" -d "$FLIGHTS_DB_NAME" -f scripts/weather_join_indexes.sql
+--
+-- CONCURRENTLY builds without blocking writes, but cannot run inside a
+-- transaction block: don't wrap this file in BEGIN/COMMIT or run it with
+-- psql --single-transaction. If a build is interrupted it leaves an INVALID
+-- index behind; drop it and run this again.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_weather_hourly_join
+    ON weather_hourly(airport_code, observation_date, hour);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_flights_weather_join
+    ON flights(origin_airport, flight_date, dep_hour);
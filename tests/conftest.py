@@ -0,0 +1,38 @@
+"""
+Shared pytest fixtures.
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    One TestClient over the real app for the whole session, so the app and
+    its HTTP client are built once. Tests only swap module attributes (via
+    monkeypatch, undone per test), never the app itself, so sharing is safe.
+    Not entered as a context manager: the lifespan would open the DB pool and
+    Redis, which these tests mock rather than need.
+    """
+    from api.main import app
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def mock_db(monkeypatch):
+    """
+    Stub the database layer the agent tools query, so no test needs a live
+    DB. Tests program the mocks directly, e.g.
+    mock_db.fetch_all.return_value = rows.
+    """
+    fetch_all = MagicMock(return_value=[])
+    fetch_one = MagicMock(return_value=None)
+    monkeypatch.setattr("api.agent.tools.fetch_all", fetch_all)
+    monkeypatch.setattr("api.agent.tools.fetch_one", fetch_one)
+    # The data-version lookup behind every tool cache key is a DB read too;
+    # pinning it keeps the programmed mocks for the tool's own queries
+    monkeypatch.setattr("api.agent.tools._data_version", lambda: "")
+    yield SimpleNamespace(fetch_all=fetch_all, fetch_one=fetch_one)
@@ -5,9 +5,17 @@ These verify the foundational pieces without needing a real LLM:
 - AgentState schema is correct
 - All 9 tools are registered (catches accidental removals)
 - The graph compiles without errors (validates node/edge wiring)
+- A failed run resumes from its last checkpoint
+- Block-list message content comes back as a plain-string answer
+- The tool-call cap trims an oversized batch and still ends in an answer
+- One tool call per turn reaches the cap before the recursion limit
+- A run nobody is waiting on any more is cancelled after the timeout
 """
+import asyncio
 from unittest.mock import patch, MagicMock
 
+import pytest
+
 
 def test_agent_state_has_messages():
     """AgentState should have a messages key for the conversation history."""
@@ -48,3 +56,169 @@ def test_graph_builds_and_compiles():
         # Verify both nodes exist in the compiled graph
         assert "agent" in compiled.nodes
         assert "tools" in compiled.nodes
+
+
+def test_failed_run_resumes_from_checkpoint():
+    """A run that fails part-way resumes on the next ask instead of
+    repeating the LLM turns and tool calls it already completed."""
+    from langchain_core.messages import AIMessage
+    from api.agent import graph
+
+    replies = [
+        AIMessage(content="", tool_calls=[{"name": "fake_tool", "args": {}, "id": "t1"}]),
+        RuntimeError("LLM overloaded"),
+        AIMessage(content="Delta is best."),
+    ]
+
+    async def fake_ainvoke(messages):
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    mock_llm = MagicMock()
+    mock_llm.bind_tools.return_value = mock_llm
+    mock_llm.ainvoke = fake_ainvoke
+    tool = MagicMock()
+    tool.ainvoke = MagicMock(side_effect=lambda args: asyncio.sleep(0, result="{}"))
+
+    with patch("api.agent.graph.get_llm", return_value=mock_llm), \
+         patch.object(graph, "_compiled", None), \
+         patch.dict(graph._TOOLS_BY_NAME, {"fake_tool": tool}):
+        try:
+            asyncio.run(graph._run_graph("Which airline?", "which airline"))
+        except RuntimeError:
+            pass
+        assert "which airline" in graph._resumable
+
+        result = asyncio.run(graph._run_graph("Which airline?", "which airline"))
+
+    assert result == {"answer": "Delta is best.", "tools_used": ["fake_tool"]}
+    assert tool.ainvoke.call_count == 1
+    assert replies == []
+    assert "which airline" not in graph._resumable
+
+
+def test_run_agent_answer_from_content_blocks():
+    """With streaming and tools bound, Anthropic returns content as a list of
+    blocks; the answer must still come back as a plain string."""
+    from langchain_core.messages import AIMessage
+    from api.agent import graph
+
+    mock_llm = MagicMock()
+    mock_llm.bind_tools.return_value = mock_llm
+
+    async def fake_ainvoke(messages):
+        return AIMessage(content=[
+            {"type": "text", "text": "Delta ", "index": 0},
+            {"type": "text", "text": "is best.", "index": 1},
+        ])
+
+    mock_llm.ainvoke = fake_ainvoke
+    with patch("api.agent.graph.get_llm", return_value=mock_llm), \
+         patch.object(graph, "_compiled", None), \
+         patch("api.agent.graph.get_cached_answer", return_value=None), \
+         patch("api.agent.graph.cache_answer"):
+        result = asyncio.run(graph.run_agent("Which airline is best?"))
+
+    assert result == {"answer": "Delta is best.", "tools_used": []}
+
+
+def test_tool_call_cap_trims_batch_and_still_answers():
+    """One turn asking for more calls than MAX_TOOL_CALLS runs only the budget,
+    answers the rest with a limit result, then gets a final no-tools turn."""
+    from langchain_core.messages import AIMessage, ToolMessage
+    from api.agent import graph
+
+    n_calls = graph.MAX_TOOL_CALLS + 2
+    seen = []
+
+    async def tooled_ainvoke(messages):
+        return AIMessage(content="", tool_calls=[
+            {"name": "fake_tool", "args": {"i": i}, "id": f"t{i}"} for i in range(n_calls)
+        ])
+
+    async def final_ainvoke(messages):
+        seen.extend(messages)
+        return AIMessage(content="Partial answer.")
+
+    tooled, final = MagicMock(), MagicMock()
+    tooled.ainvoke, final.ainvoke = tooled_ainvoke, final_ainvoke
+    mock_llm = MagicMock()
+    mock_llm.bind_tools.side_effect = lambda tools, **kw: final if "tool_choice" in kw else tooled
+    tool = MagicMock()
+    tool.ainvoke = MagicMock(side_effect=lambda args: asyncio.sleep(0, result="{}"))
+
+    with patch("api.agent.graph.get_llm", return_value=mock_llm), \
+         patch.object(graph, "_compiled", None), \
+         patch.dict(graph._TOOLS_BY_NAME, {"fake_tool": tool}):
+        result = asyncio.run(graph._run_graph("Compare everything", "compare everything"))
+
+    assert result == {"answer": "Partial answer.", "tools_used": ["fake_tool"]}
+    assert tool.ainvoke.call_count == graph.MAX_TOOL_CALLS
+    tool_results = [m for m in seen if isinstance(m, ToolMessage)]
+    assert len(tool_results) == n_calls
+    assert [m.content for m in tool_results[-2:]] == [graph.TOOL_LIMIT_MESSAGE] * 2
+
+
+def test_tool_call_cap_one_call_per_turn_still_answers():
+    """An LLM asking for one new call every turn is stopped by MAX_TOOL_CALLS
+    and the final no-tools turn, not by the graph's recursion limit."""
+    from langchain_core.messages import AIMessage
+    from api.agent import graph
+
+    turns = []
+
+    async def tooled_ainvoke(messages):
+        turns.append(len(turns))
+        return AIMessage(content="", tool_calls=[
+            {"name": "fake_tool", "args": {"i": len(turns)}, "id": f"t{len(turns)}"}
+        ])
+
+    async def final_ainvoke(messages):
+        return AIMessage(content="Best effort answer.")
+
+    tooled, final = MagicMock(), MagicMock()
+    tooled.ainvoke, final.ainvoke = tooled_ainvoke, final_ainvoke
+    mock_llm = MagicMock()
+    mock_llm.bind_tools.side_effect = lambda tools, **kw: final if "tool_choice" in kw else tooled
+    tool = MagicMock()
+    tool.ainvoke = MagicMock(side_effect=lambda args: asyncio.sleep(0, result="{}"))
+
+    with patch("api.agent.graph.get_llm", return_value=mock_llm), \
+         patch.object(graph, "_compiled", None), \
+         patch.dict(graph._TOOLS_BY_NAME, {"fake_tool": tool}):
+        result = asyncio.run(graph._run_graph("Keep digging", "keep digging"))
+
+    assert result == {"answer": "Best effort answer.", "tools_used": ["fake_tool"]}
+    assert tool.ainvoke.call_count == graph.MAX_TOOL_CALLS
+    assert len(turns) == graph.MAX_TOOL_CALLS
+
+
+def test_timed_out_run_is_cancelled():
+    """Once the last caller times out, the orphaned run is cancelled and
+    dropped from the in-flight table instead of holding its LLM slot."""
+    from api.agent import graph
+
+    started = []
+
+    async def never_finishes(question, key):
+        started.append(key)
+        await asyncio.Event().wait()
+
+    async def ask():
+        with pytest.raises(asyncio.TimeoutError):
+            await graph.run_agent("Which airline is best?")
+        await asyncio.sleep(0)  # let the cancellation land
+        return started
+
+    settings = MagicMock(agent_timeout_seconds=0.01)
+    with patch("api.agent.graph._run_graph", never_finishes), \
+         patch("api.agent.graph.settings", settings), \
+         patch("api.agent.graph.get_cached_answer", return_value=None), \
+         patch("api.agent.graph.cache_answer") as cache_answer:
+        assert len(asyncio.run(ask())) == 1
+
+    assert graph._inflight == {}
+    assert graph._waiters == {}
+    cache_answer.assert_not_called()
@@ -2,72 +2,217 @@
 Unit tests for agent tools — verify each tool calls fetch_all/fetch_one
 with the right queries and returns properly structured JSON.
 
-These tests mock the database layer so they run without a live DB connection.
+These tests use the mock_db fixture (conftest.py) in place of the database
+layer, so they run without a live DB connection.
 Each test validates that the tool's output is valid JSON and contains the
 expected keys/structure.
 """
 import json
 from unittest.mock import patch
 
+# mock_db and patch("api.agent.tools.<name>") rebind attributes on this
+# already-loaded module, so the tools can be imported once here rather than
+# in every test
+from api.agent.tools import (
+    _to_json,
+    get_airport_info,
+    get_carrier_details,
+    get_carrier_performance,
+    get_delay_patterns,
+    get_system_health,
+    get_weather_impact,
+)
 
-def test_get_carrier_performance():
+# Mock DB payloads, built once at import rather than inside every test
+_MOCK_CARRIER_ROWS = [{"carrier_code": "DL", "carrier_name": "Delta", "total_flights": 500000}]
+_MOCK_CARRIER = {"carrier_code": "AA", "carrier_name": "American Airlines"}
+_MOCK_BREAKDOWN = {"avg_carrier_delay": 10.5, "avg_weather_delay": 3.2}
+_MOCK_MONTHLY = [{"month": 1, "month_name": "January", "total_flights": 50000}]
+_MOCK_AIRPORT_PROFILE = {
+    "airport": {"airport_code": "JFK", "airport_name": "John F Kennedy Intl"},
+    "stats": {"departures": 1200, "arrivals": 1180},
+    "top_carriers": [{"carrier_code": "B6", "carrier_name": "JetBlue", "flights": 400}],
+}
+_MOCK_HEALTH = {
+    "tables": {"flights": 6400000, "carriers": 14},
+    "min_date": "2025-01-01",
+    "max_date": "2025-11-30",
+}
+_MOCK_DELAY_TOTALS = {
+    "carrier_cnt": 10, "carrier_avg": 30.0,
+    "weather_cnt": 40, "weather_avg": 55.5,
+    "nas_cnt": 20, "nas_avg": 18.0,
+    "security_cnt": 0, "security_avg": None,
+    "late_aircraft_cnt": 30, "late_aircraft_avg": 42.1,
+}
+_MOCK_RANKING = [
+    {"carrier_code": "DL", "total_flights": 500},
+    {"carrier_code": "UA", "total_flights": 400},
+    {"carrier_code": "AA", "total_flights": 300},
+]
+
+
+def _call(tool, args):
+    """
+    Call a tool's underlying function directly and decode its JSON output.
+    Skips LangChain's per-call argument-schema validation, which these tests
+    don't exercise; test_tool_cache_hit_skips_database still goes through
+    .invoke end to end.
+    """
+    return json.loads(tool.func(**args))
+
+
+def test_get_carrier_performance(mock_db):
     """Should return a list of carriers sorted by the requested metric."""
-    mock_rows = [{"carrier_code": "DL", "carrier_name": "Delta", "total_flights": 500000}]
-    with patch("api.agent.tools.fetch_all", return_value=mock_rows):
-        from api.agent.tools import get_carrier_performance
-        result = json.loads(get_carrier_performance.invoke({"sort_by": "flights"}))
-        assert len(result) == 1
-        assert result[0]["carrier_code"] == "DL"
+    mock_db.fetch_all.return_value = _MOCK_CARRIER_ROWS
+    result = _call(get_carrier_performance, {"sort_by": "flights"})
+    assert result["columns"] == ["carrier_code", "carrier_name", "total_flights"]
+    assert result["rows"] == [["DL", "Delta", 500000]]
 
 
-def test_get_carrier_details_not_found():
+def test_get_carrier_details_not_found(mock_db):
     """Should return an error message for a carrier code that doesn't exist."""
-    with patch("api.agent.tools.fetch_one", return_value=None):
-        from api.agent.tools import get_carrier_details
-        result = json.loads(get_carrier_details.invoke({"carrier_code": "ZZ"}))
-        assert "error" in result
+    mock_db.fetch_one.return_value = None
+    result = _call(get_carrier_details, {"carrier_code": "ZZ"})
+    assert "error" in result
 
 
-def test_get_carrier_details_found():
+def test_get_carrier_details_found(mock_db):
     """Should return carrier info, delay breakdown, and monthly trend data."""
-    carrier = {"carrier_code": "AA", "carrier_name": "American Airlines"}
-    breakdown = {"avg_carrier_delay": 10.5, "avg_weather_delay": 3.2}
-    monthly = [{"month": 1, "month_name": "January", "total_flights": 50000}]
-
-    def mock_fetch_one(query, params=None):
-        # Route to the right mock based on what the query is looking for
-        if "carrier_name" in query and "AVG" not in query:
-            return carrier
-        return breakdown
-
-    with patch("api.agent.tools.fetch_one", side_effect=mock_fetch_one), \
-         patch("api.agent.tools.fetch_all", return_value=monthly):
-        from api.agent.tools import get_carrier_details
-        result = json.loads(get_carrier_details.invoke({"carrier_code": "AA"}))
-        assert result["carrier"]["carrier_code"] == "AA"
-        assert result["delay_breakdown"] is not None
-        assert len(result["monthly_trend"]) == 1
-
-
-def test_get_airport_info_not_found():
+    # fetch_one runs in a fixed order: the existence lookup, then (alongside
+    # the monthly fetch_all) the delay breakdown
+    mock_db.fetch_one.side_effect = [_MOCK_CARRIER, _MOCK_BREAKDOWN]
+    mock_db.fetch_all.return_value = _MOCK_MONTHLY
+    result = _call(get_carrier_details, {"carrier_code": "AA"})
+    assert result["carrier"] == _MOCK_CARRIER
+    assert result["delay_breakdown"] == _MOCK_BREAKDOWN
+    assert len(result["monthly_trend"]["rows"]) == 1
+    assert mock_db.fetch_one.call_count == 2
+
+
+def test_get_airport_info_not_found(mock_db):
     """Should return an error for an airport code that doesn't exist in the data."""
-    with patch("api.agent.tools.fetch_one", return_value=None):
-        from api.agent.tools import get_airport_info
-        result = json.loads(get_airport_info.invoke({"airport_code": "ZZZ"}))
-        assert "error" in result
-
-
-def test_get_system_health():
-    """Should return table counts and date range from the database."""
-    def mock_fetch_one(query, params=None):
-        if "MIN(flight_date)" in query:
-            return {"min_date": "2025-01-01", "max_date": "2025-11-30"}
-        if "COUNT(*)" in query:
-            return {"cnt": 100}
-        return None
-
-    with patch("api.agent.tools.fetch_one", side_effect=mock_fetch_one):
-        from api.agent.tools import get_system_health
-        result = json.loads(get_system_health.invoke({}))
-        assert "tables" in result
-        assert "date_range" in result
+    mock_db.fetch_one.return_value = None
+    result = _call(get_airport_info, {"airport_code": "ZZZ"})
+    assert "error" in result
+
+
+def test_get_airport_info_profile_single_query(mock_db):
+    """The airport profile (row, stats, top carriers) comes back from one query."""
+    mock_db.fetch_one.return_value = _MOCK_AIRPORT_PROFILE
+    result = _call(get_airport_info, {"airport_code": "jfk"})
+    assert result["airport"]["airport_code"] == "JFK"
+    assert result["top_carriers"]["rows"] == [["B6", "JetBlue", 400]]
+    assert mock_db.fetch_one.call_count == 1
+    mock_db.fetch_all.assert_not_called()
+
+
+def test_get_system_health(mock_db):
+    """Should return table counts and date range from a single database query."""
+    mock_db.fetch_one.return_value = _MOCK_HEALTH
+    result = _call(get_system_health, {})
+    assert result["tables"]["flights"] == 6400000
+    assert result["tables"]["weather_hourly"] == 0  # not yet analyzed → 0
+    assert result["date_range"] == {"min_date": "2025-01-01", "max_date": "2025-11-30"}
+    assert mock_db.fetch_one.call_count == 1  # a single round-trip
+
+
+def test_to_json_columnar():
+    """Row lists become columns + rows; scalar dicts and mixed lists are left alone."""
+    rows = [{"code": "AA", "flights": i} for i in range(25)]
+    result = json.loads(_to_json({"summary": {"total": 25}, "rows": rows[:2], "tags": ["a", "b"]}))
+    assert result["summary"] == {"total": 25}
+    assert result["rows"] == {"columns": ["code", "flights"], "rows": [["AA", 0], ["AA", 1]]}
+    assert result["tags"] == ["a", "b"]
+    assert len(json.loads(_to_json(rows))["rows"]) == 20
+
+
+def test_get_delay_patterns_breakdown_single_scan(mock_db):
+    """The BTS breakdown comes from one aggregate row, pivoted to one entry per type."""
+    mock_db.fetch_one.return_value = _MOCK_DELAY_TOTALS
+    result = _call(get_delay_patterns, {"carrier": "aa"})
+    breakdown = result["delay_type_breakdown"]
+    assert breakdown["columns"] == ["delay_type", "flights_affected", "avg_minutes"]
+    assert [r[0] for r in breakdown["rows"]] == ["Weather", "Late Aircraft", "NAS", "Carrier", "Security"]
+    assert breakdown["rows"][0] == ["Weather", 40, 55.5]
+    assert "UNION ALL" not in mock_db.fetch_one.call_args[0][0]
+
+
+def test_tool_cache_hit_skips_database(mock_db):
+    """A cached result is returned as-is without querying the database."""
+    store = {}
+    mock_db.fetch_all.return_value = [{"carrier_code": "DL"}]
+    with patch("api.agent.tools.get_tool_result", side_effect=store.get), \
+         patch("api.agent.tools.cache_tool_result", side_effect=lambda k, v, ttl: store.__setitem__(k, v)):
+        first = get_carrier_performance.invoke({})
+        second = get_carrier_performance.invoke({"sort_by": "flights"})
+        assert first == second
+        assert mock_db.fetch_all.call_count == 1
+        assert all(k.startswith("tool:_carrier_rankings:") for k in store)
+
+
+def test_tool_cache_skips_error_results(mock_db):
+    """An error payload is returned but not cached, so the next call retries the DB."""
+    store = {}
+    mock_db.fetch_one.return_value = None  # carrier lookup misses -> {"error": ...}
+    with patch("api.agent.tools.get_tool_result", side_effect=store.get), \
+         patch("api.agent.tools.cache_tool_result", side_effect=lambda k, v, ttl: store.__setitem__(k, v)):
+        first = get_carrier_details.invoke({"carrier_code": "ZZ"})
+        second = get_carrier_details.invoke({"carrier_code": "ZZ"})
+        assert "error" in json.loads(first)
+        assert first == second
+        assert store == {}
+        assert mock_db.fetch_one.call_count == 2
+
+
+def test_tool_cache_misses_after_new_load(mock_db):
+    """A new pipeline load changes the data version, so earlier entries are not served."""
+    store = {}
+    mock_db.fetch_all.return_value = [{"carrier_code": "DL"}]
+    with patch("api.agent.tools.get_tool_result", side_effect=store.get), \
+         patch("api.agent.tools.cache_tool_result", side_effect=lambda k, v, ttl: store.__setitem__(k, v)):
+        get_carrier_performance.invoke({})
+        with patch("api.agent.tools._data_version", return_value="2025-12-01 02:00:00"):
+            get_carrier_performance.invoke({})
+        assert mock_db.fetch_all.call_count == 2
+        assert len(store) == 2
+
+
+def test_get_carrier_performance_carriers_filter(mock_db):
+    """Narrowing to specific carriers filters the cached ranking, keeping its order."""
+    mock_db.fetch_all.return_value = _MOCK_RANKING
+    result = _call(get_carrier_performance, {"carriers": "aa, dl"})
+    assert result["rows"] == [["DL", 500], ["AA", 300]]
+
+
+def test_get_weather_impact_condition_filtered_in_sql(mock_db):
+    """The condition filter is pushed into every slice's WHERE clause as a bound ILIKE."""
+    get_weather_impact.func(condition="Snow", airport="den")
+    assert mock_db.fetch_all.call_count == 4
+    for call in mock_db.fetch_all.call_args_list:
+        query, params = call[0]
+        assert "w.conditions ILIKE %(cond)s" in query
+        assert params == {"airport": "DEN", "cond": "%Snow%", "max_items": 20}
+
+
+def test_like_filters_escape_wildcards(mock_db):
+    """'%', '_' and '\\' in a condition or search are matched literally, not as wildcards."""
+    get_weather_impact.func(condition="50%_\\")
+    query, params = mock_db.fetch_all.call_args_list[0][0]
+    assert "ILIKE %(cond)s ESCAPE '\\'" in query
+    assert params["cond"] == "%50\\%\\_\\\\%"
+
+    mock_db.fetch_all.reset_mock()
+    get_airport_info.func(search="%")
+    query, params = mock_db.fetch_all.call_args[0]
+    assert query.count("ESCAPE '\\'") == 3
+    assert params["search"] == "\\%"
+    assert params["like"] == "%\\%%"
+
+
+def test_to_json_decimal_and_date():
+    """Decimals from ROUND() become floats and dates become ISO strings."""
+    from datetime import date
+    from decimal import Decimal
+    result = json.loads(_to_json({"avg_delay": Decimal("12.5"), "flight_date": date(2025, 1, 6)}))
+    assert result == {"avg_delay": 12.5, "flight_date": "2025-01-06"}
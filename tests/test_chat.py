@@ -6,46 +6,166 @@ Covers the main scenarios a chat request can hit:
 - Invalid input (empty question → 422 validation error)
 - Successful query (mocked agent returns structured result)
 - Agent failure (internal error → 500 with meaningful message)
+- Cached responses (resent questions skip the agent)
+- Agent timeout (→ 504)
+- Anthropic rate limit (→ 429) and provider outage (→ 502)
+- Worker at capacity (→ 429 without running the agent)
+- Streaming variant (SSE events, errors reported in-stream)
 """
-from unittest.mock import patch, AsyncMock
-
-
-def test_chat_returns_503_without_api_key(client):
-    """When the API key isn't configured, chat should return 503 instead of crashing."""
-    with patch("api.routers.chat.settings") as mock_settings:
-        mock_settings.anthropic_api_key = ""
-        resp = client.post("/api/v1/chat", json={"question": "Which airline is best?"})
-        assert resp.status_code == 503
-        assert "ANTHROPIC_API_KEY" in resp.json()["detail"]
-
-
-def test_chat_validates_empty_question(client):
-    """Empty questions should be rejected at the validation layer."""
-    resp = client.post("/api/v1/chat", json={"question": ""})
-    assert resp.status_code == 422
-
-
-def test_chat_success(client):
-    """Happy path: agent processes the question and returns answer + tools used."""
-    mock_result = {
-        "answer": "Delta has the best on-time rate.",
-        "tools_used": ["get_carrier_performance"],
-    }
-    with patch("api.routers.chat.settings") as mock_settings, \
-         patch("api.routers.chat.run_agent", new_callable=AsyncMock, return_value=mock_result):
-        mock_settings.anthropic_api_key = "test-key"
-        resp = client.post("/api/v1/chat", json={"question": "Which airline is best?"})
-        assert resp.status_code == 200
-        data = resp.json()
-        assert data["answer"] == "Delta has the best on-time rate."
-        assert "get_carrier_performance" in data["tools_used"]
-
-
-def test_chat_agent_error_returns_500(client):
-    """When the agent throws an exception, we should get a 500 with a clean error message."""
-    with patch("api.routers.chat.settings") as mock_settings, \
-         patch("api.routers.chat.run_agent", new_callable=AsyncMock, side_effect=RuntimeError("LLM timeout")):
-        mock_settings.anthropic_api_key = "test-key"
-        resp = client.post("/api/v1/chat", json={"question": "test"})
-        assert resp.status_code == 500
-        assert "Agent error" in resp.json()["detail"]
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from api.routers import chat
+
+
+@pytest.fixture
+def chat_settings(monkeypatch):
+    """Point the chat router at a copy of the settings with a test API key
+    (Settings is frozen, so the copy is swapped in rather than edited)."""
+    patched = chat.settings.model_copy(update={"anthropic_api_key": "test-key"})
+    monkeypatch.setattr(chat, "settings", patched)
+    return patched
+
+
+@pytest.mark.parametrize(
+    "api_key,question,agent_behavior,expected_status,check",
+    [
+        # Key not configured: degrade gracefully with 503 instead of crashing
+        ("", "Which airline is best?", None, 503,
+         lambda body: "ANTHROPIC_API_KEY" in body["detail"]),
+        # Empty questions are rejected at the validation layer
+        ("test-key", "", None, 422, None),
+        # Happy path: agent processes the question and returns answer + tools used
+        ("test-key", "Which airline is best?",
+         {"answer": "Delta has the best on-time rate.", "tools_used": ["get_carrier_performance"]},
+         200,
+         lambda body: body["answer"] == "Delta has the best on-time rate."
+         and "get_carrier_performance" in body["tools_used"]),
+        # Agent exception: 500 with a clean error message
+        ("test-key", "test", RuntimeError("LLM timeout"), 500,
+         lambda body: "Agent error" in body["detail"]),
+    ],
+    ids=["no_api_key_503", "empty_question_422", "success", "agent_error_500"],
+)
+def test_chat(client, chat_settings, monkeypatch, api_key, question, agent_behavior, expected_status, check):
+    """One request through POST /chat per case, with the agent's result or failure mocked."""
+    monkeypatch.setattr(chat, "settings", chat_settings.model_copy(update={"anthropic_api_key": api_key}))
+    if isinstance(agent_behavior, Exception):
+        monkeypatch.setattr(chat, "run_agent", AsyncMock(side_effect=agent_behavior))
+    elif agent_behavior is not None:
+        monkeypatch.setattr(chat, "run_agent", AsyncMock(return_value=agent_behavior))
+
+    resp = client.post("/api/v1/chat", json={"question": question})
+    assert resp.status_code == expected_status
+    if check is not None:
+        assert check(resp.json())
+
+
+def test_chat_serves_cached_response(client, chat_settings, monkeypatch):
+    """A recently answered question is served from the response cache without running the agent."""
+    cached = '{"answer": "Delta has the best on-time rate.", "tools_used": ["get_carrier_performance"]}'
+    mock_agent = AsyncMock()
+    monkeypatch.setattr(chat, "get_cached_chat", MagicMock(return_value=cached))
+    monkeypatch.setattr(chat, "run_agent", mock_agent)
+    resp = client.post("/api/v1/chat", json={"question": "which  airline is BEST?"})
+    assert resp.status_code == 200
+    assert resp.json()["answer"] == "Delta has the best on-time rate."
+    mock_agent.assert_not_called()
+
+
+def test_chat_cache_key_normalizes_question():
+    """Case and spacing variants of a question share one cache slot."""
+    from api.agent.cache import chat_cache_key
+    assert chat_cache_key("UA delays") == chat_cache_key("  ua   DELAYS ")
+    assert chat_cache_key("UA delays").startswith("chat:")
+
+
+def test_chat_cache_key_ignores_punctuation_and_filler_words():
+    """Reworded variants of the same question share a slot; different data doesn't."""
+    from api.agent.cache import chat_cache_key
+    assert chat_cache_key("Show me the ORD delays, please!") == chat_cache_key("ORD delays?")
+    assert chat_cache_key("What were the ORD delays?") == chat_cache_key("ord delays")
+    assert chat_cache_key("ORD delays") != chat_cache_key("ATL delays")
+    assert chat_cache_key("What is it?") != chat_cache_key("What is?")
+
+
+def test_chat_agent_timeout_returns_504(client, chat_settings, monkeypatch):
+    """A run that exceeds the agent timeout should return 504, not hang or 500."""
+    import asyncio
+    monkeypatch.setattr(chat, "get_cached_chat", MagicMock(return_value=None))
+    monkeypatch.setattr(chat, "run_agent", AsyncMock(side_effect=asyncio.TimeoutError()))
+    resp = client.post("/api/v1/chat", json={"question": "slow question"})
+    assert resp.status_code == 504
+
+
+async def _fake_stream(question):
+    for text in ("Delta ", "is best."):
+        yield text
+
+
+async def _failing_stream(question):
+    yield "Delta "
+    raise RuntimeError("LLM down")
+
+
+def test_chat_stream_sends_sse_events(client, chat_settings, monkeypatch):
+    """Streamed text arrives as SSE data events followed by a done event."""
+    monkeypatch.setattr(chat, "run_agent_stream", _fake_stream)
+    resp = client.post("/api/v1/chat/stream", json={"question": "Which airline is best?"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.text == (
+        'data: {"text": "Delta "}\n\n'
+        'data: {"text": "is best."}\n\n'
+        'event: done\ndata: {}\n\n'
+    )
+
+
+def test_chat_stream_reports_errors_in_stream(client, chat_settings, monkeypatch):
+    """A failure mid-stream becomes an SSE error event, not a broken connection."""
+    monkeypatch.setattr(chat, "run_agent_stream", _failing_stream)
+    resp = client.post("/api/v1/chat/stream", json={"question": "test"})
+    assert resp.status_code == 200
+    assert "event: error" in resp.text
+    assert "Agent error: LLM down" in resp.text
+
+
+def _anthropic_error(cls, status_code):
+    import httpx
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(status_code, request=request)
+    return cls("provider error", response=response, body=None)
+
+
+def test_chat_rate_limit_returns_429(client, chat_settings, monkeypatch):
+    """An Anthropic rate limit should surface as 429 with Retry-After, not a 500."""
+    import anthropic
+    error = _anthropic_error(anthropic.RateLimitError, 429)
+    monkeypatch.setattr(chat, "get_cached_chat", MagicMock(return_value=None))
+    monkeypatch.setattr(chat, "run_agent", AsyncMock(side_effect=error))
+    resp = client.post("/api/v1/chat", json={"question": "busy question"})
+    assert resp.status_code == 429
+    assert "Retry-After" in resp.headers
+
+
+def test_chat_provider_outage_returns_502(client, chat_settings, monkeypatch):
+    """A 5xx from Anthropic should surface as 502 (upstream failure), not a 500."""
+    import anthropic
+    error = _anthropic_error(anthropic.InternalServerError, 503)
+    monkeypatch.setattr(chat, "get_cached_chat", MagicMock(return_value=None))
+    monkeypatch.setattr(chat, "run_agent", AsyncMock(side_effect=error))
+    resp = client.post("/api/v1/chat", json={"question": "outage question"})
+    assert resp.status_code == 502
+
+
+def test_chat_at_capacity_returns_429(client, chat_settings, monkeypatch):
+    """With every agent slot taken, new questions are rejected immediately."""
+    import asyncio
+    mock_agent = AsyncMock()
+    monkeypatch.setattr(chat, "get_cached_chat", MagicMock(return_value=None))
+    monkeypatch.setattr(chat, "_agent_slots", asyncio.Semaphore(0))
+    monkeypatch.setattr(chat, "run_agent", mock_agent)
+    resp = client.post("/api/v1/chat", json={"question": "burst question"})
+    assert resp.status_code == 429
+    mock_agent.assert_not_called()
@@ -0,0 +1,65 @@
+"""
+Tests for the Airflow DAG's task callables.
+
+The callables import s3_helper/db_helper inside the function, so those are
+swapped for in-memory fakes in sys.modules; no MinIO or Postgres is needed.
+Skipped where Airflow itself isn't installed.
+"""
+import importlib
+import sys
+import types
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("airflow")
+pd = pytest.importorskip("pandas")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "dags"))
+
+
+@pytest.fixture
+def dag_module():
+    return importlib.import_module("flight_pipeline_dag")
+
+
+@pytest.fixture
+def fake_helpers(monkeypatch):
+    """Fake s3_helper/db_helper modules; returns the connection mock."""
+    conn = MagicMock()
+
+    @contextmanager
+    def get_connection():
+        yield conn
+
+    monkeypatch.setitem(sys.modules, "s3_helper", types.SimpleNamespace(
+        read_csv_arrow_from_s3=lambda bucket, key, **kwargs: pd.DataFrame({
+            "Reporting_Airline": ["DL", "DL", "ZZ"],
+            "DOT_ID_Reporting_Airline": [19790.0, 19790.0, None],
+        }),
+    ))
+    monkeypatch.setitem(sys.modules, "db_helper", types.SimpleNamespace(get_connection=get_connection))
+    return conn
+
+
+def test_extract_carriers_names_known_and_unknown_codes(dag_module, fake_helpers, monkeypatch):
+    """Known codes get their airline name, unknown ones a placeholder; one row per carrier."""
+    execute_values = MagicMock()
+    monkeypatch.setattr(dag_module, "find_new_flight_files", lambda: ["raw/2025_01.csv"])
+    monkeypatch.setattr(dag_module, "execute_values", execute_values)
+
+    assert dag_module.extract_carriers() == 2
+    rows = execute_values.call_args[0][2]
+    assert rows == [("DL", "Delta Air Lines", 19790), ("ZZ", "Carrier ZZ", None)]
+
+
+def test_extract_carriers_no_new_files(dag_module, fake_helpers, monkeypatch):
+    """With nothing new to read, no carriers are written."""
+    execute_values = MagicMock()
+    monkeypatch.setattr(dag_module, "find_new_flight_files", lambda: [])
+    monkeypatch.setattr(dag_module, "execute_values", execute_values)
+
+    assert dag_module.extract_carriers() == 0
+    execute_values.assert_not_called()
@@ -0,0 +1,68 @@
+"""
+Tests for the pre-load validation in scripts/validation_schemas.py.
+
+validate_flights_fast re-implements flights_schema's value rules as column
+masks, so its per-rule counts are checked against Pandera's own failure
+cases on the same frame. Skipped where Pandera isn't installed.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pa = pytest.importorskip("pandera")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from validation_schemas import flights_schema, validate_flights_fast  # noqa: E402
+
+NAN = float("nan")
+
+
+def _flights():
+    """One clean row, then rows breaking one or more rules each."""
+    return pd.DataFrame({
+        "FlightDate": ["2025-01-01"] * 4,
+        "Reporting_Airline": ["DL", "D", "UA", "AA"],
+        "Flight_Number_Reporting_Airline": [100.0, 200.0, 0.0, NAN],
+        "Origin": ["ATL", "ORD", "JFKXYZ", "DFW"],
+        "Dest": ["LAX", "SFO", "BOS", "LA"],
+        "DepDelay": [5.0, -200.0, 10.0, NAN],
+        "ArrDelay": [-3.0, 0.0, NAN, 6000.0],
+        "Cancelled": [0.0, 0.0, 2.0, 1.0],
+        "Diverted": [0.0, 1.0, 0.0, 0.5],
+        "Distance": [946.0, NAN, 187.0, 0.0],
+        "AirTime": [120.0, 1500.0, 45.0, 0.0],
+    })
+
+
+def test_validate_flights_fast_counts():
+    assert validate_flights_fast(_flights()) == {
+        "Reporting_Airline length 2-10": 1,
+        "Flight_Number_Reporting_Airline > 0": 1,
+        "Origin length 3-5": 1,
+        "Dest length 3-5": 1,
+        "DepDelay in [-150, 5000]": 1,
+        "ArrDelay in [-150, 5000]": 1,
+        "Cancelled in {0, 1}": 1,
+        "Diverted in {0, 1}": 1,
+        "Distance > 0": 1,
+        "AirTime in (0, 1500)": 2,
+    }
+
+
+def test_validate_flights_fast_matches_schema():
+    """Each rule fails on exactly the rows Pandera rejects for that column."""
+    df = _flights()
+    with pytest.raises(pa.errors.SchemaErrors) as exc:
+        flights_schema.validate(df, lazy=True)
+    cases = exc.value.failure_cases.dropna(subset=["index"])
+    expected = cases.groupby("column")["index"].nunique().to_dict()
+
+    fast = validate_flights_fast(df)
+    assert {rule.split()[0]: n for rule, n in fast.items()} == expected
+
+
+def test_validate_flights_fast_clean_frame():
+    assert validate_flights_fast(_flights().iloc[:1]) == {}